@@ -0,0 +1,308 @@
+"""
+Benchmarks for the generation pipeline on synthetic definitions.
+
+    python -m benchmarks.generation --models 10,100,300 --output bench.json
+    python -m benchmarks.generation --models 10,100,300 --baseline bench.json
+
+Every stage is timed separately and the results are written as JSON.
+With --baseline, medians are compared against a previous run and the
+exit code is 1 when any stage got slower than --threshold.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from generator_app.app.core.config import settings
+from generator_app.app.core.generator.code_generator import CodeGenerator
+from generator_app.app.core.generator.output_sink import FileSystemSink, MemorySink, ZipSink
+from generator_app.app.core.generator.render_cache import get_render_cache
+from generator_app.app.core.generator.schema_index import SchemaIndex
+from generator_app.app.core.generator.template_registry import CORE_TEMPLATES_DIR
+from generator_app.app.workers.mtm_validator import validate_many_to_many
+from generator_app.app.workers.normalizer import normalize_project_definition
+
+
+FIELD_TYPES = ["str", "int", "float", "bool", "datetime"]
+
+
+# -----------------------------------------------------------------------------
+# Synthetic definitions
+# -----------------------------------------------------------------------------
+def build_definition(
+    models: int,
+    fields: int,
+    fks: int,
+    m2m: int,
+    auth: bool,
+) -> Tuple[Dict[str, Any], Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Returns (raw definition, project_def, models_def). The raw definition is
+    what the normalizer receives; project_def / models_def are what the
+    CodeGenerator receives, with foreign keys and many-to-many tables.
+    """
+    project_def = {
+        "project_name": f"bench_{models}",
+        "version": "1.0.0",
+        "description": "Synthetic benchmark project",
+        "mode": "sync",
+        "database": {"engine": "sqlite", "database": "bench.db"},
+        "modules": {"auth": {"enabled": auth}},
+    }
+
+    names = [f"Model{i}" for i in range(models)]
+    models_def: List[Dict[str, Any]] = []
+    raw_models: Dict[str, Any] = {}
+
+    for i, name in enumerate(names):
+        model_fields: List[Dict[str, Any]] = [{"name": "id", "type": "int", "primary_key": True}]
+        for f in range(fields):
+            model_fields.append({"name": f"field_{f}", "type": FIELD_TYPES[f % len(FIELD_TYPES)]})
+
+        if models > 1:
+            for k in range(fks):
+                target = names[(i - 1 - k) % models]
+                fk = f"{target.lower()}.id"
+                model_fields.append({"name": f"{target.lower()}_id_{k}", "type": "int", "foreign_key": fk})
+                model_fields.append({
+                    "name": f"{target.lower()}_{k}",
+                    "relationship": f"{target.lower()}_{k}",
+                    "back_populates": f"{name.lower()}s_{k}",
+                    "foreign_key": fk,
+                })
+
+        many_to_many = []
+        relationships = []
+        if models > 1:
+            for k in range(m2m):
+                target = names[(i + 1 + k) % models]
+                pair = sorted([name.lower(), target.lower()])
+                many_to_many.append({
+                    "target": target,
+                    "association_table": f"{pair[0]}_{pair[1]}_link",
+                    "back_populates": f"{name.lower()}s",
+                    "name": f"{target.lower()}s_{k}",
+                })
+                # Misma relación en el formato del normalizador, para validate_many_to_many
+                relationships.append({"type": "many_to_many", "model": target})
+
+        models_def.append({
+            "name": name,
+            "table_name": name.lower(),
+            "fields": model_fields,
+            "relationships": relationships,
+            "many_to_many": many_to_many,
+        })
+        raw_models[name] = {"fields": [dict(f) for f in model_fields]}
+
+    raw = {"project": dict(project_def), "models": raw_models}
+    return raw, project_def, models_def
+
+
+# -----------------------------------------------------------------------------
+# Stages
+# -----------------------------------------------------------------------------
+def _timed(fn: Callable[[], Any], repeat: int, warmup: int) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+    }
+
+
+def _generate(project_def, models_def, sink) -> None:
+    # Con --render-cache se mide la regeneración incremental (todo en caché tras el warmup)
+    gen = CodeGenerator(CORE_TEMPLATES_DIR, sink=sink, render_cache=get_render_cache())
+    gen.generate_project_structure(project_def, models_def)
+
+
+def _generate_zip(project_def, models_def) -> None:
+    with ZipSink(lambda chunk: None) as sink:
+        _generate(project_def, models_def, sink)
+
+
+def _generate_fs(project_def, models_def) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        _generate(project_def, models_def, FileSystemSink(Path(tmp)))
+
+
+def _call_endpoint(raw: Dict[str, Any]) -> Callable[[], None]:
+    from generator_app.app.api.v1.endpoints.generate import generate_project
+    from generator_app.app.schemas.project import GenerateRequest
+
+    payload = GenerateRequest(definition_json=raw)
+
+    async def call() -> None:
+        response = await generate_project(payload, "zip")
+        async for _ in response.body_iterator:
+            pass
+
+    return lambda: asyncio.run(call())
+
+
+def run_scale(scale: Dict[str, Any], repeat: int, warmup: int, http: bool) -> Dict[str, Any]:
+    raw, project_def, models_def = build_definition(**scale)
+
+    index = SchemaIndex(models_def)
+    gen = CodeGenerator(CORE_TEMPLATES_DIR, sink=MemorySink())
+    router_template = "routers/router_crud_sync.jinja2"
+
+    stages: Dict[str, Callable[[], Any]] = {
+        "normalize": lambda: normalize_project_definition(raw),
+        "validate_many_to_many": lambda: validate_many_to_many(models_def, []),
+        "m2m_specs": lambda: SchemaIndex(models_def),
+        "prepare_model_context": lambda: [gen._prepare_model_context(m, index) for m in models_def],
+        "render_models": lambda: [gen._render_model_files(m, index, router_template) for m in models_def],
+        "generate_memory": lambda: _generate(project_def, models_def, MemorySink()),
+        "generate_zip": lambda: _generate_zip(project_def, models_def),
+        "generate_fs": lambda: _generate_fs(project_def, models_def),
+    }
+
+    results: Dict[str, Any] = {}
+    for name, fn in stages.items():
+        results[name] = _timed(fn, repeat, warmup)
+
+    if http:
+        try:
+            endpoint = _call_endpoint(raw)
+        except ImportError as e:
+            results["endpoint"] = {"skipped": str(e)}
+        else:
+            results["endpoint"] = _timed(endpoint, repeat, warmup)
+
+    return {"scale": scale, "stages": results}
+
+
+# -----------------------------------------------------------------------------
+# Baseline comparison
+# -----------------------------------------------------------------------------
+def _scale_id(scale: Dict[str, Any]) -> str:
+    return ",".join(f"{k}={scale[k]}" for k in sorted(scale))
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    min_delta: float = 0.001,
+) -> List[Dict[str, Any]]:
+    """
+    Median ratio current/baseline for every stage present in both runs.
+    Stages that got slower by less than ``min_delta`` seconds are noise,
+    never regressions.
+    """
+    previous = {_scale_id(r["scale"]): r["stages"] for r in baseline["results"]}
+    rows = []
+
+    for result in current["results"]:
+        base_stages = previous.get(_scale_id(result["scale"]))
+        if base_stages is None:
+            continue
+        for stage, timing in result["stages"].items():
+            base = base_stages.get(stage)
+            if not base or "median" not in base or "median" not in timing or not base["median"]:
+                continue
+            ratio = timing["median"] / base["median"]
+            rows.append({
+                "scale": _scale_id(result["scale"]),
+                "stage": stage,
+                "baseline": base["median"],
+                "current": timing["median"],
+                "ratio": round(ratio, 3),
+                "regression": ratio > 1 + threshold and timing["median"] - base["median"] > min_delta,
+            })
+    return rows
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=_int_list, default=[10, 50, 200])
+    parser.add_argument("--fields", type=_int_list, default=[8])
+    parser.add_argument("--fks", type=_int_list, default=[1])
+    parser.add_argument("--m2m", type=_int_list, default=[1])
+    parser.add_argument("--auth", choices=["on", "off", "both"], default="both")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--http", action="store_true", help="also time the /generator/ endpoint")
+    parser.add_argument("--render-cache", action="store_true", help="render through the incremental render cache")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown ratio")
+    parser.add_argument("--min-delta", type=float, default=0.001, help="ignore slowdowns below N seconds")
+    args = parser.parse_args(argv)
+
+    # Medir el trabajo real, no las cachés
+    settings.RENDER_CACHE_ENABLED = args.render_cache
+    settings.ARCHIVE_CACHE_ENABLED = False
+
+    auth_values = {"on": [True], "off": [False], "both": [False, True]}[args.auth]
+    scales = [
+        {"models": n, "fields": f, "fks": k, "m2m": m, "auth": a}
+        for n in args.models
+        for f in args.fields
+        for k in args.fks
+        for m in args.m2m
+        for a in auth_values
+    ]
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "render_cache": args.render_cache,
+        },
+        "results": [],
+    }
+
+    for scale in scales:
+        print(f"Benchmark {_scale_id(scale)}", file=sys.stderr)
+        report["results"].append(run_scale(scale, args.repeat, args.warmup, args.http))
+
+    exit_code = 0
+    if args.baseline:
+        rows = compare(
+            report,
+            json.loads(args.baseline.read_text(encoding="utf-8")),
+            args.threshold,
+            args.min_delta,
+        )
+        report["comparison"] = rows
+        for row in rows:
+            if row["regression"]:
+                exit_code = 1
+                print(
+                    f"REGRESSION {row['scale']} {row['stage']}: "
+                    f"{row['baseline']:.4f}s -> {row['current']:.4f}s (x{row['ratio']})",
+                    file=sys.stderr,
+                )
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
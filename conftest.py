@@ -0,0 +1,5 @@
+import os
+
+# Settings exige estas variables; los tests no tocan la base de datos
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("JWT_SECRET", "test-secret")
@@ -1,18 +1,74 @@
+import asyncio
+from typing import Any, AsyncIterator
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from generator_app.app.core.security import get_current_user
-from generator_app.app.core.database import get_db
+from generator_app.app.core.database import get_async_db
 from generator_app.app.schemas.ai import AIGenerateRequest, AIGenerateResponse
 from generator_app.app.services.ai_client_service import AIClientService
 from generator_app.app.models.user import User
 import json
 import logging
 
-from generator_app.app.workers import extract_ai_content, clean_json_output
+from generator_app.app.core.config import settings
+from generator_app.app.workers import (
+    StreamingDefinitionParser,
+    extract_ai_content,
+    extract_json_object,
+    normalize_project_definition,
+)
 
 logger = logging.getLogger("fastapi_app")
 
 router = APIRouter(prefix="/ai", tags=["AI"])
 
+
+def _parse_definition(raw_output: str):
+    """(definition, repairs) from the raw AI text; ValueError when there is no usable JSON."""
+    return extract_json_object(raw_output, repair=settings.AI_JSON_REPAIR)
+
+
+def _has_valid_json(response) -> bool:
+    # Un JSON reparable cuenta como válido: evita otra llamada completa a la IA
+    try:
+        _parse_definition(extract_ai_content(response))
+        return True
+    except Exception:
+        return False
+
+
+def _project_messages(prompt: str):
+    return [
+        {
+            "role": "system",
+            "content": (
+                "Eres un generador experto de proyectos FastAPI. "
+                "Tu salida SIEMPRE debe ser un JSON válido con dos claves: "
+                "'project' y 'models'. "
+                "No incluyas explicaciones, solo JSON puro."
+            )
+        },
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _ai_http_error(e: Exception) -> HTTPException:
+    err_str = str(e)
+    if "401" in err_str or "User not found" in err_str or "'code': 401" in err_str:
+        return HTTPException(status_code=401, detail="Error de autenticación con el proveedor de IA. Verifica la clave API.")
+    return HTTPException(status_code=500, detail=f"Error al generar proyecto con IA: {e}")
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sse_parsed(event: str, name: str | None, value: Any) -> str:
+    if event == "model":
+        return _sse("model", {"name": name, "definition": value})
+    return _sse(event, value)
+
 # ---------------------------------------------------------
 # ENDPOINT PRINCIPAL
 # ---------------------------------------------------------
@@ -20,41 +76,30 @@ router = APIRouter(prefix="/ai", tags=["AI"])
 async def generate_project_ai(
     payload: AIGenerateRequest,
     current_user: User = Depends(get_current_user),
-    client_service: AIClientService = Depends(lambda db=Depends(get_db): AIClientService(db))
+    client_service: AIClientService = Depends(lambda db=Depends(get_async_db): AIClientService(db))
 ):
     try:
         logger.info("IA: Prompt recibido para generación de proyecto")
 
-        messages = [
+        messages = _project_messages(payload.prompt)
+
+        # Llamada con fallback: una respuesta sin JSON válido cuenta como fallo del proveedor
+        response = await client_service.call_with_fallback(
             {
-                "role": "system",
-                "content": (
-                    "Eres un generador experto de proyectos FastAPI. "
-                    "Tu salida SIEMPRE debe ser un JSON válido con dos claves: "
-                    "'project' y 'models'. "
-                    "No incluyas explicaciones, solo JSON puro."
-                )
+                "messages": messages,
+                "temperature": 0.2
             },
-            {"role": "user", "content": payload.prompt}
-        ]
-
-        # Llamada con fallback
-        response = await client_service.call_with_fallback({
-            "messages": messages,
-            "temperature": 0.2
-        })
+            validate=_has_valid_json,
+            use_cache=payload.use_cache,
+        )
 
         # Extraer contenido universal
         raw_output = extract_ai_content(response)
         logger.info(f"IA: Respuesta cruda recibida: {raw_output}")
 
-        # Limpiar JSON
-        cleaned = clean_json_output(raw_output)
-        logger.info(f"IA: JSON limpio: {cleaned}")
-
-        # Validar JSON
+        # Extraer el objeto JSON (reparándolo si hace falta)
         try:
-            definition = json.loads(cleaned)
+            definition, repairs = _parse_definition(raw_output)
         except Exception as e:
             logger.error(f"IA: Error al parsear JSON: {e}")
             raise HTTPException(
@@ -62,15 +107,94 @@ async def generate_project_ai(
                 detail="La IA devolvió un formato inválido. Intenta reformular el prompt."
             )
 
+        if repairs:
+            logger.info(f"IA: JSON reparado: {', '.join(repairs)}")
         logger.info("IA: JSON válido generado correctamente")
 
-        return {"definition_json": definition}
+        return {"definition_json": definition, "repairs": repairs}
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"IA: Error inesperado: {e}")
-        err_str = str(e)
-        if "401" in err_str or "User not found" in err_str or "'code': 401" in err_str:
-            raise HTTPException(status_code=401, detail="Error de autenticación con el proveedor de IA. Verifica la clave API.")
-        raise HTTPException(status_code=500, detail=f"Error al generar proyecto con IA: {e}")
+        raise _ai_http_error(e)
+
+
+# ---------------------------------------------------------
+# ENDPOINT EN STREAMING (SSE)
+# ---------------------------------------------------------
+@router.post("/generate-project/stream")
+async def generate_project_ai_stream(
+    payload: AIGenerateRequest,
+    normalize: bool = False,
+    current_user: User = Depends(get_current_user),
+    client_service: AIClientService = Depends(lambda db=Depends(get_async_db): AIClientService(db))
+):
+    """
+    Same as /generate-project but streamed as Server-Sent Events.
+
+    Events: ``project`` and ``model`` (one per model, as soon as its JSON is
+    complete), then ``done`` with the full definition (and the normalized
+    one with ``?normalize=true``), or ``error``.
+    """
+    logger.info("IA: Prompt recibido para generación de proyecto (streaming)")
+
+    tokens = client_service.stream_with_fallback({
+        "messages": _project_messages(payload.prompt),
+        "temperature": 0.2,
+    })
+
+    # Esperar al primer token antes de responder: los fallos de todos los
+    # proveedores siguen devolviendo un código HTTP y no un stream vacío
+    try:
+        first = await tokens.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=500, detail="La IA devolvió una respuesta vacía.")
+    except Exception as e:
+        logger.error(f"IA: Error inesperado: {e}")
+        raise _ai_http_error(e)
+
+    return StreamingResponse(
+        _stream_definition(first, tokens, normalize),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_definition(first: str, tokens: AsyncIterator[str], normalize: bool) -> AsyncIterator[str]:
+    parser = StreamingDefinitionParser()
+    raw_parts = [first]
+
+    try:
+        for event, name, value in parser.feed(first):
+            yield _sse_parsed(event, name, value)
+
+        async for text in tokens:
+            raw_parts.append(text)
+            for event, name, value in parser.feed(text):
+                yield _sse_parsed(event, name, value)
+
+        raw_output = "".join(raw_parts)
+        logger.info(f"IA: Respuesta cruda recibida: {raw_output}")
+
+        repairs = []
+        try:
+            definition = parser.result()
+        except Exception:
+            # El parser incremental no vio un objeto válido: extraer (y reparar) el texto completo
+            definition, repairs = _parse_definition(raw_output)
+
+        done = {"definition_json": definition, "repairs": repairs}
+        if normalize:
+            # El normalizador necesita todos los modelos para resolver relaciones
+            done["normalized"] = await asyncio.to_thread(normalize_project_definition, definition)
+        yield _sse("done", done)
+
+    except ValueError as e:
+        logger.error(f"IA: Error al parsear JSON: {e}")
+        yield _sse("error", {"detail": "La IA devolvió un formato inválido. Intenta reformular el prompt."})
+    except Exception as e:
+        logger.error(f"IA: Error en streaming: {e}")
+        yield _sse("error", {"detail": f"Error al generar proyecto con IA: {e}"})
+    finally:
+        await tokens.aclose()
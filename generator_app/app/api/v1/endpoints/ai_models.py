@@ -1,49 +1,84 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from generator_app.app.schemas.ai_model import AIModelCreate, AIModelUpdate, AIModelResponse
 from generator_app.app.services.ai_model_service import (
     create_ai_model, get_ai_model, list_ai_models, update_ai_model, delete_ai_model
 )
-from generator_app.app.core.database import get_db
-from generator_app.app.core.security import get_current_user
+from generator_app.app.core.ai_client_registry import ai_client_registry, ai_provider_limiter
+from generator_app.app.core.ai_health import ai_health
+from generator_app.app.core.ai_response_cache import get_ai_response_cache
+from generator_app.app.services.ai_client_service import ai_flights
+from generator_app.app.core.database import get_async_db
+from generator_app.app.core.security import get_current_user, require_permission
 from generator_app.app.models.user import User
 
 router = APIRouter(prefix="/ai-models", tags=["AI Models"])
 
 
+@router.get("/clients")
+async def ai_clients_stats(current_user: User = Depends(get_current_user)):
+    return {
+        "clients": ai_client_registry.stats(),
+        "providers": ai_provider_limiter.stats(),
+        "response_cache": cache.stats() if (cache := get_ai_response_cache()) else None,
+        "single_flight": ai_flights.stats(),
+    }
+
+
+@router.delete("/response-cache", dependencies=[Depends(require_permission("admin:manage"))])
+async def clear_ai_response_cache():
+    """Drops every cached AI answer."""
+    cache = get_ai_response_cache()
+    if cache is not None:
+        cache.clear()
+    return {"cleared": cache is not None}
+
+
+@router.get("/health", dependencies=[Depends(require_permission("admin:manage"))])
+async def ai_models_health():
+    """Health and circuit breaker state per AIModel."""
+    return ai_health.snapshot()
+
+
+@router.post("/{model_id}/health/reset", dependencies=[Depends(require_permission("admin:manage"))])
+async def reset_ai_model_health(model_id: UUID):
+    """Closes the breaker and forgets the recorded health of one AIModel."""
+    return {"reset": ai_health.reset(model_id)}
+
+
 @router.post("/", response_model=AIModelResponse)
-def create_model(payload: AIModelCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    model = create_ai_model(db, payload)
+async def create_model(payload: AIModelCreate, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    model = await create_ai_model(db, payload)
     return model
 
 
 @router.get("/", response_model=List[AIModelResponse])
-def list_models(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return list_ai_models(db)
+async def list_models(db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    return await list_ai_models(db)
 
 
 @router.get("/{model_id}", response_model=AIModelResponse)
-def get_model(model_id: UUID, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    model = get_ai_model(db, model_id)
+async def get_model(model_id: UUID, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    model = await get_ai_model(db, model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model not found")
     return model
 
 
 @router.put("/{model_id}", response_model=AIModelResponse)
-def update_model(model_id: UUID, payload: AIModelUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    model = update_ai_model(db, model_id, payload)
+async def update_model(model_id: UUID, payload: AIModelUpdate, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    model = await update_ai_model(db, model_id, payload)
     if not model:
         raise HTTPException(status_code=404, detail="Model not found")
     return model
 
 
 @router.delete("/{model_id}")
-def delete_model(model_id: UUID, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    ok = delete_ai_model(db, model_id)
+async def delete_model(model_id: UUID, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    ok = await delete_ai_model(db, model_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Model not found")
     return {"deleted": True}
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from generator_app.app.core.database import get_db
+from generator_app.app.core.database import get_async_db
 from generator_app.app.core.security import get_current_user
 
 from generator_app.app.services.auth_service import AuthService
@@ -15,14 +15,14 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 @router.post("/register", response_model=UserRead)
 async def register(
     payload: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     return await UserService.register(payload, db)
 
 
 @router.post("/login", response_model=Token)
-async def login(payload: UserLogin, db: Session = Depends(get_db)):
+async def login(payload: UserLogin, db: AsyncSession = Depends(get_async_db)):
     token = await AuthService.login(payload, db)
     return Token(access_token=token)
 
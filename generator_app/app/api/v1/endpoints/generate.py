@@ -1,75 +1,126 @@
-from fastapi import APIRouter, HTTPException, Body, Depends
-from fastapi.responses import FileResponse
-from pathlib import Path
-from tempfile import TemporaryDirectory
-import shutil
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Body, Depends, Query
 
 from generator_app.app.core.logging_config import logger
 from generator_app.app.schemas.project import GenerateRequest
-from generator_app.app.workers.normalizer import normalize_project_definition
-from generator_app.app.core.generator.code_generator import CodeGenerator
-from generator_app.app.core.security import require_permission
+from generator_app.app.schemas.generation_job import GenerationJobRead
+from generator_app.app.models.user import User
+from generator_app.app.services.generation_service import GenerationService, archive_flights
+from generator_app.app.core.generator.archive_cache import get_archive_cache
+from generator_app.app.core.generator.render_cache import get_render_cache
+from generator_app.app.core.generator.worker_pool import PoolSaturated, get_generation_pool
+from generator_app.app.core.generator.job_queue import GenerationJob, get_job_queue
+from generator_app.app.core.security import get_current_user, require_permission
 
 router = APIRouter(prefix="/generator", tags=["Generator"])
 
+
+def _raw_definition(payload: GenerateRequest):
+    """Unifies the data source (AI vs manual) into (project_raw, models_raw)."""
+    if payload.definition_json is not None:
+        # AI mode
+        raw = payload.definition_json
+        return raw.get("project", {}) or {}, raw.get("models", {}) or {}
+
+    # Manual mode
+    if payload.project is None or payload.models is None:
+        raise HTTPException(
+            status_code=422,
+            detail="Either 'definition_json' or both 'project' and 'models' must be provided.",
+        )
+    return payload.project, payload.models
+
+
 @router.post("/", dependencies=[Depends(require_permission("project:create"))])
 @router.post("/")
 async def generate_project(
-    payload: GenerateRequest = Body(...)
+    payload: GenerateRequest = Body(...),
+    archive_format: Literal["zip", "tar.gz"] = Query("zip", alias="format"),
 ):
     try:
         # 1) Unificar la fuente de datos (AI vs manual)
-        if payload.definition_json is not None:
-            # AI mode
-            raw = payload.definition_json
-            project_raw = raw.get("project", {}) or {}
-            models_raw = raw.get("models", {}) or {}
-        else:
-            # Manual mode
-            if payload.project is None or payload.models is None:
-                raise HTTPException(
-                    status_code=422,
-                    detail="Either 'definition_json' or both 'project' and 'models' must be provided.",
-                )
-            project_raw = payload.project
-            models_raw = payload.models
+        project_raw, models_raw = _raw_definition(payload)
 
         # 2) Normalizar para el CodeGenerator
-        normalized = normalize_project_definition({
-            "project": project_raw,
-            "models": models_raw,
-        })
+        project_def, models_def = GenerationService.normalize(project_raw, models_raw)
 
-        project_def = normalized["project"]
-        models_def = normalized["models"]
+        # 3) Generar proyecto directamente en un archivo en streaming
+        #    (sin directorio temporal ni fichero compartido en downloads/)
+        return GenerationService.stream_archive(
+            project_def, models_def, project_def["project_name"], archive_format
+        )
 
-        # 3) Generar proyecto
-        BASE_DIR = Path(__file__).resolve().parents[3]
-        DOWNLOADS_DIR = BASE_DIR / "downloads"
-        DOWNLOADS_DIR.mkdir(exist_ok=True)
+    except (HTTPException, PoolSaturated):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating project: {e}")
 
-        with TemporaryDirectory() as tmpdir:
-            tmpdir_path = Path(tmpdir)
-            output_dir = tmpdir_path / "generated_project"
-            output_dir.mkdir(parents=True, exist_ok=True)
 
-            templates_dir = BASE_DIR / "core" / "templates"
+@router.post(
+    "/jobs",
+    status_code=202,
+    response_model=GenerationJobRead,
+    dependencies=[Depends(require_permission("project:create"))],
+)
+async def create_generation_job(
+    payload: GenerateRequest = Body(...),
+    archive_format: Literal["zip", "tar.gz"] = Query("zip", alias="format"),
+    current_user: User = Depends(get_current_user),
+):
+    try:
+        project_raw, models_raw = _raw_definition(payload)
+        project_def, models_def = GenerationService.normalize(project_raw, models_raw)
+        job = GenerationService.submit_job(
+            project_def, models_def, project_def["project_name"], current_user.id, archive_format
+        )
+    except (HTTPException, PoolSaturated):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queuing generation: {e}")
 
-            gen = CodeGenerator(templates_dir=templates_dir, output_dir=output_dir)
-            gen.generate_project_structure(project_def, models_def)
+    return job.to_dict()
 
-            zip_name = f"{project_def['project_name']}.zip"
-            final_zip_path = DOWNLOADS_DIR / zip_name
 
-            shutil.make_archive(final_zip_path.with_suffix(""), "zip", output_dir)
+def _get_owned_job(job_id: str, current_user: User) -> GenerationJob:
+    job = get_job_queue().get(job_id)
+    if job is None or job.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
-            return FileResponse(
-                path=str(final_zip_path),
-                filename=zip_name,
-                media_type="application/zip",
-            )
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating project: {e}")
+@router.get(
+    "/jobs/{job_id}",
+    response_model=GenerationJobRead,
+    dependencies=[Depends(require_permission("project:create"))],
+)
+async def get_generation_job(job_id: str, current_user: User = Depends(get_current_user)):
+    return _get_owned_job(job_id, current_user).to_dict()
+
+
+@router.get("/jobs/{job_id}/artifact", dependencies=[Depends(require_permission("project:create"))])
+async def download_generation_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = _get_owned_job(job_id, current_user)
+
+    if job.status == GenerationJob.FAILED:
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != GenerationJob.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if not job.artifact_path.exists():
+        raise HTTPException(status_code=410, detail="Artifact no longer available")
+
+    return GenerationService.artifact_response(job)
+
+
+@router.get("/cache", dependencies=[Depends(require_permission("project:create"))])
+async def archive_cache_stats():
+    cache = get_archive_cache()
+    render_cache = get_render_cache()
+    stats = {"enabled": False} if cache is None else {"enabled": True, **cache.stats()}
+    stats["renders"] = {"enabled": False} if render_cache is None else {"enabled": True, **render_cache.stats()}
+    return stats
+
+
+@router.get("/pool", dependencies=[Depends(require_permission("project:create"))])
+async def generation_pool_stats():
+    return {**get_generation_pool().stats(), "single_flight": archive_flights.stats()}
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from generator_app.app.core.database import get_db
+from generator_app.app.core.database import get_async_db
 from generator_app.app.core.security import require_permission
 from generator_app.app.services.permission_service import PermissionService
 
@@ -16,13 +16,13 @@ router = APIRouter(prefix="/permissions", tags=["Permissions"])
 @router.post("/", response_model=PermissionRead, dependencies=[Depends(require_permission("permission:create"))])
 async def create_permission(
     payload: PermissionCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await PermissionService.create(payload, db)
 
 
 @router.get("/", response_model=list[PermissionRead], dependencies=[Depends(require_permission("permission:view"))])
-async def list_permissions(db: Session = Depends(get_db)):
+async def list_permissions(db: AsyncSession = Depends(get_async_db)):
     return await PermissionService.list(db)
 
 
@@ -30,7 +30,7 @@ async def list_permissions(db: Session = Depends(get_db)):
 async def update_permission(
     permission_id: str,
     payload: PermissionUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await PermissionService.update(permission_id, payload, db)
 
@@ -38,6 +38,6 @@ async def update_permission(
 @router.delete("/{permission_id}", dependencies=[Depends(require_permission("permission:delete"))])
 async def delete_permission(
     permission_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await PermissionService.delete(permission_id, db)
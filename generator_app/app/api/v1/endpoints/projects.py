@@ -1,13 +1,10 @@
-import os
-import tempfile
-
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from uuid import UUID
 
-from generator_app.app.core.database import get_db
-from generator_app.app.core.generator.code_generator import CodeGenerator
+from generator_app.app.core.database import get_async_db
 from generator_app.app.core.security import get_current_user
 from generator_app.app.models.project import Project
 from generator_app.app.models.project_version import ProjectVersion
@@ -20,17 +17,18 @@ from generator_app.app.schemas.project import (
 )
 from generator_app.app.schemas.project_version import ProjectVersionRead
 from generator_app.app.models.user import User
+from generator_app.app.services.generation_service import GenerationService
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
 @router.post("/", response_model=ProjectRead)
-def create_project(
+async def create_project(
     payload: ProjectCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     # Validar slug único
-    existing = db.query(Project).filter(Project.slug == payload.slug).first()
+    existing = (await db.execute(select(Project).where(Project.slug == payload.slug))).scalars().first()
     if existing:
         raise HTTPException(status_code=400, detail="Slug already exists")
 
@@ -44,8 +42,8 @@ def create_project(
     )
 
     db.add(project)
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    await db.refresh(project)
 
     # Crear versión inicial
     version = ProjectVersion(
@@ -54,29 +52,28 @@ def create_project(
         definition_json=payload.definition_json
     )
     db.add(version)
-    db.commit()
+    await db.commit()
 
     return project
 @router.get("/", response_model=list[ProjectListItem])
-def list_projects(
-    db: Session = Depends(get_db),
+async def list_projects(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    projects = (
-        db.query(Project)
-        .filter(Project.owner_id == current_user.id)
+    result = await db.execute(
+        select(Project)
+        .where(Project.owner_id == current_user.id)
         .order_by(Project.created_at.desc())
-        .all()
     )
-    return projects
+    return result.scalars().all()
 
 @router.get("/{project_id}", response_model=ProjectRead)
-def get_project(
+async def get_project(
     project_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
 
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -88,13 +85,13 @@ def get_project(
     return project
 
 @router.put("/{project_id}", response_model=ProjectRead)
-def update_project(
+async def update_project(
     project_id: UUID,
     payload: ProjectUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
 
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -106,34 +103,38 @@ def update_project(
     for field, value in payload.dict(exclude_unset=True).items():
         setattr(project, field, value)
 
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    await db.refresh(project)
 
     # Crear nueva versión si cambió el JSON
     if payload.definition_json:
-        latest_version = (
-            db.query(ProjectVersion)
-            .filter(ProjectVersion.project_id == project.id)
+        latest_version = (await db.execute(
+            select(ProjectVersion)
+            .where(ProjectVersion.project_id == project.id)
             .order_by(ProjectVersion.version.desc())
-            .first()
-        )
+        )).scalars().first()
         new_version = ProjectVersion(
             project_id=project.id,
             version=(latest_version.version + 1),
             definition_json=payload.definition_json
         )
         db.add(new_version)
-        db.commit()
+        await db.commit()
 
     return project
 
 @router.delete("/{project_id}")
-def delete_project(
+async def delete_project(
     project_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
+    # Las relaciones en cascada se borran desde la sesión: cargarlas ya (no hay lazy load en async)
+    project = (await db.execute(
+        select(Project)
+        .options(selectinload(Project.versions), selectinload(Project.collaborators))
+        .where(Project.id == project_id)
+    )).scalars().first()
 
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -141,18 +142,18 @@ def delete_project(
     if project.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
+    await db.commit()
 
     return {"detail": "Project deleted"}
 
 @router.get("/{project_id}/versions", response_model=list[ProjectVersionRead])
-def list_versions(
+async def list_versions(
     project_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
 
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -160,24 +161,23 @@ def list_versions(
     if project.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    versions = (
-        db.query(ProjectVersion)
-        .filter(ProjectVersion.project_id == project_id)
+    result = await db.execute(
+        select(ProjectVersion)
+        .where(ProjectVersion.project_id == project_id)
         .order_by(ProjectVersion.version.desc())
-        .all()
     )
 
-    return versions
+    return result.scalars().all()
 
 @router.post("/{project_id}/share")
-def share_project(
+async def share_project(
     project_id: UUID,
     user_id: UUID,
     role: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
 
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -192,18 +192,18 @@ def share_project(
     )
 
     db.add(collaborator)
-    db.commit()
+    await db.commit()
 
     return {"detail": "Project shared"}
 
 @router.post("/{project_id}/generate")
-def generate_project(
+async def generate_project(
     project_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     # 1. Buscar el proyecto
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
 
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -212,24 +212,12 @@ def generate_project(
     if project.owner_id != current_user.id and not project.is_public:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    # 3. Extraer el JSON de definición
-    definition = project.definition_json
-
-    # 4. Crear carpeta temporal para generar el ZIP
-    with tempfile.TemporaryDirectory() as tmpdir:
-        generator = CodeGenerator(
-            project_definition=definition,
-            output_dir=tmpdir
-        )
-
-        zip_path = generator.generate_zip()
-
-        if not os.path.exists(zip_path):
-            raise HTTPException(status_code=500, detail="ZIP generation failed")
+    # 3. Extraer y normalizar el JSON de definición
+    definition = project.definition_json or {}
+    project_def, models_def = GenerationService.normalize(
+        definition.get("project", {}) or {},
+        definition.get("models", {}) or {},
+    )
 
-        # 5. Devolver el ZIP como FileResponse
-        return FileResponse(
-            path=zip_path,
-            filename=f"{project.slug}.zip",
-            media_type="application/zip"
-        )
+    # 4. Devolver el ZIP en streaming; entre versiones solo se renderizan los modelos cambiados
+    return GenerationService.stream_archive(project_def, models_def, project.slug, incremental=True)
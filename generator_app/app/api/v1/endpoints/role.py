@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from generator_app.app.core.database import get_db
+from generator_app.app.core.database import get_async_db
 from generator_app.app.core.security import require_permission
 from generator_app.app.services.role_service import RoleService
 
@@ -17,13 +17,13 @@ router = APIRouter(prefix="/roles", tags=["Roles"])
 @router.post("/", response_model=RoleRead, dependencies=[Depends(require_permission("role:create"))])
 async def create_role(
     payload: RoleCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await RoleService.create(payload, db)
 
 
 @router.get("/", response_model=list[RoleRead], dependencies=[Depends(require_permission("role:view"))])
-async def list_roles(db: Session = Depends(get_db)):
+async def list_roles(db: AsyncSession = Depends(get_async_db)):
     return await RoleService.list(db)
 
 
@@ -31,7 +31,7 @@ async def list_roles(db: Session = Depends(get_db)):
 async def update_role(
     role_id: str,
     payload: RoleUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await RoleService.update(role_id, payload, db)
 
@@ -40,6 +40,6 @@ async def update_role(
 async def assign_permission_to_role(
     role_id: str,
     permission_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await RoleService.assign_permission(role_id, permission_id, db)
@@ -19,7 +19,7 @@ def get_ai_client():
         model_name=settings.OPENAI_MODEL,
         is_active=True
     )
-    return AIClientService(None)._build_client_for(dummy)
+    return AIClientService(None)._client_for(dummy)
 
 
 def get_ai_model():
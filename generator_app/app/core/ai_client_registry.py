@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Tuple
+
+import httpx
+from openai import AsyncOpenAI
+
+from generator_app.app.core.config import settings
+from generator_app.app.core.logging_config import logger
+
+
+# Base URLs por proveedor
+PROVIDER_URLS: Dict[str, str | None] = {
+    "groq": "https://api.groq.com/openai/v1",
+    "deepseek": "https://api.deepseek.com",
+    "together": "https://api.together.xyz/v1",
+    "mistral": "https://api.mistral.ai/v1",
+    "openrouter": "https://openrouter.ai/api/v1",
+    "openai": None,  # usa el default del SDK
+}
+
+ClientKey = Tuple[str, str | None, str]
+
+
+def resolve_provider(ai_model: Any) -> Tuple[str, str | None, str]:
+    """Returns (provider, base_url, api_key) for an AIModel row, falling back to settings."""
+    provider = (ai_model.provider or settings.AI_PROVIDER).lower()
+    api_key = ai_model.api_key or getattr(settings, f"{provider.upper()}_API_KEY", None)
+
+    if not api_key:
+        raise RuntimeError(f"No API key configured for provider: {provider}")
+
+    return provider, PROVIDER_URLS.get(provider), api_key
+
+
+class AIClientRegistry:
+    """
+    Process-wide pool of AI provider clients.
+
+    One AsyncOpenAI client (and one keep-alive HTTP connection pool) per
+    (provider, base_url, api key hash), shared by every request, so AI calls
+    reuse open TLS connections instead of building a client per attempt.
+    Clients dropped by ``invalidate`` are closed after a grace period, once
+    in-flight calls that still hold them have finished.
+    """
+
+    def __init__(self):
+        self._clients: Dict[ClientKey, AsyncOpenAI] = {}
+        self._model_keys: Dict[Any, ClientKey] = {}
+        self._retired: List[Tuple[float, AsyncOpenAI]] = []
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def _key(provider: str, base_url: str | None, api_key: str) -> ClientKey:
+        # Nunca guardar la clave en claro como índice
+        return provider, base_url, hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _create(provider: str, base_url: str | None, api_key: str) -> AsyncOpenAI:
+        # Headers obligatorios para OpenRouter
+        default_headers = {}
+        if provider == "openrouter":
+            default_headers = {
+                "HTTP-Referer": settings.APP_URL or "http://localhost:8001",
+                "X-Title": settings.APP_NAME or "FastGenerator",
+            }
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AI_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.AI_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(settings.AI_HTTP_TIMEOUT_SECONDS, connect=10.0),
+        )
+
+        return AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            default_headers=default_headers,
+            http_client=http_client,
+        )
+
+    def get(self, ai_model: Any) -> AsyncOpenAI:
+        provider, base_url, api_key = resolve_provider(ai_model)
+        key = self._key(provider, base_url, api_key)
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                self._stats["misses"] += 1
+                client = self._create(provider, base_url, api_key)
+                self._clients[key] = client
+                logger.info(f"IA: nuevo cliente para proveedor {provider}")
+            else:
+                self._stats["hits"] += 1
+
+            if getattr(ai_model, "id", None) is not None:
+                previous = self._model_keys.get(ai_model.id)
+                self._model_keys[ai_model.id] = key
+                if previous is not None and previous != key:
+                    self._retire_unused_locked(previous)
+
+        return client
+
+    def _retire_unused_locked(self, key: ClientKey) -> None:
+        if key in self._model_keys.values():
+            return
+        client = self._clients.pop(key, None)
+        if client is not None:
+            self._retired.append((time.monotonic(), client))
+
+    def invalidate(self, model_id: Any) -> None:
+        """Called when an AIModel row is updated or deleted."""
+        with self._lock:
+            key = self._model_keys.pop(model_id, None)
+            if key is None:
+                return
+            self._stats["invalidations"] += 1
+            self._retire_unused_locked(key)
+
+    async def close_retired(self, force: bool = False) -> None:
+        """Closes clients retired more than AI_CLIENT_RETIRE_GRACE_SECONDS ago (all of them with ``force``)."""
+        if not self._retired:
+            return
+
+        deadline = time.monotonic() - settings.AI_CLIENT_RETIRE_GRACE_SECONDS
+        with self._lock:
+            expired = [c for t, c in self._retired if force or t <= deadline]
+            self._retired = [(t, c) for t, c in self._retired if not (force or t <= deadline)]
+
+        for client in expired:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"IA: error cerrando cliente: {e}")
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._model_keys.clear()
+            self._retired.extend((0.0, c) for c in clients)
+        await self.close_retired(force=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "clients": len(self._clients),
+                "retired": len(self._retired),
+            }
+
+
+ai_client_registry = AIClientRegistry()
+
+
+class ProviderBusy(Exception):
+    """Raised when a provider already has as many calls in flight as it is allowed."""
+
+
+class ProviderLimiter:
+    """
+    Caps concurrent in-flight calls per provider with asyncio semaphores.
+
+    Waiting happens on the event loop, never on a worker thread. A call
+    that cannot get a slot within ``queue_timeout`` raises ProviderBusy so
+    the caller can fall back to the next provider.
+    """
+
+    def __init__(self, default_limit: int, limits: Dict[str, int], queue_timeout: float):
+        self.default_limit = default_limit
+        self.limits = {k.lower(): v for k, v in limits.items()}
+        self.queue_timeout = queue_timeout
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._rejected: Dict[str, int] = {}
+
+    def limit_for(self, provider: str) -> int:
+        return self.limits.get(provider, self.default_limit)
+
+    @asynccontextmanager
+    async def slot(self, provider: str):
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            semaphore = self._semaphores[provider] = asyncio.Semaphore(self.limit_for(provider))
+
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._rejected[provider] = self._rejected.get(provider, 0) + 1
+            raise ProviderBusy(f"Provider {provider} has too many calls in flight")
+
+        self._in_flight[provider] = self._in_flight.get(provider, 0) + 1
+        try:
+            yield
+        finally:
+            self._in_flight[provider] -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            provider: {
+                "limit": self.limit_for(provider),
+                "in_flight": self._in_flight.get(provider, 0),
+                "rejected": self._rejected.get(provider, 0),
+            }
+            for provider in self._semaphores
+        }
+
+
+ai_provider_limiter = ProviderLimiter(
+    settings.AI_PROVIDER_MAX_CONCURRENCY,
+    settings.AI_PROVIDER_CONCURRENCY,
+    settings.AI_PROVIDER_QUEUE_TIMEOUT_SECONDS,
+)
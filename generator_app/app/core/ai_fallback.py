@@ -0,0 +1,158 @@
+import asyncio
+import math
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Set
+
+from generator_app.app.core.config import settings
+
+
+FALLBACK_STRATEGIES = ("sequential", "hedged", "race")
+
+Attempt = Callable[[Any], Awaitable[Any]]
+
+
+class InvalidAIResponse(Exception):
+    """Raised when a provider answered but its output did not pass validation."""
+
+
+def provider_timeout(provider: str) -> float:
+    return settings.AI_PROVIDER_TIMEOUTS.get(provider, settings.AI_PROVIDER_TIMEOUT_SECONDS)
+
+
+class LatencyTracker:
+    """Recent successful call latencies per AIModel, used to size the hedging delay."""
+
+    def __init__(self, window: int = 50):
+        self.window = window
+        self._samples: Dict[Any, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key: Any, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, key: Any, pct: float) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < settings.AI_HEDGE_MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(pct / 100 * len(samples)) - 1))
+        return samples[index]
+
+
+latency_tracker = LatencyTracker()
+
+
+def hedge_delay(key: Any, timeout: float) -> float:
+    """p95 latency of the model, clamped to [AI_HEDGE_MIN_DELAY_SECONDS, timeout]."""
+    p95 = latency_tracker.percentile(key, 95)
+    delay = settings.AI_HEDGE_DEFAULT_DELAY_SECONDS if p95 is None else p95
+    return min(max(delay, settings.AI_HEDGE_MIN_DELAY_SECONDS), timeout)
+
+
+async def _cancel(tasks: Set[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _collect(done: Set[asyncio.Task], errors: List[BaseException]) -> asyncio.Task | None:
+    """Returns the first successful task in ``done``; the errors of the others go to ``errors``."""
+    winner = None
+    for task in done:
+        error = task.exception()
+        if error is not None:
+            errors.append(error)
+        elif winner is None:
+            winner = task
+    return winner
+
+
+def _fail(errors: List[BaseException]) -> None:
+    if errors:
+        raise errors[-1]
+    raise RuntimeError("No AI models configured in DB")
+
+
+async def run_sequential(candidates: List[Any], attempt: Attempt) -> Any:
+    """Tries each candidate in turn, moving on only once the previous one failed."""
+    errors: List[BaseException] = []
+    for candidate in candidates:
+        try:
+            return await attempt(candidate)
+        except Exception as e:
+            errors.append(e)
+    _fail(errors)
+
+
+async def run_hedged(
+    candidates: List[Any],
+    attempt: Attempt,
+    delay_for: Callable[[Any], float],
+) -> Any:
+    """
+    Starts the first candidate and, if it has not answered after
+    ``delay_for(candidate)``, starts the next one too. Failures start the
+    next candidate immediately. The first success wins; the rest are cancelled.
+    """
+    remaining: Iterator[Any] = iter(candidates)
+    pending: Set[asyncio.Task] = set()
+    errors: List[BaseException] = []
+    last_started = None
+
+    def launch() -> bool:
+        nonlocal last_started
+        candidate = next(remaining, None)
+        if candidate is None:
+            return False
+        last_started = candidate
+        pending.add(asyncio.create_task(attempt(candidate)))
+        return True
+
+    launch()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=delay_for(last_started),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+            if not done:
+                # El proveedor va lento: lanzar el siguiente sin cancelar el actual
+                launch()
+                continue
+
+            pending -= done
+            winner = _collect(done, errors)
+            if winner is not None:
+                return winner.result()
+            # Cada fallo lanza el siguiente candidato inmediatamente
+            for _ in done:
+                launch()
+    finally:
+        await _cancel(pending)
+
+    _fail(errors)
+
+
+async def run_race(candidates: List[Any], attempt: Attempt) -> Any:
+    """Starts every candidate at once; the first success wins and the rest are cancelled."""
+    pending: Set[asyncio.Task] = {asyncio.create_task(attempt(c)) for c in candidates}
+    errors: List[BaseException] = []
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = _collect(done, errors)
+            if winner is not None:
+                return winner.result()
+    finally:
+        await _cancel(pending)
+
+    _fail(errors)
@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List
+
+from generator_app.app.core.config import settings
+
+
+class CircuitOpen(Exception):
+    """Raised when the breaker of a provider (or of every provider) is open."""
+
+
+class ProviderHealth:
+    """
+    Rolling health of one AIModel plus its circuit breaker.
+
+    closed: calls go through. open: calls are skipped until the cooldown
+    ends. half_open: a single probe call decides whether to close again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, provider: str):
+        self.name = name
+        self.provider = provider
+        self.outcomes: Deque[bool] = deque(maxlen=settings.AI_HEALTH_WINDOW)
+        self.latency_ewma: float | None = None
+        self.consecutive_failures = 0
+        self.last_failure_at: float | None = None
+        self.last_error: str | None = None
+        self.state = self.CLOSED
+        self.opened_at: float | None = None
+        self.probe_in_flight = False
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def score(self):
+        """Sort key: fewer errors first, then lower latency. Unknown latency counts as fast."""
+        return round(self.error_rate, 1), self.latency_ewma or 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "provider": self.provider,
+            "state": self.state,
+            "error_rate": round(self.error_rate, 3),
+            "calls": len(self.outcomes),
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "last_failure_at": self.last_failure_at,
+            "last_error": self.last_error,
+            "opened_at": self.opened_at,
+        }
+
+
+class HealthTracker:
+    """In-memory health per AIModel, used to skip and reorder fallback candidates."""
+
+    def __init__(self):
+        self._health: Dict[Any, ProviderHealth] = {}
+        self._lock = threading.Lock()
+
+    def _get_locked(self, ai_model: Any) -> ProviderHealth:
+        health = self._health.get(ai_model.id)
+        if health is None:
+            health = self._health[ai_model.id] = ProviderHealth(ai_model.name, ai_model.provider)
+        return health
+
+    def _refresh_locked(self, health: ProviderHealth, now: float) -> None:
+        if health.state == ProviderHealth.OPEN and now - health.opened_at >= settings.AI_BREAKER_COOLDOWN_SECONDS:
+            health.state = ProviderHealth.HALF_OPEN
+
+    def order(self, models: List[Any]) -> List[Any]:
+        """
+        Drops models whose breaker is open and, with AI_HEALTH_REORDER,
+        sorts the rest by score (ties keep the configured order).
+        """
+        now = time.monotonic()
+        with self._lock:
+            available = []
+            for m in models:
+                health = self._get_locked(m)
+                self._refresh_locked(health, now)
+                if health.state != ProviderHealth.OPEN:
+                    available.append(m)
+
+            if settings.AI_HEALTH_REORDER:
+                available.sort(key=lambda m: self._health[m.id].score())
+        return available
+
+    def try_acquire(self, ai_model: Any) -> bool:
+        """Called right before an attempt; in half-open only one probe call gets through."""
+        with self._lock:
+            health = self._get_locked(ai_model)
+            self._refresh_locked(health, time.monotonic())
+            if health.state == ProviderHealth.CLOSED:
+                return True
+            if health.state == ProviderHealth.HALF_OPEN and not health.probe_in_flight:
+                health.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, ai_model: Any, seconds: float) -> None:
+        alpha = settings.AI_HEALTH_LATENCY_ALPHA
+        with self._lock:
+            health = self._get_locked(ai_model)
+            health.outcomes.append(True)
+            health.consecutive_failures = 0
+            health.latency_ewma = (
+                seconds if health.latency_ewma is None
+                else alpha * seconds + (1 - alpha) * health.latency_ewma
+            )
+            if health.state != ProviderHealth.CLOSED:
+                health.state = ProviderHealth.CLOSED
+                health.opened_at = None
+                health.outcomes.clear()
+                health.outcomes.append(True)
+            health.probe_in_flight = False
+
+    def record_failure(self, ai_model: Any, error: BaseException) -> None:
+        with self._lock:
+            health = self._get_locked(ai_model)
+            health.outcomes.append(False)
+            health.consecutive_failures += 1
+            health.last_failure_at = time.time()
+            health.last_error = repr(error)[:300]
+            health.probe_in_flight = False
+
+            trips = (
+                health.state == ProviderHealth.HALF_OPEN
+                or health.consecutive_failures >= settings.AI_BREAKER_CONSECUTIVE_FAILURES
+                or (
+                    len(health.outcomes) >= settings.AI_BREAKER_MIN_CALLS
+                    and health.error_rate >= settings.AI_BREAKER_ERROR_RATE
+                )
+            )
+            if trips:
+                health.state = ProviderHealth.OPEN
+                health.opened_at = time.monotonic()
+
+    def record_cancelled(self, ai_model: Any) -> None:
+        """An attempt cancelled by hedging/race says nothing about the provider."""
+        with self._lock:
+            self._get_locked(ai_model).probe_in_flight = False
+
+    def reset(self, model_id: Any) -> bool:
+        with self._lock:
+            return self._health.pop(model_id, None) is not None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {str(model_id): health.to_dict() for model_id, health in self._health.items()}
+
+
+ai_health = HealthTracker()
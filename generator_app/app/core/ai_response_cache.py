@@ -0,0 +1,262 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from generator_app.app.core.config import settings
+from generator_app.app.core.logging_config import logger
+
+
+# Mismo directorio que la caché de archivos generados (generator_app/.cache)
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / ".cache"
+
+
+# Cambiar al modificar cómo se calcula la clave: las entradas persistidas dejan de coincidir
+KEY_VERSION = 2
+
+
+def normalize_prompt(text: str) -> str:
+    """
+    Same prompt modulo Unicode form and whitespace gives the same text.
+    Case is kept: "userId" and "userid" must not share generated names.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def response_key(payload: Dict[str, Any]) -> str:
+    """
+    Canonical hash of a chat completion request: system messages as sent,
+    user prompts normalized, plus temperature, model and any other
+    parameter. ``stream`` is not part of the key.
+    """
+    messages = []
+    for message in payload.get("messages", []):
+        content = message.get("content") or ""
+        if message.get("role") == "user":
+            content = normalize_prompt(content)
+        messages.append([message.get("role"), content])
+
+    params = {k: v for k, v in payload.items() if k not in ("messages", "stream")}
+    params.setdefault("model", None)
+    params.setdefault("temperature", None)
+
+    canonical = json.dumps(
+        {"v": KEY_VERSION, "messages": messages, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCacheBackend(ABC):
+    """Storage of (expires_at, value) per key with LRU eviction."""
+
+    @abstractmethod
+    def get(self, key: str) -> Tuple[float, str] | None:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, expires_at: float, value: str) -> int:
+        """Stores the entry and returns how many entries were evicted."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemoryResponseBackend(ResponseCacheBackend):
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[float, str] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, expires_at: float, value: str) -> int:
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteResponseBackend(ResponseCacheBackend):
+    """
+    Persistent backend on a local SQLite file, so cached answers survive
+    restarts and are shared by every worker process on the host.
+    """
+
+    def __init__(self, path: Path, max_entries: int):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_responses ("
+                " key TEXT PRIMARY KEY,"
+                " expires_at REAL NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " value TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_ai_responses_last_used ON ai_responses (last_used)")
+
+    def get(self, key: str) -> Tuple[float, str] | None:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT expires_at, value FROM ai_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE ai_responses SET last_used = ? WHERE key = ?", (time.time(), key)
+                )
+        return row
+
+    def set(self, key: str, expires_at: float, value: str) -> int:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ai_responses (key, expires_at, last_used, value) VALUES (?, ?, ?, ?)",
+                (key, expires_at, time.time(), value),
+            )
+            # Primero lo caducado, luego lo menos usado
+            self._conn.execute("DELETE FROM ai_responses WHERE expires_at <= ?", (time.time(),))
+            cursor = self._conn.execute(
+                "DELETE FROM ai_responses WHERE key IN ("
+                " SELECT key FROM ai_responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            return max(cursor.rowcount, 0)
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM ai_responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM ai_responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM ai_responses").fetchone()[0]
+
+
+class AIResponseCache:
+    """
+    Cache of validated AI answers keyed by ``response_key``, with TTL and
+    LRU eviction. Identical prompts are answered without calling a provider.
+    """
+
+    def __init__(self, backend: ResponseCacheBackend, ttl_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0, "bypassed": 0}
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += value
+
+    def get(self, key: str) -> str | None:
+        entry = self.backend.get(key)
+        if entry is None:
+            self._count("misses")
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.time():
+            self.backend.delete(key)
+            self._count("expired")
+            self._count("misses")
+            return None
+
+        self._count("hits")
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        evicted = self.backend.set(key, time.time() + self.ttl_seconds, value)
+        self._count("stores")
+        if evicted:
+            self._count("evictions", evicted)
+
+    def bypassed(self) -> None:
+        self._count("bypassed")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            **stats,
+            "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self.backend),
+            "backend": type(self.backend).__name__,
+        }
+
+
+_ai_response_cache: AIResponseCache | None = None
+_ai_response_cache_lock = threading.Lock()
+
+
+def get_ai_response_cache() -> AIResponseCache | None:
+    """Process-wide AI response cache, or None when disabled in settings."""
+    global _ai_response_cache
+
+    if not settings.AI_RESPONSE_CACHE_ENABLED:
+        return None
+
+    with _ai_response_cache_lock:
+        if _ai_response_cache is None:
+            if settings.AI_RESPONSE_CACHE_BACKEND == "sqlite":
+                path = (
+                    Path(settings.AI_RESPONSE_CACHE_PATH)
+                    if settings.AI_RESPONSE_CACHE_PATH
+                    else DEFAULT_CACHE_DIR / "ai_responses.sqlite3"
+                )
+                backend: ResponseCacheBackend = SQLiteResponseBackend(path, settings.AI_RESPONSE_CACHE_MAX_ENTRIES)
+                logger.info(f"IA: caché de respuestas en {path}")
+            else:
+                backend = MemoryResponseBackend(settings.AI_RESPONSE_CACHE_MAX_ENTRIES)
+            _ai_response_cache = AIResponseCache(backend, settings.AI_RESPONSE_CACHE_TTL_SECONDS)
+        return _ai_response_cache
@@ -1,9 +1,35 @@
+from typing import Dict
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Motor async de la app (asyncpg/aiosqlite); por defecto se deriva de DATABASE_URL.
+    # El motor síncrono sigue usándose para Alembic y create_all.
+    DATABASE_ASYNC_URL: str | None = None
+    # Pool de conexiones (motores síncrono y async); tamaño/overflow/timeout no aplican a SQLite
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT_SECONDS: float = 30.0
+    DATABASE_POOL_RECYCLE_SECONDS: int = 1800  # -1 = sin reciclar
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_POOL_METRICS: bool = True  # checkouts, espera y vida de conexiones en /metrics
     JWT_SECRET: str
 
+    # Hash de contraseñas (bcrypt) en un pool propio, fuera del event loop
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # al cambiarlo, los hashes se regeneran en el siguiente login
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0
+
+    # Caché de usuario + rol + permisos por token (sub)
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
+    # Permisos del rol dentro del JWT (rid, perms, pv); se comprueban sin BD mientras pv esté al día
+    AUTH_PERMISSION_CLAIMS: bool = False
+    AUTH_PERMISSION_VERSION_TTL_SECONDS: float = 30.0
+
     APP_URL: str
     APP_NAME: str
 
@@ -34,6 +60,85 @@ class Settings(BaseSettings):
     OPENROUTER_API_KEY: str | None = None
     OPENROUTER_MODEL: str | None = None
 
+    # Clientes HTTP de IA (compartidos por proceso, keep-alive)
+    AI_HTTP_MAX_CONNECTIONS: int = 100
+    AI_HTTP_MAX_KEEPALIVE: int = 20
+    AI_HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    AI_HTTP_TIMEOUT_SECONDS: float = 120.0
+    AI_CLIENT_RETIRE_GRACE_SECONDS: float = 300.0
+
+    # Lista de AIModels activos en memoria (se refresca al escribir; el TTL cubre otros workers)
+    AI_MODELS_CACHE_TTL_SECONDS: float = 30.0
+
+    # Llamadas simultáneas por proveedor (AI_PROVIDER_CONCURRENCY='{"groq": 8}')
+    AI_PROVIDER_MAX_CONCURRENCY: int = 32
+    AI_PROVIDER_CONCURRENCY: Dict[str, int] = {}
+    AI_PROVIDER_QUEUE_TIMEOUT_SECONDS: float = 10.0
+
+    # Estrategia de fallback entre proveedores: sequential | hedged | race
+    AI_FALLBACK_STRATEGY: str = "sequential"
+    AI_PROVIDER_TIMEOUT_SECONDS: float = 90.0
+    AI_PROVIDER_TIMEOUTS: Dict[str, float] = {}
+    AI_HEDGE_DEFAULT_DELAY_SECONDS: float = 8.0
+    AI_HEDGE_MIN_DELAY_SECONDS: float = 1.0
+    AI_HEDGE_MIN_SAMPLES: int = 5
+
+    # Salud por AIModel y circuit breaker
+    AI_HEALTH_WINDOW: int = 20
+    AI_HEALTH_LATENCY_ALPHA: float = 0.3
+    AI_HEALTH_REORDER: bool = True
+    AI_BREAKER_CONSECUTIVE_FAILURES: int = 3
+    AI_BREAKER_ERROR_RATE: float = 0.5
+    AI_BREAKER_MIN_CALLS: int = 6
+    AI_BREAKER_COOLDOWN_SECONDS: float = 30.0
+
+    # Reparar JSON casi válido de la IA (comas finales, comillas simples...) en vez de reintentar
+    AI_JSON_REPAIR: bool = True
+
+    # Caché de respuestas de IA (mismo prompt normalizado, sistema, temperatura y modelo)
+    AI_RESPONSE_CACHE_ENABLED: bool = True
+    AI_RESPONSE_CACHE_BACKEND: str = "memory"  # memory | sqlite
+    AI_RESPONSE_CACHE_PATH: str | None = None
+    AI_RESPONSE_CACHE_TTL_SECONDS: float = 24 * 3600
+    AI_RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+
+    # Plantillas (Jinja2)
+    TEMPLATE_BYTECODE_CACHE: bool = True
+    TEMPLATE_BYTECODE_CACHE_DIR: str | None = None
+    TEMPLATE_CACHE_SIZE: int = 400
+    TEMPLATE_AUTO_RELOAD: bool = True
+    TEMPLATE_WARMUP_ON_STARTUP: bool = True
+
+    # Caché de archivos generados (por hash de la definición normalizada)
+    ARCHIVE_CACHE_ENABLED: bool = True
+    ARCHIVE_CACHE_DIR: str | None = None
+    ARCHIVE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+    # Ficheros renderizados por modelo: solo al regenerar un proyecto guardado
+    # (/projects/{id}/generate), para no re-renderizar los modelos sin cambios
+    RENDER_CACHE_ENABLED: bool = True
+    RENDER_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Pool de generación (fuera del event loop)
+    GENERATION_EXECUTOR: str = "process"  # process | thread
+    GENERATION_MAX_WORKERS: int | None = None
+    GENERATION_MAX_QUEUE: int = 16
+    GENERATION_TIMEOUT_SECONDS: float = 60.0
+    # Peticiones idénticas comparten la salida mientras no pase de este tamaño
+    GENERATION_SHARED_STREAM_MAX_BYTES: int = 8 * 1024 * 1024
+
+    # Jobs de generación asíncronos
+    GENERATION_JOBS_DIR: str | None = None
+    GENERATION_JOBS_MAX_PENDING: int = 100
+    GENERATION_JOBS_RETENTION_SECONDS: int = 3600
+
+    # Trazas por etapa (/metrics y cabecera Server-Timing)
+    TRACING_ENABLED: bool = True
+    # /metrics expone telemetría interna: apagado salvo que se pida, y con
+    # token (Authorization: Bearer ...) si está definido
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: str | None = None
+
     model_config = {
         "env_file": ".env",
         "case_sensitive": True
@@ -1,6 +1,9 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from .config import settings
+from .db_pool import db_pools
 
 
 # -----------------------------
@@ -16,8 +19,10 @@ class Base(DeclarativeBase):
 engine = create_engine(
     settings.DATABASE_URL,
     echo=False,          # puedes activar logs si deseas
-    future=True
+    future=True,
+    **db_pools.options(settings.DATABASE_URL, "sync"),
 )
+db_pools.instrument(engine, "sync")
 
 
 # -----------------------------
@@ -40,3 +45,60 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# -----------------------------
+# Async engine (API)
+# -----------------------------
+# Driver async equivalente a cada driver síncrono
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def async_database_url() -> str:
+    """DATABASE_ASYNC_URL, or DATABASE_URL with the async driver of the same backend."""
+    if settings.DATABASE_ASYNC_URL:
+        return settings.DATABASE_ASYNC_URL
+
+    url = make_url(settings.DATABASE_URL)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver known for '{backend}': set DATABASE_ASYNC_URL")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+_async_engine: AsyncEngine | None = None
+
+# expire_on_commit=False: con AsyncSession no puede haber cargas implícitas
+# al leer atributos después de un commit
+_async_sessionmaker = async_sessionmaker(expire_on_commit=False, autoflush=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    # Creado al primer uso: importar este módulo no exige el driver async
+    global _async_engine
+    if _async_engine is None:
+        url = async_database_url()
+        _async_engine = create_async_engine(url, echo=False, **db_pools.options(url, "async", is_async=True))
+        # Los eventos de pool se registran en el motor síncrono subyacente
+        db_pools.instrument(_async_engine.sync_engine, "async")
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    return _async_sessionmaker(bind=get_async_engine())
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
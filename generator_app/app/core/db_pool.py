@@ -0,0 +1,188 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Sequence, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from generator_app.app.core.config import settings
+
+
+# Espera por una conexión: de microsegundos (pool libre) a POOL_TIMEOUT (pool agotado)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Vida de una conexión física: se acota con POOL_RECYCLE
+LIFETIME_BUCKETS = (1.0, 10.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 7200.0)
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram; callers hold their own lock."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, metric: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{metric}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{metric}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class PoolMetrics:
+    """
+    Checkout, wait and connection-lifetime figures for one engine's pool,
+    fed by SQLAlchemy pool events (and by the timed pool class for waits).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine: Engine | None = None
+        self.checked_out = 0
+        self._counters = {"checkouts": 0, "timeouts": 0, "connections_opened": 0, "connections_closed": 0}
+        self.wait = Histogram(WAIT_BUCKETS)
+        self.lifetime = Histogram(LIFETIME_BUCKETS)
+        self._lock = threading.Lock()
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait.observe(seconds)
+            if timed_out:
+                self._counters["timeouts"] += 1
+
+    def instrument(self, engine: Engine) -> None:
+        self.engine = engine
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, record):
+            record.info["pool_created_at"] = time.monotonic()
+            with self._lock:
+                self._counters["connections_opened"] += 1
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, record, proxy):
+            with self._lock:
+                self.checked_out += 1
+                self._counters["checkouts"] += 1
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, record):
+            with self._lock:
+                self.checked_out = max(0, self.checked_out - 1)
+
+        @event.listens_for(engine, "close")
+        def on_close(dbapi_connection, record):
+            created_at = record.info.pop("pool_created_at", None)
+            with self._lock:
+                self._counters["connections_closed"] += 1
+                if created_at is not None:
+                    self.lifetime.observe(time.monotonic() - created_at)
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self.engine.pool if self.engine is not None else None
+        with self._lock:
+            data: Dict[str, Any] = {
+                **self._counters,
+                "checked_out": self.checked_out,
+                "wait_count": self.wait.count,
+                "wait_seconds_sum": round(self.wait.sum, 6),
+            }
+        if isinstance(pool, QueuePool):
+            data.update(size=pool.size(), overflow=pool.overflow(), idle=pool.checkedin())
+        return data
+
+    def render(self) -> List[str]:
+        labels = f'engine="{self.name}"'
+        stats = self.stats()
+        lines = [f'generator_db_pool_checked_out{{{labels}}} {stats["checked_out"]}']
+        for key in ("size", "overflow", "idle"):
+            if key in stats:
+                lines.append(f'generator_db_pool_{key}{{{labels}}} {stats[key]}')
+        for key in ("checkouts", "timeouts", "connections_opened", "connections_closed"):
+            lines.append(f'generator_db_pool_{key}_total{{{labels}}} {stats[key]}')
+        with self._lock:
+            lines += self.wait.render("generator_db_pool_checkout_wait_seconds", labels)
+            lines += self.lifetime.render("generator_db_pool_connection_lifetime_seconds", labels)
+        return lines
+
+
+def _timed_pool_class(base: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    # Clase propia por motor: Pool.recreate() (dispose) la conserva con sus métricas
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = base.connect(self)
+        except exc.TimeoutError:
+            metrics.observe_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        metrics.observe_wait(time.perf_counter() - started)
+        return connection
+
+    return type(f"Timed{base.__name__}", (base,), {"connect": connect})
+
+
+class DatabasePools:
+    """Builds pool options from settings and keeps the metrics of every instrumented engine."""
+
+    def __init__(self):
+        self._metrics: Dict[str, PoolMetrics] = {}
+
+    def options(self, url: str, name: str, is_async: bool = False) -> Dict[str, Any]:
+        """Keyword arguments for create_engine / create_async_engine."""
+        options: Dict[str, Any] = {
+            "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+            "pool_recycle": settings.DATABASE_POOL_RECYCLE_SECONDS,
+        }
+        # SQLite usa pools propios del dialecto (sin tamaño ni overflow)
+        if make_url(url).get_backend_name() == "sqlite":
+            return options
+
+        base = AsyncAdaptedQueuePool if is_async else QueuePool
+        options.update(
+            poolclass=_timed_pool_class(base, self.metrics(name)) if settings.DATABASE_POOL_METRICS else base,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT_SECONDS,
+        )
+        return options
+
+    def metrics(self, name: str) -> PoolMetrics:
+        if name not in self._metrics:
+            self._metrics[name] = PoolMetrics(name)
+        return self._metrics[name]
+
+    def instrument(self, engine: Engine, name: str) -> None:
+        if settings.DATABASE_POOL_METRICS:
+            self.metrics(name).instrument(engine)
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: m.stats() for name, m in self._metrics.items() if m.engine is not None}
+
+    def render(self) -> str:
+        lines = [
+            "# HELP generator_db_pool_checkout_wait_seconds Time to get a connection from the pool.",
+            "# TYPE generator_db_pool_checkout_wait_seconds histogram",
+            "# HELP generator_db_pool_connection_lifetime_seconds Age of database connections when closed.",
+            "# TYPE generator_db_pool_connection_lifetime_seconds histogram",
+            "# TYPE generator_db_pool_checked_out gauge",
+        ]
+        for name in sorted(self._metrics):
+            if self._metrics[name].engine is not None:
+                lines += self._metrics[name].render()
+        return "\n".join(lines) + "\n"
+
+
+db_pools = DatabasePools()
@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from generator_app.app.core.config import settings
+from generator_app.app.core.logging_config import logger
+from generator_app.app.core.generator.template_registry import APP_DIR
+
+
+# Todo lo que influye en el resultado de la generación: plantillas, módulos
+# y el código que renderiza, normaliza o empaqueta. Si cambia cualquiera de
+# estos ficheros, cambia la huella. La caché, el pool o la cola no cuentan:
+# tocarlos no debe vaciar la caché.
+_GENERATOR_DIR = APP_DIR / "core" / "generator"
+FINGERPRINT_SOURCES: List[Tuple[Path, str]] = [
+    (APP_DIR / "core" / "templates", "**/*.jinja2"),
+    (APP_DIR / "modules", "**/*"),
+    *((_GENERATOR_DIR, name) for name in (
+        "code_generator.py",
+        "interfaces.py",
+        "module_loader.py",
+        "output_sink.py",
+        "schema_index.py",
+        "template_registry.py",
+    )),
+    (APP_DIR / "workers", "normalizer.py"),
+    (APP_DIR / "workers", "mtm_validator.py"),
+]
+
+_file_hashes: Dict[str, Tuple[int, int, str]] = {}
+_file_hashes_lock = threading.Lock()
+
+
+def _file_digest(path: Path) -> str:
+    st = path.stat()
+    key = str(path)
+
+    with _file_hashes_lock:
+        cached = _file_hashes.get(key)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    with _file_hashes_lock:
+        _file_hashes[key] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+
+def generator_fingerprint(sources: Iterable[Tuple[Path, str]] = FINGERPRINT_SOURCES) -> str:
+    """
+    Content hash of every template and generator source file. Files are
+    only re-read when their mtime or size changes.
+    """
+    h = hashlib.sha256()
+    for root, pattern in sources:
+        for path in sorted(root.glob(pattern)):
+            if not path.is_file() or path.suffix in (".pyc", ".cache"):
+                continue
+            h.update(path.relative_to(APP_DIR).as_posix().encode("utf-8"))
+            h.update(_file_digest(path).encode("ascii"))
+    return h.hexdigest()
+
+
+def definition_key(
+    project_def: Dict[str, Any],
+    models_def: List[Dict[str, Any]],
+    fingerprint: str,
+) -> str:
+    """Canonical hash of a normalized definition plus the generator fingerprint."""
+    modules = project_def.get("modules", {}) or {}
+    enabled_modules = sorted(
+        name for name, cfg in modules.items()
+        if isinstance(cfg, dict) and cfg.get("enabled")
+    )
+
+    canonical = json.dumps(
+        {
+            "project": project_def,
+            "models": models_def,
+            "modules": enabled_modules,
+            "fingerprint": fingerprint,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ArchiveCacheWriter:
+    """Temporary file that becomes a cache entry only once the archive is complete."""
+
+    def __init__(self, cache: "ArchiveCache", name: str):
+        self._cache = cache
+        self._name = name
+        self._tmp_path = cache.root / f".tmp-{uuid.uuid4().hex}"
+        self._fh = open(self._tmp_path, "wb")
+        self._size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._fh.write(chunk)
+        self._size += len(chunk)
+
+    def commit(self) -> None:
+        self._fh.close()
+        self._cache._store(self._name, self._tmp_path, self._size)
+
+    def discard(self) -> None:
+        self._fh.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+class ArchiveCache:
+    """
+    Size-bounded LRU cache of generated archives on local disk.
+
+    Entries are named after the content hash of the definition, so
+    identical requests are served from disk without rendering anything.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._fingerprint: str | None = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    # -------------------------------------------------------------------------
+    # Index
+    # -------------------------------------------------------------------------
+    def _load(self) -> None:
+        fp_file = self.root / "FINGERPRINT"
+        if fp_file.exists():
+            self._fingerprint = fp_file.read_text(encoding="utf-8").strip() or None
+
+        files = []
+        for path in self.root.iterdir():
+            if path.name.startswith(".tmp-"):
+                # Restos de una generación interrumpida
+                path.unlink(missing_ok=True)
+                continue
+            if path.is_file() and path.name != "FINGERPRINT":
+                st = path.stat()
+                files.append((st.st_mtime, path.name, st.st_size))
+
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total_bytes += size
+
+    def _evict_locked(self) -> None:
+        while self._total_bytes > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._stats["evictions"] += 1
+            (self.root / name).unlink(missing_ok=True)
+
+    def _clear_locked(self) -> None:
+        for name in self._entries:
+            (self.root / name).unlink(missing_ok=True)
+        self._entries.clear()
+        self._total_bytes = 0
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+    def ensure_fingerprint(self, fingerprint: str) -> None:
+        """Drops every entry if templates or generator code changed since they were stored."""
+        with self._lock:
+            if self._fingerprint == fingerprint:
+                return
+            if self._fingerprint is not None:
+                logger.info("Plantillas modificadas: invalidando caché de archivos generados")
+                self._clear_locked()
+                self._stats["invalidations"] += 1
+            self._fingerprint = fingerprint
+            (self.root / "FINGERPRINT").write_text(fingerprint, encoding="utf-8")
+
+    def get(self, name: str) -> Path | None:
+        path = self.root / name
+        with self._lock:
+            try:
+                # Otro worker que comparte el directorio puede haberlo guardado
+                # o borrado sin que este índice se entere
+                os.utime(path)
+                size = path.stat().st_size
+            except FileNotFoundError:
+                previous = self._entries.pop(name, None)
+                if previous is not None:
+                    self._total_bytes -= previous
+                self._stats["misses"] += 1
+                return None
+
+            if name not in self._entries:
+                self._entries[name] = size
+                self._total_bytes += size
+            self._entries.move_to_end(name)
+            self._stats["hits"] += 1
+        return path
+
+    def writer(self, name: str) -> ArchiveCacheWriter:
+        return ArchiveCacheWriter(self, name)
+
+    def put_bytes(self, name: str, data: bytes) -> None:
+        writer = self.writer(name)
+        try:
+            writer.write(data)
+        except BaseException:
+            writer.discard()
+            raise
+        writer.commit()
+
+    def put_file(self, name: str, path: Path) -> None:
+        """Stores a copy of ``path`` (a hard link when possible); ``path`` stays untouched."""
+        tmp_path = self.root / f".tmp-{uuid.uuid4().hex}"
+        try:
+            os.link(path, tmp_path)
+        except OSError:
+            shutil.copyfile(path, tmp_path)
+        self._store(name, tmp_path, tmp_path.stat().st_size)
+
+    def _store(self, name: str, tmp_path: Path, size: int) -> None:
+        os.replace(tmp_path, self.root / name)
+        with self._lock:
+            previous = self._entries.pop(name, None)
+            if previous is not None:
+                self._total_bytes -= previous
+            self._entries[name] = size
+            self._total_bytes += size
+            self._stats["stores"] += 1
+            self._evict_locked()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_archive_cache: ArchiveCache | None = None
+_archive_cache_lock = threading.Lock()
+
+
+def get_archive_cache() -> ArchiveCache | None:
+    """Process-wide archive cache, or None when disabled in settings."""
+    global _archive_cache
+
+    if not settings.ARCHIVE_CACHE_ENABLED:
+        return None
+
+    with _archive_cache_lock:
+        if _archive_cache is None:
+            root = (
+                Path(settings.ARCHIVE_CACHE_DIR)
+                if settings.ARCHIVE_CACHE_DIR
+                else APP_DIR.parent / ".cache" / "archives"
+            )
+            _archive_cache = ArchiveCache(root, settings.ARCHIVE_CACHE_MAX_BYTES)
+        return _archive_cache
@@ -1,6 +1,11 @@
-from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
-from typing import Dict, Any, List
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Any, List
+
+from generator_app.app.core.generator.template_registry import get_environment
+from generator_app.app.core.generator.output_sink import CountingSink, OutputSink, FileSystemSink
+from generator_app.app.core.generator.schema_index import SchemaIndex
+from generator_app.app.core.generator.render_cache import RenderCache, RenderedModel, model_key
+from generator_app.app.core.tracing import record, span, tracing_enabled
 
 
 TYPE_MAP_SQLALCHEMY = {
@@ -21,6 +26,9 @@ TYPE_MAP_PYTHON = {
     "uuid": "UUID",
 }
 
+MODEL_TEMPLATE = "models/sqlalchemy_model.jinja2"
+SCHEMA_TEMPLATE = "schemas/pydantic_schema.jinja2"
+
 
 class CodeGenerator:
     """
@@ -28,15 +36,26 @@ class CodeGenerator:
     a complete FastAPI project structure based on a JSON definition.
     """
 
-    def __init__(self, templates_dir: Path, output_dir: Path):
-        self.env = Environment(
-            loader=FileSystemLoader(str(templates_dir)),
-            autoescape=False,
-            # Para Python, mejor no recortar bloques.
-            trim_blocks=False,
-            lstrip_blocks=False,
-        )
-        self.output_dir = output_dir
+    def __init__(
+        self,
+        templates_dir: Path,
+        output_dir: Path | None = None,
+        sink: OutputSink | None = None,
+        on_model_rendered: Callable[[int, int], None] | None = None,
+        render_cache: RenderCache | None = None,
+    ):
+        # Entorno compartido por proceso: las plantillas se compilan una sola vez
+        self.env = get_environment(templates_dir)
+        if sink is None:
+            if output_dir is None:
+                raise ValueError("Either 'output_dir' or 'sink' must be provided")
+            sink = FileSystemSink(output_dir)
+        # Todos los ficheros generados pasan por el sink (disco, memoria, zip, tar...)
+        self.sink = sink
+        # Progreso opcional: (modelos generados, total de modelos)
+        self.on_model_rendered = on_model_rendered
+        # Opcional (regeneración de versiones): solo se renderizan los modelos que han cambiado
+        self.render_cache = render_cache
 
         self.extra_routers = []
         self.extra_requirements = []
@@ -85,12 +104,7 @@ class CodeGenerator:
     # -------------------------------------------------------------------------
     # Model context builder (incluye relaciones)
     # -------------------------------------------------------------------------
-    def _prepare_model_context(
-        self,
-        model_def: Dict[str, Any],
-        model_table_map: Dict[str, str],
-        global_m2m_specs: List[Dict[str, Any]],
-    ) -> Dict[str, Any]:
+    def _prepare_model_context(self, model_def: Dict[str, Any], schema_index: SchemaIndex) -> Dict[str, Any]:
         fields: List[Dict[str, Any]] = []
         imports = set()
         has_datetime = False
@@ -162,11 +176,7 @@ class CodeGenerator:
                 # foreign_key = "stations.id" → target_table = "stations"
                 target_table = foreign_key.split(".")[0]
                 # Buscamos el nombre de modelo cuyo table_name coincida
-                target_model = None
-                for m_name, t_name in model_table_map.items():
-                    if t_name == target_table:
-                        target_model = m_name
-                        break
+                target_model = schema_index.model_for_table(target_table)
 
                 if not target_model:
                     raise ValueError(
@@ -208,12 +218,7 @@ class CodeGenerator:
         many_to_many_tables: List[Dict[str, Any]] = []
         m2m_imports: List[Dict[str, Any]] = []
 
-        for spec in global_m2m_specs:
-            involved = spec["left_model"] == model_def["name"] or spec["right_model"] == model_def["name"]
-
-            if not involved:
-                continue
-
+        for spec in schema_index.m2m_specs_for(model_def["name"]):
             if spec["owner"] == model_def["name"]:
                 many_to_many_tables.append(
                     {
@@ -261,10 +266,81 @@ class CodeGenerator:
     # -------------------------------------------------------------------------
     # Template renderer
     # -------------------------------------------------------------------------
-    def _render_to_file(self, template_name: str, context: Dict[str, Any], output_path: Path):
-        template = self.env.get_template(template_name)
-        rendered = template.render(**context)
-        output_path.write_text(rendered, encoding="utf-8")
+    def _render(self, template_name: str, context: Dict[str, Any]) -> str:
+        return self.env.get_template(template_name).render(**context)
+
+    def _render_to_file(self, template_name: str, context: Dict[str, Any], output_path: PurePosixPath):
+        self.sink.write_text(output_path.as_posix(), self._render(template_name, context))
+
+    def _render_model(self, model_def: Dict[str, Any], schema_index: SchemaIndex, router_template: str) -> RenderedModel:
+        """``_render_model_files`` through the render cache, when there is one."""
+        if self.render_cache is None:
+            return self._render_model_files(model_def, schema_index, router_template)
+
+        # Lo único que el contexto de un modelo toma del resto del proyecto
+        fk_tables = sorted({
+            f["foreign_key"].split(".")[0] for f in model_def["fields"] if f.get("foreign_key")
+        })
+        key = model_key(model_def, {
+            "router_template": router_template,
+            "fk_models": [schema_index.model_for_table(t) for t in fk_tables],
+            "m2m": schema_index.m2m_specs_for(model_def["name"]),
+        })
+        templates = tuple(
+            self.env.get_template(name)
+            for name in (MODEL_TEMPLATE, SCHEMA_TEMPLATE, router_template)
+        )
+        return self.render_cache.render(
+            key, templates, lambda: self._render_model_files(model_def, schema_index, router_template)
+        )
+
+    def _render_model_files(
+        self,
+        model_def: Dict[str, Any],
+        schema_index: SchemaIndex,
+        router_template: str,
+    ) -> RenderedModel:
+        """
+        Renders model, schema and router of one model without touching the
+        sink. Returns the files to write and the router info (None when
+        CRUD generation is disabled).
+        """
+        app_dir = PurePosixPath("app")
+        model_ctx = self._prepare_model_context(model_def, schema_index)
+        context = {"model": model_ctx}
+
+        files = [
+            (
+                app_dir / "models" / f"{model_ctx['module_name']}.py",
+                self._render(MODEL_TEMPLATE, context),
+            ),
+            (
+                app_dir / "schemas" / f"{model_ctx['module_name']}.py",
+                self._render(SCHEMA_TEMPLATE, context),
+            ),
+        ]
+
+        if not model_ctx["routes"].get("generate_crud", True):
+            return files, None
+
+        router_module_name = f"{model_ctx['module_name']}_router"
+        files.append(
+            (
+                app_dir / "api" / "v1" / "endpoints" / f"{router_module_name}.py",
+                self._render(router_template, context),
+            )
+        )
+
+        router_info = {
+            "router_name": "router",
+            "module": router_module_name,
+            "prefix": model_ctx["routes"].get(
+                "prefix",
+                f"/{model_ctx['module_name']}s",
+            ),
+            "tags": model_ctx["routes"].get("tags", [model_ctx["name"]]),
+        }
+        return files, router_info
 
     # -------------------------------------------------------------------------
     # Main generator
@@ -274,7 +350,21 @@ class CodeGenerator:
         Generates a complete FastAPI project structure based on the project
         and model definitions.
         """
-
+        if not tracing_enabled():
+            return self._generate_project_structure(project_def, models_def)
+
+        # Cuenta ficheros, tamaño y tiempo de escritura (disco, zip...) por separado del render
+        counting = CountingSink(self.sink)
+        self.sink = counting
+        try:
+            with span("generator.generate", models=len(models_def or [])) as s:
+                self._generate_project_structure(project_def, models_def)
+                s.set(files=counting.files, bytes=counting.chars)
+        finally:
+            self.sink = counting.inner
+            record(("generator.write", counting.write_seconds, {"files": counting.files, "bytes": counting.chars}))
+
+    def _generate_project_structure(self, project_def: Dict[str, Any], models_def: List[Dict[str, Any]]):
         self.project_def = project_def
 
         mode = project_def.get("mode", "sync")
@@ -298,81 +388,24 @@ class CodeGenerator:
         async_url = self.build_async_url(project_def["database"]) if is_async else None
 
         # Create folder structure
-        app_dir = self.output_dir / "app"
-        (app_dir / "api" / "v1" / "endpoints").mkdir(parents=True, exist_ok=True)
-        (app_dir / "models").mkdir(parents=True, exist_ok=True)
-        (app_dir / "schemas").mkdir(parents=True, exist_ok=True)
-        (app_dir / "db").mkdir(parents=True, exist_ok=True)
-        (app_dir / "core").mkdir(parents=True, exist_ok=True)
-
-        # ---------------------------------------------------------------------
-        # Mapa de modelos → table_name
-        # ---------------------------------------------------------------------
-        model_table_map: Dict[str, str] = {}
+        app_dir = PurePosixPath("app")
+        self.sink.ensure_dirs(
+            "app/api/v1/endpoints",
+            "app/models",
+            "app/schemas",
+            "app/db",
+            "app/core",
+        )
 
         if not models_def:
             models_def = []
 
-        for m in models_def:
-            model_table_map[m["name"]] = m.get("table_name", m["name"].lower())
-
         # ---------------------------------------------------------------------
-        # Especificaciones globales Many-to-Many (tablas de asociación)
-        # ---------------------------------------------------------------------    
-        global_m2m_specs_dict: Dict[tuple, Dict[str, Any]] = {}
-
-        for m in models_def:
-            this_model = m["name"]
-            this_table = model_table_map[this_model]
-            this_snake = this_model.lower()
-
-            for rel in m.get("many_to_many", []):
-                target_model = rel["target"]
-                target_table = model_table_map[target_model]
-                target_snake = target_model.lower()
-                association_table = rel["association_table"]
-
-                # Clave única para esta relación (evita duplicados)
-                key = (
-                    association_table,
-                    tuple(sorted([this_model, target_model])),
-                )
-                if key in global_m2m_specs_dict:
-                    # Ya registrada desde el otro lado
-                    continue
-
-                # Determinamos el "owner" léxico (para definir la tabla)
-                owner = min(this_model, target_model)
-
-                if owner == this_model:
-                    left_model = this_model
-                    right_model = target_model
-                    left_snake = this_snake
-                    right_snake = target_snake
-                    left_table = this_table
-                    right_table = target_table
-                else:
-                    left_model = target_model
-                    right_model = this_model
-                    left_snake = target_snake
-                    right_snake = this_snake
-                    left_table = target_table
-                    right_table = this_table
-
-                global_m2m_specs_dict[key] = {
-                    "table_name": association_table,
-                    "owner": owner,
-                    "owner_module": owner.lower(),
-                    "left_model": left_model,
-                    "right_model": right_model,
-                    "left_key": f"{left_snake}_id",
-                    "right_key": f"{right_snake}_id",
-                    "left_fk": f"{left_table}.id",
-                    "right_fk": f"{right_table}.id",
-                }
-
-        global_m2m_specs: List[Dict[str, Any]] = list(global_m2m_specs_dict.values())
-
+        # Índice del esquema: table_name → modelo y tablas Many-to-Many,
+        # construido una sola vez para todos los modelos
+        # ---------------------------------------------------------------------
+        with span("generator.schema_index", models=len(models_def)):
+            schema_index = SchemaIndex(models_def)
 
         # ---------------------------------------------------------------------
         # Core config (Pydantic settings)
@@ -413,57 +446,30 @@ class CodeGenerator:
         # ---------------------------------------------------------------------
         # Models, schemas, routers
         # ---------------------------------------------------------------------
-        for model_def in models_def:
-            model_ctx = self._prepare_model_context(model_def, model_table_map, global_m2m_specs)
+        with span("generator.models", models=len(models_def)):
+            for index, model_def in enumerate(models_def, start=1):
+                files, router_info = self._render_model(model_def, schema_index, router_template)
 
-            # Model
-            self._render_to_file(
-                "models/sqlalchemy_model.jinja2",
-                {"model": model_ctx},
-                app_dir / "models" / f"{model_ctx['module_name']}.py",
-            )
-
-            # Schema
-            self._render_to_file(
-                "schemas/pydantic_schema.jinja2",
-                {"model": model_ctx},
-                app_dir / "schemas" / f"{model_ctx['module_name']}.py",
-            )
-
-            # Router
-            if model_ctx["routes"].get("generate_crud", True):
-                router_module_name = f"{model_ctx['module_name']}_router"
-                router_file = app_dir / "api" / "v1" / "endpoints" / f"{router_module_name}.py"
+                for path, content in files:
+                    self.sink.write_text(path.as_posix(), content)
 
-                self._render_to_file(
-                    router_template,
-                    {"model": model_ctx},
-                    router_file,
-                )
-
-                routers_info.append(
-                    {
-                        "router_name": "router",
-                        "module": router_module_name,
-                        "prefix": model_ctx["routes"].get(
-                            "prefix",
-                            f"/{model_ctx['module_name']}s",
-                        ),
-                        "tags": model_ctx["routes"].get("tags", [model_ctx["name"]]),
-                    }
-                )
+                if router_info is not None:
+                    routers_info.append(router_info)
 
+                if self.on_model_rendered is not None:
+                    self.on_model_rendered(index, len(models_def))
 
         # ---------------------------------------------------------------------
         # Load and execute modules
         # ---------------------------------------------------------------------
         from generator_app.app.core.generator.module_loader import ModuleLoader
 
-        loader = ModuleLoader(self.env, self.output_dir, project_def)
+        loader = ModuleLoader(self.env, self.sink, project_def)
         modules = loader.load_modules()
 
         for module in modules:
-            result = module.generate()
+            with span(f"module.{module.__class__.__name__}"):
+                result = module.generate()
 
             # Routers
             for r in result.get("routers", []):
@@ -473,10 +479,6 @@ class CodeGenerator:
             for req in result.get("requirements", []):
                 self.extra_requirements.append(req)
 
-            # Extra files (if any)
-                for f in result.get("extra_files", []):
-                    pass  # future use
-
         # ---------------------------------------------------------------------
         # Main app
         # ---------------------------------------------------------------------
@@ -497,7 +499,7 @@ class CodeGenerator:
         self._render_to_file(
             "project/run.jinja2",
             {},
-            self.output_dir / "run.py",
+            PurePosixPath("run.py"),
         )
 
         # ---------------------------------------------------------------------
@@ -522,7 +524,7 @@ class CodeGenerator:
             elif engine == "mysql":
                 requirements.append("aiomysql")
 
-        (self.output_dir / "requirements.txt").write_text(
+        self.sink.write_text(
+            "requirements.txt",
             "\n".join(requirements) + "\n",
-            encoding="utf-8",
         )
@@ -1,16 +1,24 @@
 from abc import ABC, abstractmethod
-from pathlib import Path
 from jinja2 import Environment
 from typing import Dict, Any
 
+from generator_app.app.core.generator.output_sink import OutputSink
+
 class BaseModuleGenerator(ABC):
     """
     Interface for all pluggable modules (Auth, Ecommerce, ERP, etc.)
     """
 
-    def __init__(self, env: Environment, output_dir: Path, project_def: Dict[str, Any], module_config: Dict[str, Any]):
+    def __init__(
+        self,
+        env: Environment,
+        sink: OutputSink,
+        project_def: Dict[str, Any],
+        module_config: Dict[str, Any],
+    ):
         self.env = env
-        self.output_dir = output_dir
+        # Los módulos nunca escriben en disco directamente, siempre a través del sink
+        self.sink = sink
         self.project_def = project_def
         self.module_config = module_config
 
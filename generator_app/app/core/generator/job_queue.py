@@ -0,0 +1,278 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from multiprocessing.managers import SyncManager
+from pathlib import Path
+from typing import Any, Callable, Dict, MutableMapping, Set
+
+from generator_app.app.core.config import settings
+from generator_app.app.core.logging_config import logger
+from generator_app.app.core.generator.template_registry import APP_DIR
+from generator_app.app.core.generator.worker_pool import GenerationPool, PoolSaturated, get_generation_pool
+
+
+class GenerationJob:
+    """State of one asynchronous generation, as reported by the jobs API."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    def __init__(self, owner_id: Any, filename: str, media_type: str, models_total: int):
+        self.id = uuid.uuid4().hex
+        self.owner_id = owner_id
+        self.status = self.QUEUED
+        self.filename = filename
+        self.media_type = media_type
+        self.models_total = models_total
+        self.models_rendered = 0
+        self.artifact_path: Path | None = None
+        self.error: str | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        # Llamado (en un hilo) con el artefacto cuando el job termina bien
+        self.on_complete: Callable[[Path], None] | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.COMPLETED, self.FAILED)
+
+    def complete(self, artifact_path: Path) -> None:
+        self.artifact_path = artifact_path
+        self.models_rendered = self.models_total
+        self.status = self.COMPLETED
+        self.finished_at = time.time()
+        # Servido desde caché: empieza y termina a la vez
+        if self.started_at is None:
+            self.started_at = self.finished_at
+
+    def fail(self, error: BaseException) -> None:
+        self.error = str(error) or error.__class__.__name__
+        self.status = self.FAILED
+        self.finished_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "models_rendered": self.models_rendered,
+            "models_total": self.models_total,
+            "filename": self.filename,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+# Firma de los trabajos: fn(*args, artifact_path, deadline, progress, progress_key)
+JobFunction = Callable[..., None]
+
+
+class GenerationJobQueue(ABC):
+    """
+    Where generation jobs are queued and executed. The in-process queue
+    is the only implementation for now; a broker-backed one only has to
+    provide the same methods.
+    """
+
+    @abstractmethod
+    def submit(self, job: GenerationJob, fn: JobFunction, *args: Any) -> GenerationJob:
+        pass
+
+    @abstractmethod
+    def get(self, job_id: str) -> GenerationJob | None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    def start(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InProcessJobQueue(GenerationJobQueue):
+    """
+    Runs jobs on the generation pool of this process.
+
+    Artifacts are written to ``root``; finished jobs and their artifacts
+    are dropped after ``retention`` seconds. Jobs only exist in this
+    process: with several server workers a poll may reach one that does
+    not know the job, so run a single worker. Jobs still unfinished at
+    shutdown are marked failed.
+    """
+
+    def __init__(self, pool: GenerationPool, root: Path, max_pending: int, retention: float):
+        self.pool = pool
+        self.root = Path(root)
+        self.max_pending = max_pending
+        self.retention = retention
+
+        self._jobs: Dict[str, GenerationJob] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._progress: MutableMapping[str, int] | None = None
+        self._manager: SyncManager | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._lock = threading.Lock()
+
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _progress_map(self) -> MutableMapping[str, int]:
+        # Los procesos del pool solo pueden informar del progreso a través de un Manager
+        if self._progress is None:
+            if self.pool.kind == "process":
+                self._manager = multiprocessing.Manager()
+                self._progress = self._manager.dict()
+            else:
+                self._progress = {}
+        return self._progress
+
+    def start(self) -> None:
+        """Starts the progress Manager up front, from the lifespan hook rather than a request."""
+        workers = int(os.environ.get("WEB_CONCURRENCY", "1") or 1)
+        if workers > 1:
+            logger.warning(
+                f"Cola de jobs en proceso con {workers} workers: "
+                "las consultas de estado pueden llegar a otro worker y devolver 404"
+            )
+        self._progress_map()
+
+    def _pending_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        with self._lock:
+            expired = [
+                job for job in self._jobs.values()
+                if job.finished and now - job.finished_at > self.retention
+            ]
+            for job in expired:
+                del self._jobs[job.id]
+
+        for job in expired:
+            if job.artifact_path is not None and job.artifact_path.parent == self.root:
+                job.artifact_path.unlink(missing_ok=True)
+
+    def submit(self, job: GenerationJob, fn: JobFunction, *args: Any) -> GenerationJob:
+        """Registers ``job`` and schedules ``fn``; must be called from the event loop."""
+        self._purge_expired()
+
+        with self._lock:
+            if self._pending_count() >= self.max_pending:
+                raise PoolSaturated(self.pool.retry_after())
+            self._jobs[job.id] = job
+
+        if not job.finished:
+            task = asyncio.get_running_loop().create_task(self._run(job, fn, *args))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: GenerationJob, fn: JobFunction, *args: Any) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.pool.max_workers)
+
+        progress = self._progress_map()
+        artifact_path = self.root / f"{job.id}-{job.filename}"
+
+        async with self._semaphore:
+            job.status = GenerationJob.RUNNING
+            job.started_at = time.time()
+            progress[job.id] = 0
+            try:
+                await self.pool.run(
+                    fn, *args, artifact_path, self.pool.deadline(), progress, job.id,
+                    enforce_limit=False,
+                )
+            except asyncio.CancelledError:
+                artifact_path.unlink(missing_ok=True)
+                if not job.finished:
+                    job.fail(RuntimeError("Generation cancelled"))
+                raise
+            except Exception as e:
+                logger.error(f"Job de generación {job.id} fallido: {e}", exc_info=True)
+                artifact_path.unlink(missing_ok=True)
+                job.fail(e)
+            else:
+                if job.on_complete is not None:
+                    try:
+                        await asyncio.to_thread(job.on_complete, artifact_path)
+                    except Exception as e:
+                        logger.warning(f"Job {job.id}: no se pudo guardar el resultado: {e}")
+                job.complete(artifact_path)
+            finally:
+                progress.pop(job.id, None)
+
+    def get(self, job_id: str) -> GenerationJob | None:
+        self._purge_expired()
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None and job.status == GenerationJob.RUNNING and self._progress is not None:
+            job.models_rendered = self._progress.get(job.id, job.models_rendered)
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {"jobs": counts, "max_pending": self.max_pending}
+
+    def shutdown(self) -> None:
+        # Nadie va a terminarlos: que no queden en "running" para siempre
+        with self._lock:
+            unfinished = [job for job in self._jobs.values() if not job.finished]
+        for job in unfinished:
+            job.fail(RuntimeError("Server shut down before the job finished"))
+        for task in list(self._tasks):
+            task.cancel()
+        manager, self._manager, self._progress = self._manager, None, None
+        if manager is not None:
+            manager.shutdown()
+
+
+_job_queue: GenerationJobQueue | None = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> GenerationJobQueue:
+    global _job_queue
+
+    with _job_queue_lock:
+        if _job_queue is None:
+            root = (
+                Path(settings.GENERATION_JOBS_DIR)
+                if settings.GENERATION_JOBS_DIR
+                else APP_DIR.parent / ".cache" / "jobs"
+            )
+            _job_queue = InProcessJobQueue(
+                get_generation_pool(),
+                root,
+                max_pending=settings.GENERATION_JOBS_MAX_PENDING,
+                retention=settings.GENERATION_JOBS_RETENTION_SECONDS,
+            )
+        return _job_queue
+
+
+def start_job_queue() -> None:
+    get_job_queue().start()
+
+
+def shutdown_job_queue() -> None:
+    global _job_queue
+
+    with _job_queue_lock:
+        queue, _job_queue = _job_queue, None
+    if queue is not None:
+        queue.shutdown()
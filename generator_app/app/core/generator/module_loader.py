@@ -1,19 +1,26 @@
 from typing import List
-from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
 from generator_app.app.core.generator.interfaces import BaseModuleGenerator
+from generator_app.app.core.generator.output_sink import OutputSink
+from generator_app.app.core.generator.template_registry import AUTH_TEMPLATES_DIR, get_environment
+from generator_app.app.core.tracing import span
 
 class ModuleLoader:
     """
     Loads and executes modules based on project_def["modules"].
     """
 
-    def __init__(self, core_env, output_dir, project_def):
+    def __init__(self, core_env, sink: OutputSink, project_def):
         self.core_env = core_env
-        self.output_dir = output_dir
+        self.sink = sink
         self.project_def = project_def
 
     def load_modules(self) -> List[BaseModuleGenerator]:
+        with span("modules.load") as s:
+            modules = self._load_modules()
+            s.set(modules=len(modules))
+        return modules
+
+    def _load_modules(self) -> List[BaseModuleGenerator]:
         modules = []
         modules_config = self.project_def.get("modules", {})
 
@@ -21,20 +28,14 @@ class ModuleLoader:
         if modules_config.get("auth", {}).get("enabled"):
             from generator_app.app.modules.auth.auth_generator import AuthGenerator
 
-            auth_templates = Path("app/modules/auth/templates")
-            auth_env = Environment(
-                loader=FileSystemLoader(str(auth_templates)),
-                autoescape=False,
-                trim_blocks=False,
-                lstrip_blocks=False,
-            )
+            auth_env = get_environment(AUTH_TEMPLATES_DIR)
 
             modules.append(
                 AuthGenerator(
                     env=auth_env,
-                    output_dir=self.output_dir,
+                    sink=self.sink,
                     project_def=self.project_def,
-                    module_config=modules_config["auth"]
+                    module_config=modules_config["auth"],
                 )
             )
 
@@ -0,0 +1,271 @@
+import asyncio
+import contextvars
+import io
+import tarfile
+import threading
+import time
+import zipfile
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from pathlib import Path, PurePosixPath
+from typing import AsyncIterator, Callable, Dict, Set
+
+
+class OutputSink(ABC):
+    """
+    Destination for generated files.
+
+    Paths are always relative and POSIX-style ("app/models/user.py");
+    each sink decides where the bytes end up (disk, memory, archive...).
+    """
+
+    @abstractmethod
+    def write_text(self, path: str, content: str) -> None:
+        pass
+
+    def ensure_dirs(self, *dirs: str) -> None:
+        """Declares the folder layout up front. Only meaningful for sinks backed by a filesystem."""
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def abort(self) -> None:
+        """Called instead of ``close`` when writing failed; the output is incomplete."""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class FileSystemSink(OutputSink):
+    """Writes files below ``root``, creating each directory only once."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._created: Set[PurePosixPath] = set()
+
+    def _mkdir(self, rel_dir: PurePosixPath) -> None:
+        if rel_dir in self._created:
+            return
+        (self.root / rel_dir).mkdir(parents=True, exist_ok=True)
+        # mkdir(parents=True) también crea los padres
+        self._created.update([rel_dir, *rel_dir.parents])
+
+    def ensure_dirs(self, *dirs: str) -> None:
+        for d in dirs:
+            self._mkdir(PurePosixPath(d))
+
+    def write_text(self, path: str, content: str) -> None:
+        rel = PurePosixPath(path)
+        self._mkdir(rel.parent)
+        (self.root / rel).write_text(content, encoding="utf-8")
+
+
+class MemorySink(OutputSink):
+    """Keeps every generated file in a dict (path -> content). Useful for tests and benchmarks."""
+
+    def __init__(self):
+        self.files: Dict[str, str] = {}
+
+    def write_text(self, path: str, content: str) -> None:
+        self.files[path] = content
+
+
+class CountingSink(OutputSink):
+    """Wraps another sink, counting files, characters written and time spent writing."""
+
+    def __init__(self, inner: OutputSink):
+        self.inner = inner
+        self.files = 0
+        self.chars = 0
+        self.write_seconds = 0.0
+
+    def write_text(self, path: str, content: str) -> None:
+        started = time.perf_counter()
+        self.inner.write_text(path, content)
+        self.write_seconds += time.perf_counter() - started
+        self.files += 1
+        self.chars += len(content)
+
+    def ensure_dirs(self, *dirs: str) -> None:
+        self.inner.ensure_dirs(*dirs)
+
+    def close(self) -> None:
+        self.inner.close()
+
+    def abort(self) -> None:
+        self.inner.abort()
+
+
+class _ChunkWriter:
+    """
+    Unseekable file-like object used as archive target.
+
+    Buffers the compressed bytes and hands them to ``emit`` in chunks of
+    roughly ``chunk_size`` bytes as soon as they are available.
+    """
+
+    def __init__(self, emit: Callable[[bytes], None], chunk_size: int):
+        self._emit = emit
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= self._chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._emit(bytes(self._buffer))
+            self._buffer.clear()
+
+    def discard(self) -> None:
+        self._emit = lambda chunk: None
+        self._buffer.clear()
+
+
+class ZipSink(OutputSink):
+    """
+    Streaming ZIP sink. Each file is compressed and emitted right after it
+    is written, so the archive never has to exist on disk.
+    """
+
+    media_type = "application/zip"
+    extension = "zip"
+
+    def __init__(self, emit: Callable[[bytes], None], chunk_size: int = 64 * 1024):
+        self._out = _ChunkWriter(emit, chunk_size)
+        self._zip = zipfile.ZipFile(self._out, mode="w", compression=zipfile.ZIP_DEFLATED)
+
+    def write_text(self, path: str, content: str) -> None:
+        self._zip.writestr(path, content.encode("utf-8"))
+        self._out.flush()
+
+    def close(self) -> None:
+        self._zip.close()
+        self._out.flush()
+
+    def abort(self) -> None:
+        # Cerrar sin emitir: si no, ZipFile.__del__ escribiría el directorio final
+        self._out.discard()
+        self._zip.close()
+
+
+class TarGzSink(OutputSink):
+    """Streaming tar.gz sink, same emission model as ZipSink."""
+
+    media_type = "application/gzip"
+    extension = "tar.gz"
+
+    def __init__(self, emit: Callable[[bytes], None], chunk_size: int = 64 * 1024):
+        self._out = _ChunkWriter(emit, chunk_size)
+        self._tar = tarfile.open(fileobj=self._out, mode="w|gz")
+        self._mtime = int(time.time())
+
+    def write_text(self, path: str, content: str) -> None:
+        data = content.encode("utf-8")
+        info = tarfile.TarInfo(name=path)
+        info.size = len(data)
+        info.mtime = self._mtime
+        info.mode = 0o644
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def close(self) -> None:
+        self._tar.close()
+        self._out.flush()
+
+    def abort(self) -> None:
+        self._out.discard()
+        self._tar.close()
+
+
+ARCHIVE_SINKS = {
+    ZipSink.extension: ZipSink,
+    TarGzSink.extension: TarGzSink,
+}
+
+
+class GenerationCancelled(Exception):
+    """Raised inside the producer when the consumer stopped reading the stream."""
+
+
+_EOF = object()
+
+
+async def iter_sink_stream(
+    build: Callable[[OutputSink], None],
+    sink_factory: Callable[[Callable[[bytes], None]], OutputSink] = ZipSink,
+    on_done: Callable[[BaseException | None], None] | None = None,
+    executor: Executor | None = None,
+    max_chunks: int = 8,
+) -> AsyncIterator[bytes]:
+    """
+    Runs ``build`` in a worker thread (``executor`` must be thread based)
+    and yields the archive chunks it produces.
+
+    ``build`` receives the sink created by ``sink_factory`` and must write
+    every file to it; the archive is finalized when ``build`` returns.
+    ``on_done`` is called from the worker thread once the archive is
+    complete (with None) or has failed (with the exception).
+
+    At most ``max_chunks`` chunks wait for the consumer: with a slow
+    client the worker blocks instead of buffering the whole archive.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_chunks)
+    cancelled = threading.Event()
+
+    def put(item) -> None:
+        # Sin consumidor nadie vaciaría la cola: no bloquear
+        if cancelled.is_set():
+            return
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def emit(chunk: bytes) -> None:
+        if cancelled.is_set():
+            raise GenerationCancelled()
+        put(chunk)
+
+    def produce() -> None:
+        error = None
+        try:
+            with sink_factory(emit) as sink:
+                build(sink)
+        except BaseException as e:
+            error = e
+            put(e)
+        finally:
+            if on_done is not None:
+                try:
+                    on_done(error)
+                except Exception as e:
+                    put(e)
+            put(_EOF)
+
+    # Copiar el contexto para que las trazas del worker vayan a la petición actual
+    loop.run_in_executor(executor, contextvars.copy_context().run, produce)
+
+    try:
+        while True:
+            item = await queue.get()
+            if item is _EOF:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Si el cliente se desconecta, la generación en curso se detiene
+        # en la siguiente escritura
+        cancelled.set()
+        # Vaciar la cola desbloquea un put pendiente del worker
+        while not queue.empty():
+            queue.get_nowait()
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import PurePosixPath
+from typing import Any, Callable, Dict, List, Tuple
+
+from jinja2 import Template
+
+from generator_app.app.core.config import settings
+
+
+# Ficheros de un modelo (ruta, contenido) y la info de su router (None sin CRUD)
+RenderedModel = Tuple[List[Tuple[PurePosixPath, str]], Dict[str, Any] | None]
+
+
+def model_key(model_def: Dict[str, Any], dependencies: Dict[str, Any]) -> str:
+    """
+    Canonical hash of one model definition plus what its files depend on
+    elsewhere in the project (foreign key targets, many-to-many specs,
+    router template). Much smaller than the render contexts it stands for.
+    """
+    canonical = json.dumps(
+        {"model": model_def, "dependencies": dependencies},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _rendered_size(rendered: RenderedModel) -> int:
+    return sum(len(content.encode("utf-8")) for _, content in rendered[0])
+
+
+class RenderCache:
+    """
+    Size-bounded LRU of the files rendered for each model, keyed by
+    ``model_key``.
+
+    Between two versions of a project only the edited models and the
+    models that point at them are rendered again. Entries keep the
+    Templates they came from; a reloaded template never matches an old
+    entry. The cache lives in one process, so with a process pool it
+    only helps when a regeneration lands on the same worker.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Tuple[Template, ...], RenderedModel, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def render(self, key: str, templates: Tuple[Template, ...], render: Callable[[], RenderedModel]) -> RenderedModel:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and all(a is b for a, b in zip(entry[0], templates)):
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+            self._stats["misses"] += 1
+
+        rendered = render()
+        size = _rendered_size(rendered)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[2]
+            self._entries[key] = (templates, rendered, size)
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes and self._entries:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted
+                self._stats["evictions"] += 1
+
+        return rendered
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_render_cache: RenderCache | None = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache | None:
+    """Per-process render cache, or None when disabled in settings."""
+    global _render_cache
+
+    if not settings.RENDER_CACHE_ENABLED:
+        return None
+
+    with _render_cache_lock:
+        if _render_cache is None:
+            _render_cache = RenderCache(settings.RENDER_CACHE_MAX_BYTES)
+        return _render_cache
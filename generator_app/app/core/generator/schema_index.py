@@ -0,0 +1,86 @@
+from typing import Any, Dict, List
+
+
+class SchemaIndex:
+    """
+    Lookups over a normalized models definition, built once per generation.
+
+    Replaces the linear scans that used to run for every model
+    (table → model, model → many-to-many specs), so resolving
+    relationships stays linear in the number of models.
+    """
+
+    def __init__(self, models_def: List[Dict[str, Any]]):
+        self.model_table_map: Dict[str, str] = {}
+        self.table_model_map: Dict[str, str] = {}
+
+        for m in models_def:
+            table_name = m.get("table_name", m["name"].lower())
+            self.model_table_map[m["name"]] = table_name
+            # Ante tablas repetidas gana el primer modelo, como en el recorrido lineal
+            self.table_model_map.setdefault(table_name, m["name"])
+
+        self.m2m_specs = self._build_m2m_specs(models_def)
+
+        self._m2m_specs_by_model: Dict[str, List[Dict[str, Any]]] = {}
+        for spec in self.m2m_specs:
+            for model_name in {spec["left_model"], spec["right_model"]}:
+                self._m2m_specs_by_model.setdefault(model_name, []).append(spec)
+
+    def _build_m2m_specs(self, models_def: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Association tables, one spec per relationship even if declared on both sides."""
+        specs: Dict[tuple, Dict[str, Any]] = {}
+
+        for m in models_def:
+            this_model = m["name"]
+            this_table = self.model_table_map[this_model]
+            this_snake = this_model.lower()
+
+            for rel in m.get("many_to_many", []):
+                target_model = rel["target"]
+                target_table = self.model_table_map[target_model]
+                target_snake = target_model.lower()
+                association_table = rel["association_table"]
+
+                # Clave única para esta relación (evita duplicados)
+                key = (
+                    association_table,
+                    tuple(sorted([this_model, target_model])),
+                )
+                if key in specs:
+                    # Ya registrada desde el otro lado
+                    continue
+
+                # Determinamos el "owner" léxico (para definir la tabla)
+                owner = min(this_model, target_model)
+
+                if owner == this_model:
+                    left_model, right_model = this_model, target_model
+                    left_snake, right_snake = this_snake, target_snake
+                    left_table, right_table = this_table, target_table
+                else:
+                    left_model, right_model = target_model, this_model
+                    left_snake, right_snake = target_snake, this_snake
+                    left_table, right_table = target_table, this_table
+
+                specs[key] = {
+                    "table_name": association_table,
+                    "owner": owner,
+                    "owner_module": owner.lower(),
+                    "left_model": left_model,
+                    "right_model": right_model,
+                    "left_key": f"{left_snake}_id",
+                    "right_key": f"{right_snake}_id",
+                    "left_fk": f"{left_table}.id",
+                    "right_fk": f"{right_table}.id",
+                }
+
+        return list(specs.values())
+
+    def model_for_table(self, table_name: str) -> str | None:
+        return self.table_model_map.get(table_name)
+
+    def m2m_specs_for(self, model_name: str) -> List[Dict[str, Any]]:
+        """Specs involving ``model_name``, in the same order as ``m2m_specs``."""
+        return self._m2m_specs_by_model.get(model_name, [])
+
@@ -0,0 +1,146 @@
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Any, Tuple
+
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+from jinja2.bccache import Bucket
+
+from generator_app.app.core.config import settings
+from generator_app.app.core.logging_config import logger
+
+
+APP_DIR = Path(__file__).resolve().parents[2]
+
+CORE_TEMPLATES_DIR = APP_DIR / "core" / "templates"
+AUTH_TEMPLATES_DIR = APP_DIR / "modules" / "auth" / "templates"
+
+# Opciones por defecto: para Python es mejor no recortar bloques.
+DEFAULT_ENV_OPTIONS: Dict[str, Any] = {
+    "autoescape": False,
+    "trim_blocks": False,
+    "lstrip_blocks": False,
+}
+
+
+class CountingBytecodeCache(FileSystemBytecodeCache):
+    """
+    On-disk bytecode cache that records how often a template could be
+    loaded from precompiled bytecode (hit) and how often it had to be
+    compiled from source (miss).
+    """
+
+    def __init__(self, directory: str, stats: Dict[str, int], lock: threading.Lock):
+        super().__init__(directory=directory)
+        self._stats = stats
+        self._lock = lock
+
+    def load_bytecode(self, bucket: Bucket) -> None:
+        super().load_bytecode(bucket)
+        key = "bytecode_hits" if bucket.code is not None else "bytecode_misses"
+        with self._lock:
+            self._stats[key] += 1
+
+
+class TemplateRegistry:
+    """
+    Process-wide registry of Jinja2 environments.
+
+    Environments are keyed by templates directory and options so every
+    CodeGenerator / module generator reuses the same compiled templates
+    instead of re-parsing them on each request.
+    """
+
+    def __init__(self, bytecode_dir: Path | None = None):
+        self._bytecode_dir = bytecode_dir
+        self._envs: Dict[Tuple, Environment] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {
+            "env_hits": 0,
+            "env_misses": 0,
+            "bytecode_hits": 0,
+            "bytecode_misses": 0,
+        }
+
+    @staticmethod
+    def _make_key(templates_dir: Path, options: Dict[str, Any]) -> Tuple:
+        return (str(Path(templates_dir).resolve()), tuple(sorted(options.items())))
+
+    def _bytecode_cache_for(self, key: Tuple) -> CountingBytecodeCache | None:
+        if self._bytecode_dir is None:
+            return None
+
+        # Las opciones afectan al código compilado, así que cada combinación
+        # (directorio, opciones) usa su propio subdirectorio.
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+        directory = self._bytecode_dir / digest
+        directory.mkdir(parents=True, exist_ok=True)
+        return CountingBytecodeCache(str(directory), self._stats, self._lock)
+
+    def get_environment(self, templates_dir: Path, **options: Any) -> Environment:
+        opts = {**DEFAULT_ENV_OPTIONS, **options}
+        key = self._make_key(templates_dir, opts)
+
+        with self._lock:
+            env = self._envs.get(key)
+            if env is not None:
+                self._stats["env_hits"] += 1
+                return env
+            self._stats["env_misses"] += 1
+
+        env = Environment(
+            loader=FileSystemLoader(key[0]),
+            bytecode_cache=self._bytecode_cache_for(key),
+            cache_size=settings.TEMPLATE_CACHE_SIZE,
+            auto_reload=settings.TEMPLATE_AUTO_RELOAD,
+            **opts,
+        )
+
+        with self._lock:
+            # Otro hilo pudo registrarlo mientras compilábamos
+            return self._envs.setdefault(key, env)
+
+    def warm_up(self, *templates_dirs: Path) -> int:
+        """Compile every template of the given directories. Returns the count."""
+        dirs = templates_dirs or (CORE_TEMPLATES_DIR, AUTH_TEMPLATES_DIR)
+        count = 0
+
+        for templates_dir in dirs:
+            env = self.get_environment(templates_dir)
+            for name in env.list_templates(extensions=["jinja2"]):
+                env.get_template(name)
+                count += 1
+
+        return count
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "environments": len(self._envs)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._envs.clear()
+
+
+def _default_bytecode_dir() -> Path | None:
+    if not settings.TEMPLATE_BYTECODE_CACHE:
+        return None
+    if settings.TEMPLATE_BYTECODE_CACHE_DIR:
+        return Path(settings.TEMPLATE_BYTECODE_CACHE_DIR)
+    return APP_DIR.parent / ".cache" / "jinja"
+
+
+template_registry = TemplateRegistry(_default_bytecode_dir())
+
+
+def get_environment(templates_dir: Path, **options: Any) -> Environment:
+    return template_registry.get_environment(templates_dir, **options)
+
+
+def warm_up_templates() -> None:
+    try:
+        count = template_registry.warm_up()
+        logger.info(f"Templates precompilados: {count} ({template_registry.stats()})")
+    except Exception as e:
+        # El warm-up nunca debe impedir que la app arranque
+        logger.warning(f"No se pudieron precompilar las plantillas: {e}")
@@ -0,0 +1,221 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+from generator_app.app.core.config import settings
+from generator_app.app.core.logging_config import logger
+from generator_app.app.core.generator.output_sink import OutputSink
+from generator_app.app.core.tracing import replay, traced_call
+
+
+class PoolSaturated(Exception):
+    """Raised when the pool already has as many jobs as it can run plus queue."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Generation pool saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class GenerationTimeout(Exception):
+    """Raised when a generation job runs past its deadline."""
+
+
+def check_deadline(deadline: float | None) -> None:
+    """Cooperative timeout check, usable from worker threads and processes."""
+    if deadline is not None and time.time() > deadline:
+        raise GenerationTimeout("Generation exceeded its time limit")
+
+
+class DeadlineSink(OutputSink):
+    """Wraps another sink and aborts the generation once ``deadline`` has passed."""
+
+    def __init__(self, inner: OutputSink, deadline: float | None):
+        self.inner = inner
+        self.deadline = deadline
+
+    def write_text(self, path: str, content: str) -> None:
+        check_deadline(self.deadline)
+        self.inner.write_text(path, content)
+
+    def ensure_dirs(self, *dirs: str) -> None:
+        self.inner.ensure_dirs(*dirs)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class GenerationPool:
+    """
+    Bounded executor for CPU-bound generation work.
+
+    Keeps the event loop free while projects are rendered, caps how many
+    generations run at once and rejects new work once the queue is full.
+    """
+
+    def __init__(self, kind: str, max_workers: int, max_queue: int, timeout: float):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Tipo de executor no soportado: {kind}")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._avg_job_seconds = 1.0
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "timeouts": 0}
+
+    @property
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="generator",
+                    )
+            return self._executor
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def deadline(self) -> float:
+        return time.time() + self.timeout
+
+    def retry_after(self) -> int:
+        """Rough estimate of how long until a slot frees up."""
+        with self._lock:
+            waves = max(1, self._pending - self.max_workers + 1) / self.max_workers
+            return max(1, min(60, math.ceil(self._avg_job_seconds * waves)))
+
+    def begin(self, enforce_limit: bool = True) -> float:
+        """
+        Registers one job in the pool and returns its start time. With
+        ``enforce_limit`` the job is rejected with PoolSaturated when the
+        pool is full. Every successful ``begin`` must be paired with ``end``.
+        """
+        with self._lock:
+            if not enforce_limit or self._pending < self.capacity:
+                self._pending += 1
+                self._stats["submitted"] += 1
+                return time.perf_counter()
+            self._stats["rejected"] += 1
+        raise PoolSaturated(self.retry_after())
+
+    def end(self, started: float, error: BaseException | None = None) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._pending -= 1
+            if error is None:
+                self._stats["completed"] += 1
+                self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * elapsed
+            elif isinstance(error, GenerationTimeout):
+                self._stats["timeouts"] += 1
+            else:
+                self._stats["failed"] += 1
+
+    def reserve(self) -> "PoolSlot":
+        """
+        Takes a slot now for work that starts later (e.g. once a streaming
+        response is iterated), so the capacity check and the registration
+        cannot be raced by other requests. Raises PoolSaturated when full.
+        """
+        return PoolSlot(self, self.begin())
+
+    @contextmanager
+    def slot(self, enforce_limit: bool = True):
+        started = self.begin(enforce_limit)
+        try:
+            yield
+        except BaseException as e:
+            self.end(started, e)
+            raise
+        self.end(started)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, enforce_limit: bool = True) -> Any:
+        """Runs ``fn(*args)`` on the pool, enforcing queue depth and timeout."""
+        with self.slot(enforce_limit):
+            return await self.execute(fn, *args)
+
+    async def execute(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Like ``run`` for work that already holds a slot (see ``reserve``)."""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, traced_call, fn, *args)
+        try:
+            # Margen para que el propio job detecte el deadline y termine limpio
+            result, spans = await asyncio.wait_for(future, self.timeout + 5)
+        except asyncio.TimeoutError:
+            raise GenerationTimeout("Generation exceeded its time limit")
+        # Las trazas del worker (otro hilo u otro proceso) se registran aquí
+        replay(spans)
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "pending": self._pending,
+                "avg_job_seconds": round(self._avg_job_seconds, 3),
+            }
+
+
+class PoolSlot:
+    """A slot taken with ``GenerationPool.reserve``; ``release`` may be called more than once."""
+
+    def __init__(self, pool: GenerationPool, started: float):
+        self.pool = pool
+        self.started = started
+        self.released = False
+
+    def release(self, error: BaseException | None = None) -> None:
+        if not self.released:
+            self.released = True
+            self.pool.end(self.started, error)
+
+
+_generation_pool: GenerationPool | None = None
+_generation_pool_lock = threading.Lock()
+
+
+def get_generation_pool() -> GenerationPool:
+    global _generation_pool
+
+    with _generation_pool_lock:
+        if _generation_pool is None:
+            max_workers = settings.GENERATION_MAX_WORKERS or min(4, os.cpu_count() or 1)
+            _generation_pool = GenerationPool(
+                kind=settings.GENERATION_EXECUTOR,
+                max_workers=max_workers,
+                max_queue=settings.GENERATION_MAX_QUEUE,
+                timeout=settings.GENERATION_TIMEOUT_SECONDS,
+            )
+            logger.info(f"Pool de generación: {_generation_pool.stats()}")
+        return _generation_pool
+
+
+def shutdown_generation_pool() -> None:
+    global _generation_pool
+
+    with _generation_pool_lock:
+        pool, _generation_pool = _generation_pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -0,0 +1,92 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+from passlib.context import CryptContext
+
+from generator_app.app.core.tracing import span
+
+
+class HashingBusy(Exception):
+    """Raised when too many password hashes are already running or queued."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Password hashing is saturated")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool, never on the event loop.
+
+    bcrypt releases the GIL, so threads hash in parallel. At most
+    ``max_pending`` hashes may be running or waiting; callers that cannot
+    get a slot within ``queue_timeout`` get HashingBusy, so a login storm
+    is rejected instead of starving generation and AI traffic.
+    """
+
+    def __init__(self, context: CryptContext, workers: int, max_pending: int, queue_timeout: float):
+        self.context = context
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._stats = {"hashes": 0, "verifications": 0, "rehashes": 0, "rejected": 0}
+        self._pending = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, name: str, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        # El span incluye la espera en cola: es lo que nota el usuario
+        with span(name) as s:
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._stats["rejected"] += 1
+                s.add(rejected=1)
+                raise HashingBusy()
+
+            self._pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+            finally:
+                self._pending -= 1
+                self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        self._stats["hashes"] += 1
+        return await self._run("auth.password_hash", self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, str | None]:
+        """
+        (valid, new_hash). ``new_hash`` is set when the stored hash uses an
+        outdated scheme or cost factor and should be replaced.
+        """
+        self._stats["verifications"] += 1
+        valid, new_hash = await self._run(
+            "auth.password_verify", self.context.verify_and_update, password, hashed
+        )
+        if valid and new_hash:
+            self._stats["rehashes"] += 1
+        return valid, new_hash
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+        }
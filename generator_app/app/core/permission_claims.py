@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import select
+
+from generator_app.app.core.config import settings
+from generator_app.app.core.database import AsyncSessionLocal
+from generator_app.app.models.permission import Permission
+from generator_app.app.models.role_permission import role_permissions
+
+
+def permission_version(codes: Iterable[str]) -> str:
+    """Short content hash of a role's permission codes; changes whenever the set changes."""
+    return hashlib.sha256("\n".join(sorted(set(codes))).encode("utf-8")).hexdigest()[:16]
+
+
+def role_claims(role: Any) -> Dict[str, Any]:
+    """JWT claims for a role: id, permission codes and their version."""
+    if role is None:
+        return {}
+    codes = sorted({p.code for p in role.permissions})
+    return {"rid": str(role.id), "perms": codes, "pv": permission_version(codes)}
+
+
+class PermissionVersions:
+    """
+    In-process table role id -> current permission version.
+
+    Loaded with one query over role_permissions and refreshed every
+    AUTH_PERMISSION_VERSION_TTL_SECONDS, or on the next lookup after a
+    local write invalidated it. Tokens whose ``rid`` is still the user's
+    role (as resolved through the principal cache) and whose ``pv``
+    matches are authorized from their own claims; any mismatch falls
+    back to the user's loaded permissions.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._versions: Dict[str, str] = {}
+        self._loaded_at: float | None = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._refresh_lock: asyncio.Lock | None = None
+        self._stats = {"refreshes": 0, "claims_authorized": 0, "fallbacks": 0}
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    async def refresh(self) -> None:
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+
+        async with self._refresh_lock:
+            # Otra petición pudo refrescar mientras esperábamos
+            if not self.needs_refresh():
+                return
+
+            with self._lock:
+                generation = self._generation
+
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(role_permissions.c.role_id, Permission.code)
+                    .join(Permission, Permission.id == role_permissions.c.permission_id)
+                )).all()
+
+            codes: Dict[str, List[str]] = {}
+            for role_id, code in rows:
+                codes.setdefault(str(role_id), []).append(code)
+
+            with self._lock:
+                self._versions = {rid: permission_version(c) for rid, c in codes.items()}
+                # Si hubo una escritura durante la consulta, volver a cargar en la próxima
+                self._loaded_at = time.monotonic() if generation == self._generation else None
+                self._stats["refreshes"] += 1
+
+    def _current_locked(self, role_id: str) -> str:
+        # Un rol sin filas en role_permissions no tiene permisos
+        return self._versions.get(role_id) or permission_version(())
+
+    def current(self, role_id: str) -> str:
+        with self._lock:
+            return self._current_locked(role_id)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+            self._generation += 1
+
+    def authorize(self, claims: Dict[str, Any], permission_code: str, current_role_id: Any) -> bool | None:
+        """
+        True/False when the token claims are current, None when they are
+        missing or outdated and the caller must check the user's actual
+        permissions. ``current_role_id`` is the user's role right now, so
+        a reassigned user's old token is not trusted. The caller
+        refreshes the table first when ``needs_refresh()``.
+        """
+        role_id = claims.get("rid")
+        if not settings.AUTH_PERMISSION_CLAIMS or role_id is None or "pv" not in claims:
+            return None
+
+        with self._lock:
+            # El usuario debe seguir en el rol del token
+            current = (
+                current_role_id is not None
+                and str(current_role_id) == role_id
+                and claims["pv"] == self._current_locked(role_id)
+            )
+            self._stats["claims_authorized" if current else "fallbacks"] += 1
+
+        if not current:
+            return None
+        return permission_code in claims.get("perms", ())
+
+    def needs_refresh(self) -> bool:
+        with self._lock:
+            return self._stale()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "roles": len(self._versions)}
+
+
+permission_versions = PermissionVersions(settings.AUTH_PERMISSION_VERSION_TTL_SECONDS)
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Tuple
+
+from generator_app.app.core.config import settings
+
+
+class Principal:
+    """
+    Authenticated user with its role and permission codes.
+
+    ``user`` (and ``user.role``) are detached from any session and shared
+    between requests: read-only.
+    """
+
+    __slots__ = ("user", "role_id", "permissions")
+
+    def __init__(self, user: Any, permissions: FrozenSet[str]):
+        self.user = user
+        self.role_id = user.role_id
+        self.permissions = permissions
+
+
+class PrincipalCache:
+    """
+    Short-TTL LRU of principals keyed by token subject, so authenticated
+    requests skip the user, role and permission queries. Writes that
+    change users, roles or permissions invalidate the affected entries.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._version = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, subject: str) -> Principal | None:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(subject)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def version(self) -> int:
+        with self._lock:
+            return self._version
+
+    def set(self, subject: str, principal: Principal, version: int) -> None:
+        with self._lock:
+            # Una invalidación durante la carga deja este resultado obsoleto
+            if version != self._version:
+                return
+            self._entries[subject] = (time.monotonic(), principal)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _drop_locked(self, match) -> None:
+        for subject in [s for s, (_, p) in self._entries.items() if match(p)]:
+            del self._entries[subject]
+        self._version += 1
+        self._stats["invalidations"] += 1
+
+    def invalidate_user(self, user_id: Any) -> None:
+        with self._lock:
+            self._drop_locked(lambda p: str(p.user.id) == str(user_id))
+
+    def invalidate_role(self, role_id: Any) -> None:
+        with self._lock:
+            self._drop_locked(lambda p: p.role_id is not None and str(p.role_id) == str(role_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._drop_locked(lambda p: True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+
+principal_cache = PrincipalCache(settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS, settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES)
@@ -3,15 +3,33 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from generator_app.app.core.logging_config import logger
 from generator_app.app.core.config import settings
-from generator_app.app.core.database import get_db
+from generator_app.app.core.database import AsyncSessionLocal, get_async_db
+from generator_app.app.core.permission_claims import permission_versions
+from generator_app.app.core.password_hasher import PasswordHasher
+from generator_app.app.core.principal_cache import Principal, principal_cache
 from generator_app.app.models.user import User
+from generator_app.app.models.role import Role
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
+
+# Usar desde código async: hash y verificación en su propio pool de hilos
+password_hasher = PasswordHasher(
+    pwd_context,
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_MAX_PENDING,
+    settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS,
+)
 
 bearer_scheme = HTTPBearer()
 
@@ -30,44 +48,96 @@ def create_access_token(data: dict, expires_minutes: int = 60):
     return jwt.encode(to_encode, settings.JWT_SECRET, algorithm="HS256")
 
 
-def get_current_user( credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme), db: Session = Depends(get_db) ):
+async def load_principal(db: AsyncSession, user_id) -> Principal | None:
+    """User, role and permissions in one joined query, detached from ``db``."""
+    # Un solo viaje a la base de datos (selectinload haría tres)
+    result = await db.execute(
+        select(User)
+        .options(joinedload(User.role).joinedload(Role.permissions))
+        .where(User.id == user_id)
+    )
+    user = result.unique().scalar_one_or_none()
+    if not user:
+        return None
+
+    role = user.role
+    permissions = frozenset(p.code for p in role.permissions) if role else frozenset()
+
+    # Desligar de la sesión: un commit de la petición no debe expirar la copia cacheada
+    if role:
+        for perm in role.permissions:
+            db.expunge(perm)
+        db.expunge(role)
+    db.expunge(user)
+
+    return Principal(user, permissions)
+
+
+async def get_token_claims(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> dict:
     token = credentials.credentials
     logger.debug(f"Token recibido: {token}")
 
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
-        user_id = payload.get("sub")
+        return jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
     except JWTError as e:
         logger.warning(f"Token inválido: {e}")
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = db.query(User).filter(User.id == user_id).first()
 
-    if not user:
+async def get_current_principal(
+    claims: dict = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    return await resolve_principal(claims.get("sub"), db)
+
+
+async def resolve_principal(user_id, db: AsyncSession) -> Principal:
+    subject = str(user_id)
+    principal = principal_cache.get(subject)
+    if principal is not None:
+        return principal
+
+    version = principal_cache.version()
+    principal = await load_principal(db, user_id)
+
+    if principal is None:
         logger.warning(f"Usuario no encontrado para token: {user_id}")
         raise HTTPException(status_code=401, detail="User not found")
 
-    return user
+    principal_cache.set(subject, principal, version)
+    return principal
 
-from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
 
-def require_permission(permission_code: str):
-    async def dependency(
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db),
-    ):
-        role = current_user.role
+async def get_current_user(principal: Principal = Depends(get_current_principal)) -> User:
+    return principal.user
 
-        if not role:
+def require_permission(permission_code: str):
+    async def dependency(claims: dict = Depends(get_token_claims)):
+        # Sesión propia: con un principal en caché no se llega a abrir conexión
+        async with AsyncSessionLocal() as db:
+            principal = await resolve_principal(claims.get("sub"), db)
+
+        # Modo claims: el token basta mientras el usuario siga en el rol del
+        # token y la versión de permisos de ese rol esté al día
+        if settings.AUTH_PERMISSION_CLAIMS:
+            if permission_versions.needs_refresh():
+                await permission_versions.refresh()
+            allowed = permission_versions.authorize(claims, permission_code, principal.role_id)
+            if allowed is not None:
+                if not allowed:
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail=f"Missing permission: {permission_code}"
+                    )
+                return True
+
+        if principal.role_id is None:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="User has no role assigned"
             )
 
-        permission_codes = {p.code for p in role.permissions}
-
-        if permission_code not in permission_codes:
+        if permission_code not in principal.permissions:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Missing permission: {permission_code}"
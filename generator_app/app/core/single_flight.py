@@ -0,0 +1,242 @@
+import asyncio
+import weakref
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Hashable, Tuple
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SharedStream:
+    """
+    One async byte stream read by several clients.
+
+    A background task pumps ``source`` into a buffer and every subscriber
+    follows it from the first chunk. While no more than
+    ``max_buffer_bytes`` have been produced the whole stream is kept, so
+    clients that join late still get all of it (``joinable``). Past that
+    point nobody else may join, chunks every subscriber has read are
+    dropped and the pump waits for the slowest subscriber, so memory stays
+    around ``max_buffer_bytes``. The pump is cancelled once every
+    subscriber has gone; ``on_done`` runs when it ends for any reason,
+    even if it never got to start.
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterator[bytes],
+        max_buffer_bytes: int,
+        on_done: Callable[[BaseException | None], None] | None = None,
+    ):
+        self.max_buffer_bytes = max_buffer_bytes
+        self.chunks: Deque[bytes] = deque()
+        self.first = 0  # índice absoluto de chunks[0]
+        self.buffered_bytes = 0
+        self.total_bytes = 0
+        self.done = False
+        self.error: BaseException | None = None
+        self._positions: Dict[object, int] = {}  # token de suscripción -> siguiente índice
+        self._changed = asyncio.Event()
+        self._drained = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source))
+        if on_done is not None:
+            self.task.add_done_callback(lambda task: on_done(self._task_error(task)))
+
+    def _task_error(self, task: asyncio.Future) -> BaseException | None:
+        # El pump guarda el error de la fuente en vez de propagarlo
+        if task.cancelled():
+            return asyncio.CancelledError()
+        return task.exception() or self.error
+
+    @property
+    def end(self) -> int:
+        return self.first + len(self.chunks)
+
+    @property
+    def joinable(self) -> bool:
+        return self.first == 0 and self.total_bytes <= self.max_buffer_bytes
+
+    async def _pump(self, source: AsyncIterator[bytes]) -> None:
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self.buffered_bytes += len(chunk)
+                self.total_bytes += len(chunk)
+                self._changed = _notify(self._changed)
+                self._trim()
+                # Contrapresión: no adelantarse demasiado al suscriptor más lento
+                while self.buffered_bytes > self.max_buffer_bytes and self._positions:
+                    await self._drained.wait()
+        except BaseException as e:
+            self.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            self.done = True
+            self._changed = _notify(self._changed)
+            await source.aclose()
+
+    def _trim(self) -> None:
+        """Drops chunks nobody needs any more; while joinable everything is kept."""
+        if self.joinable:
+            return
+        keep_from = min(self._positions.values(), default=self.end)
+        while self.first < keep_from:
+            self.buffered_bytes -= len(self.chunks.popleft())
+            self.first += 1
+        if self.buffered_bytes <= self.max_buffer_bytes:
+            self._drained = _notify(self._drained)
+
+    def subscribe(self) -> AsyncIterator[bytes]:
+        """
+        Registers a reader right away (not on first iteration), so the
+        beginning of the stream is kept for it. Close it with ``aclose``.
+        """
+        if not self.joinable:
+            raise RuntimeError("Shared stream no longer accepts subscribers")
+        return _Subscription(self)
+
+    def _advanced(self, token: object, position: int) -> None:
+        self._positions[token] = position
+        self._trim()
+
+    def _unsubscribe(self, token: object) -> None:
+        if self._positions.pop(token, None) is None:
+            return
+        if not self._positions and not self.done:
+            self.task.cancel()
+        else:
+            self._trim()
+
+
+def _notify(event: asyncio.Event) -> asyncio.Event:
+    # Despertar a quien espera y empezar un evento nuevo para la siguiente espera
+    event.set()
+    return asyncio.Event()
+
+
+class _Subscription:
+    """Reader of a SharedStream; also released when garbage collected without being closed."""
+
+    def __init__(self, stream: SharedStream):
+        self._stream = stream
+        self._position = stream.first
+        self._closed = False
+        # El stream guarda un token, no la suscripción, para que esta pueda recogerse
+        self._token = object()
+        stream._positions[self._token] = self._position
+        self._release = weakref.finalize(self, stream._unsubscribe, self._token)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        stream = self._stream
+        while not self._closed:
+            if self._position < stream.end:
+                chunk = stream.chunks[self._position - stream.first]
+                self._position += 1
+                stream._advanced(self._token, self._position)
+                return chunk
+            if stream.done:
+                self._close()
+                if stream.error is not None:
+                    raise stream.error
+                break
+            await stream._changed.wait()
+        raise StopAsyncIteration
+
+    def _close(self) -> None:
+        self._closed = True
+        self._release()
+
+    async def aclose(self) -> None:
+        self._close()
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent work: while a call for ``key`` is in
+    flight, later callers attach to it and get the same result instead of
+    repeating the work. Keys are forgotten as soon as the work finishes,
+    so this is deduplication, not caching.
+
+    The work runs in its own task, so a caller that goes away does not
+    cancel it for the others; it is only cancelled when nobody waits for
+    it any more. Shared streams keep at most about ``max_buffer_bytes``
+    each (see SharedStream). Only for use from the event loop thread.
+    """
+
+    def __init__(self, name: str, max_buffer_bytes: int = 8 * 1024 * 1024):
+        self.name = name
+        self.max_buffer_bytes = max_buffer_bytes
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._streams: Dict[Hashable, SharedStream] = {}
+        self._stats = {"leaders": 0, "followers": 0}
+
+    def _forget(self, registry: Dict[Hashable, Any], key: Hashable, value: Any) -> None:
+        if registry.get(key) is value:
+            del registry[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Returns (result, shared); ``shared`` is True when the call joined one already in flight."""
+        flight = self._flights.get(key)
+        shared = flight is not None
+
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(self._flights, key, flight))
+            self._stats["leaders"] += 1
+        else:
+            self._stats["followers"] += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def joinable(self, key: Hashable) -> bool:
+        shared_stream = self._streams.get(key)
+        return key in self._flights or (shared_stream is not None and shared_stream.joinable)
+
+    def stream(
+        self,
+        key: Hashable,
+        factory: Callable[[], AsyncIterator[bytes]],
+        on_done: Callable[[BaseException | None], None] | None = None,
+    ) -> Tuple[AsyncIterator[bytes], bool]:
+        """
+        Stream flavour of ``do``: ``factory`` is only called when no
+        joinable stream for ``key`` is in flight, and ``on_done`` only
+        applies to a stream started by this call. Returns (chunks, shared);
+        callers must ``aclose`` the chunks when they stop reading.
+        """
+        shared_stream = self._streams.get(key)
+        shared = shared_stream is not None and shared_stream.joinable
+
+        if not shared:
+            shared_stream = SharedStream(factory(), self.max_buffer_bytes, on_done)
+            self._streams[key] = shared_stream
+            shared_stream.task.add_done_callback(lambda _: self._forget(self._streams, key, shared_stream))
+            self._stats["leaders"] += 1
+        else:
+            self._stats["followers"] += 1
+
+        return shared_stream.subscribe(), shared
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "in_flight": len(self._flights) + len(self._streams),
+        }
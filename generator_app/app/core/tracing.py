@@ -0,0 +1,170 @@
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from generator_app.app.core.config import settings
+
+
+# (nombre, segundos, atributos numéricos)
+SpanRecord = Tuple[str, float, Dict[str, float]]
+
+
+class Trace:
+    """
+    Spans recorded while serving one request (or running one pool job).
+
+    With ``record_metrics=False`` spans are only collected here, so a worker
+    can ship them back to the parent, which records them in its registry.
+    """
+
+    def __init__(self, record_metrics: bool = True):
+        self.record_metrics = record_metrics
+        self.spans: List[SpanRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: SpanRecord) -> None:
+        with self._lock:
+            self.spans.append(record)
+
+    def server_timing(self) -> str:
+        """Value for the Server-Timing header, durations summed per span name."""
+        with self._lock:
+            totals: Dict[str, float] = {}
+            for name, seconds, _ in self.spans:
+                totals[name] = totals.get(name, 0.0) + seconds
+        return ", ".join(f"{name.replace('.', '_')};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+_current_trace: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("current_trace", default=None)
+
+
+class SpanMetrics:
+    """Process-wide aggregates of every recorded span, in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count: Dict[str, int] = {}
+        self._seconds: Dict[str, float] = {}
+        self._attrs: Dict[Tuple[str, str], float] = {}
+
+    def observe(self, record: SpanRecord) -> None:
+        name, seconds, attrs = record
+        with self._lock:
+            self._count[name] = self._count.get(name, 0) + 1
+            self._seconds[name] = self._seconds.get(name, 0.0) + seconds
+            for attr, value in attrs.items():
+                self._attrs[(name, attr)] = self._attrs.get((name, attr), 0) + value
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP generator_span_seconds Time spent in each generation stage.",
+                "# TYPE generator_span_seconds summary",
+            ]
+            for name in sorted(self._count):
+                lines.append(f'generator_span_seconds_sum{{span="{name}"}} {self._seconds[name]:.6f}')
+                lines.append(f'generator_span_seconds_count{{span="{name}"}} {self._count[name]}')
+
+            for attr in sorted({a for _, a in self._attrs}):
+                metric = f"generator_span_{attr}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (name, a), value in sorted(self._attrs.items()):
+                    if a == attr:
+                        lines.append(f'{metric}{{span="{name}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+
+span_metrics = SpanMetrics()
+
+
+def record(record: SpanRecord) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(record)
+    if trace is None or trace.record_metrics:
+        span_metrics.observe(record)
+
+
+class Span:
+    """Times a block of code; numeric attributes can be added while it runs."""
+
+    __slots__ = ("name", "attrs", "_started")
+
+    def __init__(self, name: str, attrs: Dict[str, float]):
+        self.name = name
+        self.attrs = attrs
+        self._started = 0.0
+
+    def set(self, **attrs: float) -> None:
+        self.attrs.update(attrs)
+
+    def add(self, **attrs: float) -> None:
+        for key, value in attrs.items():
+            self.attrs[key] = self.attrs.get(key, 0) + value
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record((self.name, time.perf_counter() - self._started, self.attrs))
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs: float) -> None:
+        pass
+
+    def add(self, **attrs: float) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def tracing_enabled() -> bool:
+    return settings.TRACING_ENABLED
+
+
+def span(name: str, **attrs: float):
+    """``with span("generator.render", models=10) as s: ...``; no-op when tracing is disabled."""
+    if not settings.TRACING_ENABLED:
+        return _NOOP_SPAN
+    return Span(name, attrs)
+
+
+def start_trace(record_metrics: bool = True) -> Tuple[Trace, contextvars.Token]:
+    trace = Trace(record_metrics)
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token: contextvars.Token) -> None:
+    _current_trace.reset(token)
+
+
+def traced_call(fn: Callable[..., Any], *args: Any) -> Tuple[Any, List[SpanRecord]]:
+    """
+    Runs ``fn(*args)`` collecting its spans and returns (result, spans).
+    Used for pool jobs, whose spans are replayed in the calling process.
+    """
+    if not settings.TRACING_ENABLED:
+        return fn(*args), []
+
+    trace, token = start_trace(record_metrics=False)
+    try:
+        return fn(*args), trace.spans
+    finally:
+        end_trace(token)
+
+
+def replay(spans: List[SpanRecord]) -> None:
+    for s in spans:
+        record(s)
@@ -1,5 +1,8 @@
+import hmac
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from generator_app.app.core.logging_config import logger
 from generator_app.app.api.v1.endpoints.generate import router as generate_router
@@ -9,10 +12,35 @@ from generator_app.app.api.v1.endpoints.ai import router as ai_router
 from generator_app.app.api.v1.endpoints.ai_models import router as ai_models_router
 from generator_app.app.api.v1.endpoints.permissions import router as permissions_router
 from generator_app.app.api.v1.endpoints.role import router as roles_router
-from generator_app.app.core.database import Base, engine
+from generator_app.app.core.database import Base, dispose_async_engine, engine
+from generator_app.app.core.db_pool import db_pools
+from generator_app.app.core.config import settings
+from generator_app.app.core.ai_client_registry import ai_client_registry
+from generator_app.app.core.generator.template_registry import warm_up_templates
+from generator_app.app.core.generator.job_queue import shutdown_job_queue, start_job_queue
+from generator_app.app.core.generator.worker_pool import GenerationTimeout, PoolSaturated, shutdown_generation_pool
+from generator_app.app.core.password_hasher import HashingBusy
+from generator_app.app.core.security import password_hasher
+from generator_app.app.core.tracing import end_trace, span_metrics, start_trace, tracing_enabled
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Precompilar plantillas para que la primera generación no pague la compilación
+    if settings.TEMPLATE_WARMUP_ON_STARTUP:
+        warm_up_templates()
+    # El Manager de progreso arranca aquí y no dentro de la primera petición
+    start_job_queue()
+    yield
+    shutdown_job_queue()
+    shutdown_generation_pool()
+    password_hasher.shutdown()
+    await ai_client_registry.aclose()
+    await dispose_async_engine()
+
 
 def create_app():
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
 
     # Configurar CORS
     origins = [
@@ -32,6 +60,58 @@ def create_app():
     # Crear tablas si no existen
     Base.metadata.create_all(bind=engine)
 
+    # Pool de generación saturado o job demasiado largo
+    @app.exception_handler(PoolSaturated)
+    async def pool_saturated_handler(request: Request, exc: PoolSaturated):
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Generation service is busy, try again later"},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    # Demasiados logins/registros a la vez: rechazar antes que bloquear el resto
+    @app.exception_handler(HashingBusy)
+    async def hashing_busy_handler(request: Request, exc: HashingBusy):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Authentication service is busy, try again later"},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    @app.exception_handler(GenerationTimeout)
+    async def generation_timeout_handler(request: Request, exc: GenerationTimeout):
+        return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+    # Trazas por petición: tiempos por etapa en la cabecera Server-Timing.
+    # En respuestas en streaming solo incluye lo ocurrido antes del primer byte.
+    @app.middleware("http")
+    async def server_timing(request: Request, call_next):
+        if not tracing_enabled():
+            return await call_next(request)
+
+        trace, token = start_trace()
+        try:
+            response = await call_next(request)
+        finally:
+            end_trace(token)
+
+        timing = trace.server_timing()
+        if timing:
+            response.headers["Server-Timing"] = timing
+        return response
+
+    if settings.METRICS_ENABLED:
+        @app.get("/metrics", include_in_schema=False)
+        async def metrics(request: Request):
+            if settings.METRICS_TOKEN:
+                expected = f"Bearer {settings.METRICS_TOKEN}".encode("utf-8")
+                received = request.headers.get("Authorization", "").encode("utf-8")
+                if not hmac.compare_digest(received, expected):
+                    return PlainTextResponse("Unauthorized", status_code=401)
+            return PlainTextResponse(
+                span_metrics.render() + db_pools.render(), media_type="text/plain; version=0.0.4"
+            )
+
     # Registrar middleware de excepciones
     @app.middleware("http")
     async def log_exceptions(request: Request, call_next):
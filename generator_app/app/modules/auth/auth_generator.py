@@ -1,14 +1,17 @@
-from pathlib import Path
+from pathlib import PurePosixPath
+from jinja2 import TemplateNotFound
 from generator_app.app.core.generator.interfaces import BaseModuleGenerator
 
 class AuthGenerator(BaseModuleGenerator):
 
     def generate(self):
-        auth_dir = self.output_dir / "app" / "auth"
-        (auth_dir / "models").mkdir(parents=True, exist_ok=True)
-        (auth_dir / "schemas").mkdir(parents=True, exist_ok=True)
-        (auth_dir / "routers").mkdir(parents=True, exist_ok=True)
-        (auth_dir / "security").mkdir(parents=True, exist_ok=True)
+        auth_dir = PurePosixPath("app/auth")
+        self.sink.ensure_dirs(
+            "app/auth/models",
+            "app/auth/schemas",
+            "app/auth/routers",
+            "app/auth/security",
+        )
 
         # -------------------------
         # MODELS
@@ -45,10 +48,10 @@ class AuthGenerator(BaseModuleGenerator):
         self._render("security/security.jinja2", auth_dir / "security" / "security.py")
 
         # utils opcional
-        utils_template = "security/utils.jinja2"
-        if (self.env.loader.searchpath and 
-            (Path(self.env.loader.searchpath[0]) / utils_template).exists()):
-            self._render(utils_template, auth_dir / "security" / "utils.py")
+        try:
+            self._render("security/utils.jinja2", auth_dir / "security" / "utils.py")
+        except TemplateNotFound:
+            pass
 
         # -------------------------
         # ROUTERS
@@ -77,10 +80,10 @@ class AuthGenerator(BaseModuleGenerator):
 
     def _render(self, template_name, output_path):
         template = self.env.get_template(template_name)
-        output_path.write_text(
+        self.sink.write_text(
+            output_path.as_posix(),
             template.render(
                 auth=self.module_config,
                 project=self.project_def
-            ),
-            encoding="utf-8"
+            )
         )
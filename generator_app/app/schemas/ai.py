@@ -1,8 +1,10 @@
 from pydantic import BaseModel
-from typing import Any
+from typing import Any, List
 
 class AIGenerateRequest(BaseModel):
     prompt: str
+    use_cache: bool = True
 
 class AIGenerateResponse(BaseModel):
     definition_json: Any
+    repairs: List[str] = []
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class GenerationJobRead(BaseModel):
+    id: str
+    status: str
+    models_rendered: int
+    models_total: int
+    filename: str
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
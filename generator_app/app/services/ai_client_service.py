@@ -1,115 +1,258 @@
 import asyncio
 import logging
-from typing import List, Dict, Any
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List
 
 from fastapi.params import Depends
-from sqlalchemy.orm import Session
-from openai import OpenAI
+from sqlalchemy.ext.asyncio import AsyncSession
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
 
-from generator_app.app.core.database import get_db
+from generator_app.app.core.database import get_async_db
 from generator_app.app.models.ai_model import AIModel
-from generator_app.app.services.ai_model_service import AIModelService
+from generator_app.app.services.ai_model_service import AIModelService, active_ai_models
+from generator_app.app.core.ai_client_registry import ProviderBusy, ai_client_registry, ai_provider_limiter, resolve_provider
+from generator_app.app.core.ai_health import CircuitOpen, ai_health
+from generator_app.app.core.ai_response_cache import get_ai_response_cache, response_key
+from generator_app.app.core.ai_fallback import (
+    FALLBACK_STRATEGIES,
+    InvalidAIResponse,
+    hedge_delay,
+    latency_tracker,
+    provider_timeout,
+    run_hedged,
+    run_race,
+    run_sequential,
+)
 from generator_app.app.core.config import settings
+from generator_app.app.core.single_flight import SingleFlight
+from generator_app.app.core.tracing import span
+from generator_app.app.workers import extract_ai_delta
 
 logger = logging.getLogger("fastapi_app")
 
+# Llamadas idénticas en curso: una sola va al proveedor
+ai_flights = SingleFlight("ai")
+
 
 class AIClientService:
     """Service responsible for building clients from AIModel entries and performing calls with fallback."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def _build_client_for(self, ai_model: AIModel) -> OpenAI:
-        provider = (ai_model.provider or settings.AI_PROVIDER).lower()
+    def _client_for(self, ai_model: AIModel) -> AsyncOpenAI:
+        # Cliente compartido por proceso: reutiliza conexiones keep-alive con el proveedor
+        return ai_client_registry.get(ai_model)
 
-        # Base URLs por proveedor
-        provider_urls = {
-            "groq": "https://api.groq.com/openai/v1",
-            "deepseek": "https://api.deepseek.com",
-            "together": "https://api.together.xyz/v1",
-            "mistral": "https://api.mistral.ai/v1",
-            "openrouter": "https://openrouter.ai/api/v1",
-            "openai": None,  # usa el default del SDK
-        }
+    async def get_active_models(self) -> List[AIModel]:
+        return await AIModelService.list_active(self.db)
 
-        base_url = provider_urls.get(provider)
-        api_key = ai_model.api_key or getattr(settings, f"{provider.upper()}_API_KEY", None)
+    async def call_with_fallback(
+        self,
+        payload: Dict[str, Any],
+        validate: Callable[[Any], bool] | None = None,
+        strategy: str | None = None,
+        use_cache: bool = True,
+    ) -> Any:
+        """
+        Calls the active AI models until one answers. ``validate`` rejects
+        answers that are not usable (they count as a failure and the next
+        model is tried). ``strategy`` defaults to AI_FALLBACK_STRATEGY:
+        sequential, hedged or race.
 
-        if not api_key:
-            raise RuntimeError(f"No API key configured for provider: {provider}")
+        Validated answers are cached by prompt; ``use_cache=False`` skips
+        the lookup but still stores the fresh answer.
+        """
+        strategy = strategy or settings.AI_FALLBACK_STRATEGY
+        if strategy not in FALLBACK_STRATEGIES:
+            raise ValueError(f"Estrategia de fallback no soportada: {strategy}")
 
-        # Headers obligatorios para OpenRouter
-        default_headers = {}
-        if provider == "openrouter":
-            default_headers = {
-                "HTTP-Referer": settings.APP_URL or "http://localhost:8001",
-                "X-Title": settings.APP_NAME or "FastGenerator",
-            }
+        cache = get_ai_response_cache()
+        key = response_key(payload)
 
-        client = OpenAI(
-            api_key=api_key,
-            base_url=base_url,
-            default_headers=default_headers
-        )
+        if cache is not None:
+            with span("ai.response_cache") as s:
+                if not use_cache:
+                    cache.bypassed()
+                    s.add(bypassed=1)
+                else:
+                    cached = await asyncio.to_thread(cache.get, key)
+                    if cached is not None:
+                        s.add(hits=1)
+                        logger.info("IA: respuesta servida desde la caché")
+                        return ChatCompletion.model_validate_json(cached)
+                    s.add(misses=1)
 
-        # Wrapper async para clientes sync
-        if hasattr(client, "chat") and not hasattr(client.chat, "completions_async"):
-            class AsyncWrapper:
-                def __init__(self, sync_client):
-                    self._sync = sync_client
+        async def call() -> Any:
+            with span("ai.call_with_fallback") as s:
+                resp = await self._call_with_fallback(payload, validate, strategy, s)
+            if cache is not None and isinstance(resp, ChatCompletion):
+                await asyncio.to_thread(cache.set, key, resp.model_dump_json())
+            return resp
 
-                async def chat_completions_create(self, *args, **kwargs):
-                    from fastapi.concurrency import run_in_threadpool
-                    return await run_in_threadpool(
-                        lambda: self._sync.chat.completions.create(*args, **kwargs)
-                    )
+        # Mismo prompt ya en curso (otro usuario u otra pestaña): esperar su respuesta
+        resp, shared = await ai_flights.do((key, strategy, validate), call)
+        if shared:
+            logger.info("IA: respuesta compartida con una llamada idéntica en curso")
+            with span("ai.single_flight") as s:
+                s.add(shared=1)
+        return resp
 
-            client.async_chat_completions_create = AsyncWrapper(client).chat_completions_create
+    async def _candidates(self) -> List[AIModel]:
+        # Instantánea en memoria; solo si caducó se consulta la BD
+        models = active_ai_models.get()
+        if models is None:
+            with span("ai.load_models"):
+                models = await self.get_active_models()
 
-        return client
+        # Cerrar clientes de modelos ya modificados o borrados
+        await ai_client_registry.close_retired()
 
-    def get_active_models(self) -> List[AIModel]:
-        return AIModelService.list(self.db)
+        # Sin proveedores con el breaker abierto y los más sanos primero
+        candidates = ai_health.order(models)
+        if models and not candidates:
+            raise CircuitOpen("All AI providers are temporarily unavailable")
+        return candidates
 
-    async def call_with_fallback(self, payload: Dict[str, Any]) -> Any:
-        from fastapi.concurrency import run_in_threadpool
+    async def _call_with_fallback(self, payload, validate, strategy, call_span) -> Any:
+        candidates = await self._candidates()
 
-        models = await run_in_threadpool(
-            lambda: [m for m in self.get_active_models() if m.is_active]
-        )
+        async def attempt(ai_model: AIModel) -> Any:
+            if not ai_health.try_acquire(ai_model):
+                raise CircuitOpen(f"Circuit open for {ai_model.name}")
 
-        last_exc = None
+            call_span.add(attempts=1)
+            started = time.perf_counter()
+            try:
+                resp = await self._attempt(ai_model, payload, validate)
+            except ProviderBusy:
+                # Saturación local, no es culpa del proveedor
+                ai_health.record_cancelled(ai_model)
+                call_span.add(failures=1)
+                raise
+            except Exception as e:
+                logger.error(f"IA: Error con modelo {ai_model.name} ({ai_model.provider}): {repr(e)}")
+                ai_health.record_failure(ai_model, e)
+                call_span.add(failures=1)
+                raise
+            except asyncio.CancelledError:
+                ai_health.record_cancelled(ai_model)
+                raise
 
-        for ai_model in models:
-            client = self._build_client_for(ai_model)
+            ai_health.record_success(ai_model, time.perf_counter() - started)
+            return resp
 
-            if ai_model.model_name:
-                payload["model"] = ai_model.model_name
+        if strategy == "race":
+            return await run_race(candidates, attempt)
+        if strategy == "hedged":
+            return await run_hedged(
+                candidates,
+                attempt,
+                lambda m: hedge_delay(m.id, provider_timeout(resolve_provider(m)[0])),
+            )
+        return await run_sequential(candidates, attempt)
 
-            try:
-                logger.info(f"IA: intentando proveedor {ai_model.provider} con modelo {payload.get('model')}")
+    async def stream_with_fallback(self, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Streams the text of the first active AI model that starts answering.
 
-                if hasattr(client, "async_chat_completions_create"):
-                    resp = await client.async_chat_completions_create(**payload)
-                    logger.info(f"{resp.json()}")
-                else:
-                    resp = await run_in_threadpool(
-                        lambda: client.chat.completions.create(**payload)
-                    )
+        Models are tried in health order until one sends its first token.
+        From then on the stream is committed to that model: text already
+        sent to the client cannot be taken back, so a later error is raised.
+        """
+        candidates = await self._candidates()
+        errors: List[BaseException] = []
 
-                return resp
+        for ai_model in candidates:
+            if not ai_health.try_acquire(ai_model):
+                continue
 
+            committed = False
+            started = time.perf_counter()
+            try:
+                with span("ai.stream_attempt"):
+                    async for text in self._stream_attempt(ai_model, payload):
+                        committed = True
+                        yield text
+            except ProviderBusy as e:
+                ai_health.record_cancelled(ai_model)
+                errors.append(e)
+                continue
             except Exception as e:
-                logger.error(f"IA: Error con modelo {ai_model.name} ({ai_model.provider}): {repr(e)}")
-                last_exc = e
+                logger.error(f"IA: Error en streaming con modelo {ai_model.name} ({ai_model.provider}): {repr(e)}")
+                ai_health.record_failure(ai_model, e)
+                if committed:
+                    raise
+                errors.append(e)
                 continue
+            except (asyncio.CancelledError, GeneratorExit):
+                # El cliente cortó la conexión
+                ai_health.record_cancelled(ai_model)
+                raise
 
-        if last_exc:
-            raise last_exc
+            ai_health.record_success(ai_model, time.perf_counter() - started)
+            return
 
+        if errors:
+            raise errors[-1]
         raise RuntimeError("No AI models configured in DB")
 
+    async def _stream_attempt(self, ai_model: AIModel, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        client = self._client_for(ai_model)
+        provider = resolve_provider(ai_model)[0]
+        timeout = provider_timeout(provider)
+
+        request = dict(payload, stream=True)
+        if ai_model.model_name:
+            request["model"] = ai_model.model_name
+
+        logger.info(f"IA: streaming con proveedor {ai_model.provider} y modelo {request.get('model')}")
+
+        # El slot del proveedor se mantiene mientras dura el stream
+        async with ai_provider_limiter.slot(provider):
+            stream = await asyncio.wait_for(client.chat.completions.create(**request), timeout)
+            try:
+                chunks = stream.__aiter__()
+                while True:
+                    # El timeout se aplica a cada hueco entre chunks, no al total
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                    except StopAsyncIteration:
+                        break
+                    text = extract_ai_delta(chunk)
+                    if text:
+                        yield text
+            finally:
+                await stream.close()
+
+    async def _attempt(self, ai_model: AIModel, payload: Dict[str, Any], validate) -> Any:
+        client = self._client_for(ai_model)
+        provider = resolve_provider(ai_model)[0]
+
+        # Copia por intento: con hedged/race hay varios intentos a la vez
+        request = dict(payload)
+        if ai_model.model_name:
+            request["model"] = ai_model.model_name
+
+        logger.info(f"IA: intentando proveedor {ai_model.provider} con modelo {request.get('model')}")
+        started = time.perf_counter()
+
+        # Límite de llamadas simultáneas por proveedor; si está lleno se pasa al siguiente
+        async with ai_provider_limiter.slot(provider):
+            with span("ai.provider_call"):
+                resp = await asyncio.wait_for(
+                    client.chat.completions.create(**request),
+                    provider_timeout(provider),
+                )
+        logger.info(f"{resp.model_dump_json()}")
+
+        if validate is not None and not validate(resp):
+            raise InvalidAIResponse(f"Respuesta no válida de {ai_model.name}")
+
+        latency_tracker.observe(ai_model.id, time.perf_counter() - started)
+        return resp
+
 # helper dependency provider
-def get_ai_client_service(db: Session = Depends(get_db)):
+def get_ai_client_service(db: AsyncSession = Depends(get_async_db)):
     return AIClientService(db)
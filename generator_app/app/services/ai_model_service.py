@@ -1,16 +1,63 @@
-from sqlalchemy.orm import Session
-from typing import List
+import threading
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Tuple
 from uuid import UUID
 
+from generator_app.app.core.ai_client_registry import ai_client_registry
+from generator_app.app.core.ai_health import ai_health
+from generator_app.app.core.config import settings
 from generator_app.app.models.ai_model import AIModel
 from generator_app.app.schemas.ai_model import AIModelCreate, AIModelUpdate
 
 
+class ActiveAIModelCache:
+    """
+    Snapshot of the active AIModels in fallback order, shared by every
+    request. Writes through AIModelService invalidate it at once; the TTL
+    only covers writes made by other worker processes.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._models: List[AIModel] | None = None
+        self._loaded_at = 0.0
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def get(self) -> List[AIModel] | None:
+        with self._lock:
+            if self._models is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+                return None
+            return self._models
+
+    def version(self) -> int:
+        with self._lock:
+            return self._version
+
+    def set(self, models: List[AIModel], version: int) -> None:
+        with self._lock:
+            # Una escritura durante la consulta deja este resultado obsoleto
+            if version != self._version:
+                return
+            self._models = models
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._models = None
+            self._version += 1
+
+
+active_ai_models = ActiveAIModelCache(settings.AI_MODELS_CACHE_TTL_SECONDS)
+
+
 class AIModelService:
     """Service class to manage AIModel CRUD operations."""
 
     @staticmethod
-    def create(db: Session, payload: AIModelCreate) -> AIModel:
+    async def create(db: AsyncSession, payload: AIModelCreate) -> AIModel:
         model = AIModel(
             name=payload.name,
             provider=payload.provider,
@@ -19,65 +66,96 @@ class AIModelService:
             is_active=payload.is_active if payload.is_active is not None else True
         )
         db.add(model)
-        db.commit()
-        db.refresh(model)
+        await db.commit()
+        await db.refresh(model)
+        active_ai_models.invalidate()
         return model
 
     @staticmethod
-    def get(db: Session, model_id: UUID) -> AIModel | None:
-        return db.query(AIModel).filter(AIModel.id == model_id).first()
+    async def get(db: AsyncSession, model_id: UUID) -> AIModel | None:
+        return await db.get(AIModel, model_id)
+
+    @staticmethod
+    async def get_by_name(db: AsyncSession, name: str) -> AIModel | None:
+        return (await db.execute(select(AIModel).where(AIModel.name == name))).scalars().first()
 
     @staticmethod
-    def get_by_name(db: Session, name: str) -> AIModel | None:
-        return db.query(AIModel).filter(AIModel.name == name).first()
+    async def list(db: AsyncSession) -> List[AIModel]:
+        return (await db.execute(select(AIModel).order_by(AIModel.created_at.asc()))).scalars().all()
 
     @staticmethod
-    def list(db: Session) -> List[AIModel]:
-        return db.query(AIModel).order_by(AIModel.created_at.asc()).all()
+    async def list_active(db: AsyncSession) -> List[AIModel]:
+        """
+        Active models in fallback order, from the shared snapshot when it is
+        fresh. Returned rows are detached from ``db`` and must be treated as
+        read-only.
+        """
+        models = active_ai_models.get()
+        if models is not None:
+            return models
+
+        version = active_ai_models.version()
+        result = await db.execute(
+            select(AIModel)
+            .where(AIModel.is_active.is_(True))
+            .order_by(AIModel.created_at.asc())
+        )
+        models = list(result.scalars().all())
+        # Desligar de la sesión: la instantánea sobrevive a la petición
+        for model in models:
+            db.expunge(model)
+        active_ai_models.set(models, version)
+        return models
 
     @staticmethod
-    def update(db: Session, model_id: UUID, payload: AIModelUpdate) -> AIModel | None:
-        model = db.query(AIModel).filter(AIModel.id == model_id).first()
+    async def update(db: AsyncSession, model_id: UUID, payload: AIModelUpdate) -> AIModel | None:
+        model = await db.get(AIModel, model_id)
         if not model:
             return None
         for k, v in payload.dict(exclude_unset=True).items():
             setattr(model, k, v)
-        db.add(model)
-        db.commit()
-        db.refresh(model)
+        await db.commit()
+        await db.refresh(model)
+        # Proveedor o clave pueden haber cambiado: cliente y salud empiezan de cero
+        active_ai_models.invalidate()
+        ai_client_registry.invalidate(model.id)
+        ai_health.reset(model.id)
         return model
 
     @staticmethod
-    def delete(db: Session, model_id: UUID) -> bool:
-        model = db.query(AIModel).filter(AIModel.id == model_id).first()
+    async def delete(db: AsyncSession, model_id: UUID) -> bool:
+        model = await db.get(AIModel, model_id)
         if not model:
             return False
-        db.delete(model)
-        db.commit()
+        await db.delete(model)
+        await db.commit()
+        active_ai_models.invalidate()
+        ai_client_registry.invalidate(model_id)
+        ai_health.reset(model_id)
         return True
 
 
 # Backwards-compatible helper functions
 
-def create_ai_model(db: Session, payload: AIModelCreate) -> AIModel:
-    return AIModelService.create(db, payload)
+async def create_ai_model(db: AsyncSession, payload: AIModelCreate) -> AIModel:
+    return await AIModelService.create(db, payload)
 
 
-def get_ai_model(db: Session, model_id: UUID) -> AIModel | None:
-    return AIModelService.get(db, model_id)
+async def get_ai_model(db: AsyncSession, model_id: UUID) -> AIModel | None:
+    return await AIModelService.get(db, model_id)
 
 
-def get_ai_model_by_name(db: Session, name: str) -> AIModel | None:
-    return AIModelService.get_by_name(db, name)
+async def get_ai_model_by_name(db: AsyncSession, name: str) -> AIModel | None:
+    return await AIModelService.get_by_name(db, name)
 
 
-def list_ai_models(db: Session) -> List[AIModel]:
-    return AIModelService.list(db)
+async def list_ai_models(db: AsyncSession) -> List[AIModel]:
+    return await AIModelService.list(db)
 
 
-def update_ai_model(db: Session, model_id: UUID, payload: AIModelUpdate) -> AIModel | None:
-    return AIModelService.update(db, model_id, payload)
+async def update_ai_model(db: AsyncSession, model_id: UUID, payload: AIModelUpdate) -> AIModel | None:
+    return await AIModelService.update(db, model_id, payload)
 
 
-def delete_ai_model(db: Session, model_id: UUID) -> bool:
-    return AIModelService.delete(db, model_id)
+async def delete_ai_model(db: AsyncSession, model_id: UUID) -> bool:
+    return await AIModelService.delete(db, model_id)
@@ -1,9 +1,13 @@
 from fastapi import HTTPException, status
-from fastapi.concurrency import run_in_threadpool
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from generator_app.app.models.role import Role
 from generator_app.app.models.user import User
-from generator_app.app.core.security import verify_password, create_access_token
+from generator_app.app.core.config import settings
+from generator_app.app.core.permission_claims import role_claims
+from generator_app.app.core.security import create_access_token, password_hasher
 
 import logging
 logger = logging.getLogger("fastapi_app")
@@ -12,22 +16,36 @@ logger = logging.getLogger("fastapi_app")
 class AuthService:
 
     @staticmethod
-    async def login(payload, db: Session):
+    async def login(payload, db: AsyncSession):
         logger.info(f"Intento de login para email: {payload.email}")
 
-        user = await run_in_threadpool(
-            lambda: db.query(User).filter(User.email == payload.email).first()
-        )
+        query = select(User).where(User.email == payload.email)
+        if settings.AUTH_PERMISSION_CLAIMS:
+            # Rol y permisos en la misma consulta para los claims del token
+            query = query.options(selectinload(User.role).selectinload(Role.permissions))
+        user = (await db.execute(query)).scalars().first()
 
         if not user:
             logger.warning(f"Login fallido: usuario no encontrado ({payload.email})")
             raise HTTPException(status_code=400, detail="Invalid credentials")
 
-        if not verify_password(payload.password, user.password_hash):
+        # bcrypt fuera del event loop; new_hash si cambió el coste configurado
+        valid, new_hash = await password_hasher.verify_and_update(payload.password, user.password_hash)
+        if not valid:
             logger.warning(f"Login fallido: contraseña incorrecta ({payload.email})")
             raise HTTPException(status_code=400, detail="Invalid credentials")
 
-        token = create_access_token({"sub": str(user.id)})
+        if new_hash:
+            user.password_hash = new_hash
+            await db.commit()
+            logger.info(f"Hash de contraseña actualizado para usuario ID={user.id}")
+
+        data = {"sub": str(user.id)}
+        if settings.AUTH_PERMISSION_CLAIMS:
+            # Rol, permisos y su versión en el token: require_permission no necesita la BD
+            data.update(role_claims(user.role))
+
+        token = create_access_token(data)
         logger.info(f"Login exitoso para usuario ID={user.id}")
 
         return token
@@ -0,0 +1,326 @@
+import asyncio
+import io
+from pathlib import Path
+from typing import Any, Callable, Dict, List, MutableMapping, Tuple
+from urllib.parse import quote
+
+from fastapi.responses import FileResponse, StreamingResponse
+
+from generator_app.app.core.config import settings
+from generator_app.app.core.generator.code_generator import CodeGenerator
+from generator_app.app.core.generator.template_registry import CORE_TEMPLATES_DIR
+from generator_app.app.core.generator.output_sink import ARCHIVE_SINKS, OutputSink, iter_sink_stream
+from generator_app.app.core.generator.archive_cache import definition_key, generator_fingerprint, get_archive_cache
+from generator_app.app.core.generator.render_cache import get_render_cache
+from generator_app.app.core.generator.worker_pool import DeadlineSink, get_generation_pool
+from generator_app.app.core.generator.job_queue import GenerationJob, get_job_queue
+from generator_app.app.core.single_flight import SingleFlight
+from generator_app.app.core.tracing import span
+from generator_app.app.workers.normalizer import normalize_project_definition
+
+import logging
+logger = logging.getLogger("fastapi_app")
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Generaciones idénticas en curso: un solo render compartido por todos los clientes
+archive_flights = SingleFlight("archives", settings.GENERATION_SHARED_STREAM_MAX_BYTES)
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def _attachment_headers(filename: str) -> Dict[str, str]:
+    quoted = quote(filename)
+    if quoted != filename:
+        return {"Content-Disposition": f"attachment; filename*=utf-8''{quoted}"}
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+def build_archive(
+    project_def: Dict[str, Any],
+    models_def: List[Dict[str, Any]],
+    archive_format: str,
+    deadline: float | None = None,
+    incremental: bool = False,
+) -> bytes:
+    """
+    Renders the whole archive in memory and returns its bytes. Module level
+    so it can be pickled and run in a worker process.
+    """
+    buffer = io.BytesIO()
+    with ARCHIVE_SINKS[archive_format](buffer.write) as sink:
+        GenerationService.render(project_def, models_def, sink, deadline, incremental=incremental)
+    return buffer.getvalue()
+
+
+def write_archive(
+    project_def: Dict[str, Any],
+    models_def: List[Dict[str, Any]],
+    archive_format: str,
+    artifact_path: Path,
+    deadline: float | None = None,
+    progress: MutableMapping[str, int] | None = None,
+    progress_key: str | None = None,
+) -> None:
+    """
+    Renders the archive straight into ``artifact_path``. Used by generation
+    jobs; the number of rendered models is published in ``progress[progress_key]``.
+    """
+    on_model_rendered = None
+    if progress is not None:
+        def on_model_rendered(done: int, total: int) -> None:
+            progress[progress_key] = done
+
+    with open(artifact_path, "wb") as fh:
+        with ARCHIVE_SINKS[archive_format](fh.write) as sink:
+            GenerationService.render(project_def, models_def, sink, deadline, on_model_rendered)
+
+
+class GenerationService:
+    """Service that turns project definitions into downloadable archives."""
+
+    @staticmethod
+    def normalize(project_raw: Dict[str, Any], models_raw: Any) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        with span("generation.normalize") as s:
+            normalized = normalize_project_definition({
+                "project": project_raw,
+                "models": models_raw,
+            })
+            s.set(models=len(normalized["models"]))
+        return normalized["project"], normalized["models"]
+
+    @staticmethod
+    def render(
+        project_def: Dict[str, Any],
+        models_def: List[Dict[str, Any]],
+        sink: OutputSink,
+        deadline: float | None = None,
+        on_model_rendered: Callable[[int, int], None] | None = None,
+        incremental: bool = False,
+    ):
+        """``incremental`` reuses the models rendered for a previous version (render cache)."""
+        if deadline is not None:
+            sink = DeadlineSink(sink, deadline)
+        gen = CodeGenerator(
+            templates_dir=CORE_TEMPLATES_DIR,
+            sink=sink,
+            on_model_rendered=on_model_rendered,
+            render_cache=get_render_cache() if incremental else None,
+        )
+        gen.generate_project_structure(project_def, models_def)
+
+    @staticmethod
+    def _lookup_cache(project_def: Dict[str, Any], models_def: List[Dict[str, Any]], extension: str):
+        """Returns (cache, entry name, cached path); all None when the cache is disabled."""
+        cache = get_archive_cache()
+        if cache is None:
+            return None, None, None
+
+        with span("archive_cache.lookup") as s:
+            fingerprint = generator_fingerprint()
+            cache.ensure_fingerprint(fingerprint)
+            entry_name = f"{definition_key(project_def, models_def, fingerprint)}.{extension}"
+            cached_path = cache.get(entry_name)
+            s.set(hits=int(cached_path is not None))
+        return cache, entry_name, cached_path
+
+    @staticmethod
+    def stream_archive(
+        project_def: Dict[str, Any],
+        models_def: List[Dict[str, Any]],
+        basename: str,
+        archive_format: str = "zip",
+        incremental: bool = False,
+    ):
+        """
+        Streams the generated project as an archive (zip or tar.gz). With a
+        thread pool, files are compressed and sent while the rest of the
+        project is still being rendered; with a process pool, the archive is
+        sent once the worker process has built it.
+
+        Identical definitions are served straight from the archive cache,
+        and identical requests arriving while one is still rendering share
+        its output instead of rendering again. Rendering runs on the
+        generation pool; raises PoolSaturated when the pool cannot take
+        more work. ``incremental`` is for regenerating a saved project: only
+        the models that changed since the last render are rendered again.
+        """
+        sink_cls = ARCHIVE_SINKS[archive_format]
+        filename = f"{basename}.{sink_cls.extension}"
+
+        cache, entry_name, cached_path = GenerationService._lookup_cache(
+            project_def, models_def, sink_cls.extension
+        )
+        if cached_path is not None:
+            logger.info(f"Archivo servido desde caché: {entry_name}")
+            return FileResponse(
+                path=str(cached_path),
+                filename=filename,
+                media_type=sink_cls.media_type,
+            )
+
+        pool = get_generation_pool()
+        flight_key = entry_name or f"{definition_key(project_def, models_def, '')}.{sink_cls.extension}"
+        # Compartir exige el event loop; desde un handler síncrono (hilo del
+        # threadpool) cada petición genera su propio archivo
+        coalesce = _in_event_loop()
+
+        # Quien se une a una generación en curso no añade carga al pool.
+        # El resto reserva su plaza ya (comprobar y ocupar de una vez), antes
+        # de enviar cabeceras para poder responder 429
+        slot = None if coalesce and archive_flights.joinable(flight_key) else pool.reserve()
+
+        def start():
+            if pool.kind == "process":
+                return GenerationService._iter_process_archive(
+                    pool, slot, project_def, models_def, archive_format, cache, entry_name, incremental
+                )
+            return GenerationService._iter_thread_archive(
+                pool, slot, project_def, models_def, sink_cls, cache, entry_name, incremental
+            )
+
+        if not coalesce:
+            chunks, shared = start(), False
+        else:
+            try:
+                # on_done libera la plaza aunque el render no llegue a arrancar
+                chunks, shared = archive_flights.stream(
+                    flight_key, start, on_done=slot.release if slot is not None else None
+                )
+            except BaseException as e:
+                if slot is not None:
+                    slot.release(e)
+                raise
+        if shared:
+            logger.info(f"Generación idéntica en curso, compartiendo resultado: {flight_key}")
+            with span("generation.single_flight") as s:
+                s.add(shared=1)
+
+        async def body():
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            except Exception as e:
+                logger.error(f"Error generando '{filename}': {e}", exc_info=True)
+                raise
+            finally:
+                # Dejar de leer libera el búfer compartido (o cancela el render si era el último)
+                await chunks.aclose()
+
+        return StreamingResponse(
+            body(),
+            media_type=sink_cls.media_type,
+            headers=_attachment_headers(filename),
+        )
+
+    @staticmethod
+    def submit_job(
+        project_def: Dict[str, Any],
+        models_def: List[Dict[str, Any]],
+        basename: str,
+        owner_id: Any,
+        archive_format: str = "zip",
+    ) -> GenerationJob:
+        """
+        Queues the generation and returns immediately. Identical definitions
+        already in the archive cache produce a job that is completed at once.
+        """
+        sink_cls = ARCHIVE_SINKS[archive_format]
+        job = GenerationJob(
+            owner_id=owner_id,
+            filename=f"{basename}.{sink_cls.extension}",
+            media_type=sink_cls.media_type,
+            models_total=len(models_def),
+        )
+
+        cache, entry_name, cached_path = GenerationService._lookup_cache(
+            project_def, models_def, sink_cls.extension
+        )
+        if cached_path is not None:
+            logger.info(f"Job {job.id} servido desde caché: {entry_name}")
+            job.complete(cached_path)
+        elif cache is not None:
+            # Misma clave que stream_archive: la descarga síncrona posterior sale de caché
+            job.on_complete = lambda artifact_path: cache.put_file(entry_name, artifact_path)
+
+        return get_job_queue().submit(job, write_archive, project_def, models_def, archive_format)
+
+    @staticmethod
+    def artifact_response(job: GenerationJob):
+        return FileResponse(
+            path=str(job.artifact_path),
+            filename=job.filename,
+            media_type=job.media_type,
+        )
+
+    @staticmethod
+    async def _iter_process_archive(pool, slot, project_def, models_def, archive_format, cache, entry_name, incremental):
+        """
+        The archive is built whole in a worker process and sent once ready.
+        ``slot`` (reserved by the caller) is released when rendering ends.
+        """
+        error = None
+        try:
+            data = await pool.execute(
+                build_archive, project_def, models_def, archive_format, pool.deadline(), incremental
+            )
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            slot.release(error)
+
+        if cache is not None:
+            await asyncio.to_thread(cache.put_bytes, entry_name, data)
+
+        view = memoryview(data)
+        for start in range(0, len(view), STREAM_CHUNK_SIZE):
+            yield bytes(view[start:start + STREAM_CHUNK_SIZE])
+
+    @staticmethod
+    async def _iter_thread_archive(pool, slot, project_def, models_def, sink_cls, cache, entry_name, incremental):
+        """
+        Files are compressed and sent from a pool thread while the rest is
+        still rendering. ``slot`` (reserved by the caller) is released when
+        the stream ends, also when the client disconnects early.
+        """
+        sink_factory = sink_cls
+        cache_writer = cache.writer(entry_name) if cache is not None else None
+
+        if cache_writer is not None:
+            # Miss: el archivo se guarda en caché mientras se envía al cliente
+            def sink_factory(emit):
+                def tee(chunk: bytes) -> None:
+                    cache_writer.write(chunk)
+                    emit(chunk)
+                return sink_cls(tee)
+
+        def on_done(error):
+            if cache_writer is None:
+                return
+            if error is None:
+                cache_writer.commit()
+            else:
+                cache_writer.discard()
+
+        deadline = pool.deadline()
+        error = None
+        try:
+            async for chunk in iter_sink_stream(
+                lambda sink: GenerationService.render(project_def, models_def, sink, deadline, incremental=incremental),
+                sink_factory,
+                on_done,
+                executor=pool.executor,
+            ):
+                yield chunk
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            slot.release(error)
@@ -1,7 +1,10 @@
 from fastapi import HTTPException
-from fastapi.concurrency import run_in_threadpool
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from generator_app.app.core.permission_claims import permission_versions
+from generator_app.app.core.principal_cache import principal_cache
 from generator_app.app.models.role import Role
 from generator_app.app.models.permission import Permission
 from generator_app.app.schemas.role import RoleCreate, RoleUpdate
@@ -13,74 +16,68 @@ logger = logging.getLogger("fastapi_app")
 class RoleService:
 
     @staticmethod
-    async def create(payload: RoleCreate, db: Session):
-        existing = await run_in_threadpool(
-            lambda: db.query(Role).filter(Role.name == payload.name).first()
+    async def _get(db: AsyncSession, role_id) -> Role | None:
+        # RoleRead incluye los permisos: cargarlos ya (no hay lazy load en async)
+        result = await db.execute(
+            select(Role).options(selectinload(Role.permissions)).where(Role.id == role_id)
         )
+        return result.scalars().first()
+
+    @staticmethod
+    async def create(payload: RoleCreate, db: AsyncSession):
+        existing = (await db.execute(select(Role).where(Role.name == payload.name))).scalars().first()
 
         if existing:
             raise HTTPException(status_code=400, detail="Role already exists")
 
-        def create_role():
-            role = Role(
-                name=payload.name,
-                description=payload.description,
-                is_default=payload.is_default
-            )
-            db.add(role)
-            db.commit()
-            db.refresh(role)
-            return role
-
-        role = await run_in_threadpool(create_role)
+        role = Role(
+            name=payload.name,
+            description=payload.description,
+            is_default=payload.is_default,
+            permissions=[],
+        )
+        db.add(role)
+        await db.commit()
+
         logger.info(f"Role created: {role.name}")
         return role
 
     @staticmethod
-    async def update(role_id, payload: RoleUpdate, db: Session):
-        role = await run_in_threadpool(
-            lambda: db.query(Role).filter(Role.id == role_id).first()
-        )
+    async def update(role_id, payload: RoleUpdate, db: AsyncSession):
+        role = await RoleService._get(db, role_id)
 
         if not role:
             raise HTTPException(status_code=404, detail="Role not found")
 
-        def update_role():
-            if payload.name is not None:
-                role.name = payload.name
-            if payload.description is not None:
-                role.description = payload.description
-            if payload.is_default is not None:
-                role.is_default = payload.is_default
+        if payload.name is not None:
+            role.name = payload.name
+        if payload.description is not None:
+            role.description = payload.description
+        if payload.is_default is not None:
+            role.is_default = payload.is_default
 
-            db.commit()
-            db.refresh(role)
-            return role
-
-        return await run_in_threadpool(update_role)
+        await db.commit()
+        principal_cache.invalidate_role(role.id)
+        return role
 
     @staticmethod
-    async def assign_permission(role_id, permission_id, db: Session):
-        role = await run_in_threadpool(
-            lambda: db.query(Role).filter(Role.id == role_id).first()
-        )
+    async def assign_permission(role_id, permission_id, db: AsyncSession):
+        role = await RoleService._get(db, role_id)
         if not role:
             raise HTTPException(status_code=404, detail="Role not found")
 
-        perm = await run_in_threadpool(
-            lambda: db.query(Permission).filter(Permission.id == permission_id).first()
-        )
+        perm = await db.get(Permission, permission_id)
         if not perm:
             raise HTTPException(status_code=404, detail="Permission not found")
 
-        def assign():
-            role.permissions.append(perm)
-            db.commit()
-            db.refresh(role)
-            return role
+        role.permissions.append(perm)
+        await db.commit()
 
-        return await run_in_threadpool(assign)
+        principal_cache.invalidate_role(role.id)
+        permission_versions.invalidate()
+        return role
 
     @staticmethod
-    async def list(db: Session):
-        return await run_in_threadpool(lambda: db.query(Role).all())
+    async def list(db: AsyncSession):
+        result = await db.execute(select(Role).options(selectinload(Role.permissions)))
+        return result.scalars().all()
@@ -1,13 +1,18 @@
-from .extract_content_ai import extract_ai_content
-from .clean_json import extract_json, clean_json_output
+from .extract_content_ai import extract_ai_content, extract_ai_delta
+from .clean_json import extract_json, extract_json_object, repair_json, clean_json_output
 from .normalizer import normalize_project_definition, validate_many_to_many
 from .mtm_validator import validate_many_to_many
+from .stream_json import StreamingDefinitionParser
 
 __all__ = [
     "extract_ai_content",
+    "extract_ai_delta",
     "extract_json",
+    "extract_json_object",
+    "repair_json",
     "clean_json_output",
     "normalize_project_definition",
+    "StreamingDefinitionParser",
     "validate_many_to_many",
     "mtm_validator"
 ]
\ No newline at end of file
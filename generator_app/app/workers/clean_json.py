@@ -1,34 +1,229 @@
 import re
 import json
+from typing import Any, List, Tuple
 
-def extract_json(text: str):
-    clean = text.strip()
+# Únicos caracteres que cambian el estado del escáner
+_STRUCTURAL = re.compile(r'[{}\[\]"\\]')
+_IN_STRING = re.compile(r'["\\]')
+_WORD = re.compile(r"[A-Za-z_]+")
+# '{' seguido de una clave o de '}': empieza un objeto, no es una llave de la prosa
+_OBJECT_START = re.compile(r"\{\s*[\"'}]")
+
+_CLOSERS = {"{": "}", "[": "]"}
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _find_start(text: str) -> int:
+    """Primer '{' tras el bloque ``` si lo hay (así se ignoran llaves en la prosa previa)."""
+    fence = text.find("```")
+    if fence >= 0:
+        start = text.find("{", fence)
+        if start >= 0:
+            return start
+    return text.find("{")
+
+
+def _scan(text: str, start: int) -> int | None:
+    """
+    Índice justo después de la llave que cierra el objeto que empieza en
+    ``start``, o None si no llega a cerrarse. Salta de un carácter
+    estructural al siguiente con una regex, sin recorrer el texto plano.
+    """
+    depth = 0
+    pos = start
+    in_string = False
+    pattern = _STRUCTURAL
+
+    while True:
+        match = pattern.search(text, pos)
+        if match is None:
+            return None
+        c = match.group()
+        pos = match.end()
+
+        if in_string:
+            if c == "\\":
+                pos += 1  # saltar el carácter escapado
+            else:
+                in_string = False
+                pattern = _STRUCTURAL
+        elif c == '"':
+            in_string = True
+            pattern = _IN_STRING
+        elif c in "{[":
+            depth += 1
+        elif c in "}]":
+            depth -= 1
+            if depth == 0:
+                return pos
+
+
+def _drop_trailing_comma(out: List[str]) -> bool:
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i]
+        return True
+    return False
+
+
+def repair_json(text: str) -> Tuple[str, List[str]]:
+    """
+    Una sola pasada que corrige los fallos típicos de un LLM en el objeto
+    que empieza en ``text[0]``: comas finales, comillas simples, literales
+    de Python, saltos de línea dentro de cadenas, corchetes cruzados
+    (``[bcrypt)``) y corchetes o cadenas sin cerrar. Devuelve el texto
+    corregido y la lista de arreglos aplicados.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    fixes: List[str] = []
+    quote: str | None = None
+    i, n = 0, len(text)
+
+    def fix(name: str) -> None:
+        if name not in fixes:
+            fixes.append(name)
+
+    while i < n:
+        c = text[i]
 
-    clean = re.sub(r"^```[a-zA-Z]*", "", clean)
-    clean = re.sub(r"```$", "", clean)
+        if quote is not None:
+            if c == "\\":
+                out.append(text[i:i + 2])
+                i += 2
+                continue
+            if c == quote:
+                out.append('"')
+                quote = None
+            elif c == '"':
+                out.append('\\"')
+            elif c == "\n":
+                out.append("\\n")
+                fix("newline in string")
+            else:
+                out.append(c)
+            i += 1
+            continue
 
-    clean = clean.strip()
+        if c == '"' or c == "'":
+            if c == "'":
+                fix("single quotes")
+            quote = c
+            out.append('"')
+        elif c in "{[":
+            stack.append(_CLOSERS[c])
+            out.append(c)
+        elif c in "}]":
+            if not stack:
+                fix("extra closing bracket")
+                i += 1
+                continue
+            expected = stack.pop()
+            if c != expected:
+                fix("mismatched bracket")
+            if _drop_trailing_comma(out):
+                fix("trailing comma")
+            out.append(expected)
+            if not stack:
+                break
+        elif c == ")":
+            # "[bcrypt)": paréntesis donde tocaba cerrar un corchete
+            if stack and stack[-1] == "]":
+                fix("mismatched bracket")
+                stack.pop()
+                _drop_trailing_comma(out)
+                out.append("]")
+            else:
+                out.append(c)
+        elif c.isalpha() or c == "_":
+            word = _WORD.match(text, i).group()
+            if word in _PY_LITERALS:
+                fix("python literals")
+                word = _PY_LITERALS[word]
+            out.append(word)
+            i += len(word)
+            continue
+        else:
+            out.append(c)
+        i += 1
+
+    if quote is not None:
+        out.append('"')
+        fix("unterminated string")
+    if stack:
+        if _drop_trailing_comma(out):
+            fix("trailing comma")
+        out.extend(reversed(stack))
+        fix("unbalanced brackets")
+
+    return "".join(out), fixes
+
+
+def _parse_at(raw: str, start: int, end: int | None, repair: bool) -> Tuple[Any, List[str]]:
+    if end is not None:
+        try:
+            return json.loads(raw[start:end]), []
+        except json.JSONDecodeError:
+            if not repair:
+                raise
+    elif not repair:
+        raise ValueError("Unterminated JSON object in AI output")
+
+    fixed, fixes = repair_json(raw[start:])
+    return json.loads(fixed), fixes
+
+
+def extract_json_object(raw: str, repair: bool = False) -> Tuple[Any, List[str]]:
+    """
+    Localiza el objeto JSON más externo en la salida de la IA (con o sin
+    bloque ```, con prosa antes o comentarios después) y lo parsea.
+    Con ``repair`` se intenta ``repair_json`` cuando el parseo estricto
+    falla. Si el candidato no vale (una llave suelta en la prosa), se
+    reintenta desde la siguiente '{'. Devuelve (valor, arreglos
+    aplicados); lanza ValueError si no hay JSON utilizable.
+    """
+    start = _find_start(raw)
+    if start < 0:
+        raise ValueError("No JSON object found in AI output")
+
+    first_error: ValueError | None = None
+    while start >= 0:
+        end = _scan(raw, start)
+        try:
+            return _parse_at(raw, start, end, repair)
+        except ValueError as e:  # JSONDecodeError incluido
+            first_error = first_error or e
+        # Nunca se devuelve un objeto anidado en un candidato fallido: uno
+        # cerrado se salta entero y uno sin cerrar que ya parecía JSON corta la búsqueda
+        if end is None and _OBJECT_START.match(raw, start):
+            break
+        start = raw.find("{", end if end is not None else start + 1)
+
+    raise first_error
+
+
+def extract_json(text: str):
+    return extract_json_object(text)[0]
 
-    return json.loads(clean)
 
 def clean_json_output(raw: str) -> str:
     """
-    Limpia el contenido devuelto por la IA:
-    - elimina bloques ```json o ```
-    - elimina espacios y saltos innecesarios
-    - deja solo el JSON puro
+    Limpia el contenido devuelto por la IA y deja solo el JSON puro:
+    el objeto más externo, sin bloques ```json ni texto alrededor.
+    Si no hay un objeto completo, devuelve el texto sin backticks.
     """
+    start = _find_start(raw)
+    if start >= 0:
+        end = _scan(raw, start)
+        if end is not None:
+            return raw[start:end]
 
     cleaned = raw.strip()
-
-    # eliminar bloques ```json ... ```
     if cleaned.startswith("```"):
         cleaned = cleaned.strip("`")
         # a veces queda "json\n{...}"
         if cleaned.startswith("json"):
             cleaned = cleaned[4:].strip()
-
-    # eliminar triple backticks internos
-    cleaned = cleaned.replace("```", "").strip()
-
-    return cleaned
+    return cleaned.replace("```", "").strip()
@@ -37,3 +37,30 @@ def extract_ai_content(response):
 
     # Fallback final
     return str(response)
+
+
+def extract_ai_delta(chunk):
+    """
+    Extrae el texto incremental de un chunk de streaming (``stream=True``).
+    Devuelve "" cuando el chunk no trae contenido (rol, finish_reason, uso).
+    """
+
+    # Caso 1: chunk tipo objeto (OpenAI SDK)
+    if hasattr(chunk, "choices"):
+        if not chunk.choices:
+            return ""
+        choice = chunk.choices[0]
+
+        delta = getattr(choice, "delta", None)
+        if delta is not None:
+            return getattr(delta, "content", None) or ""
+
+        return getattr(choice, "text", None) or ""
+
+    # Caso 2: chunk tipo dict
+    if isinstance(chunk, dict) and chunk.get("choices"):
+        choice = chunk["choices"][0]
+        delta = choice.get("delta") or {}
+        return delta.get("content") or choice.get("text") or ""
+
+    return ""
@@ -1,6 +1,13 @@
 def validate_many_to_many(models: list, warnings: list = None):
     model_names = {m["name"] for m in models}
 
+    # Índice modelo → destinos ManyToMany, para comprobar la reciprocidad sin recorrer todos los modelos
+    m2m_targets = {}
+    for model in models:
+        for rel in model.get("relationships", []):
+            if rel.get("type") == "many_to_many":
+                m2m_targets.setdefault(model["name"], set()).add(rel.get("model"))
+
     for model in models:
         for rel in model.get("relationships", []):
             if rel.get("type") != "many_to_many":
@@ -16,14 +23,7 @@ def validate_many_to_many(models: list, warnings: list = None):
                 continue
 
             # 2. Validar reciprocidad
-            reciprocal_found = False
-            for m2 in models:
-                if m2["name"] == target:
-                    for r2 in m2.get("relationships", []):
-                        if r2.get("type") == "many_to_many" and r2.get("model") == model["name"]:
-                            reciprocal_found = True
-
-            if not reciprocal_found:
+            if model["name"] not in m2m_targets.get(target, ()):
                 warnings.append(
                     f"La relación ManyToMany '{model['name']}' → '{target}' no es recíproca. "
                     f"Se recomienda agregar la relación inversa."
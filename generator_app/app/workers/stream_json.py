@@ -0,0 +1,149 @@
+import json
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+# (tipo de evento, nombre, valor): ("project", None, {...}) o ("model", "User", {...})
+StreamEvent = Tuple[str, str | None, Any]
+
+
+class StreamingDefinitionParser:
+    """
+    Incremental parser for the ``{"project": ..., "models": ...}`` answer of the AI.
+
+    Text is fed as it arrives (``feed``) and every character is scanned once.
+    The project block and each model are yielded as soon as their closing
+    bracket arrives, so callers do not wait for the full completion.
+    ``models`` may be an object (``{"User": {...}}``) or a list of objects
+    with a ``name`` key. Anything before the first ``{`` (code fences,
+    chatter) is ignored.
+    """
+
+    def __init__(self):
+        # Texto completo en trozos (para result) y solo la cola aún necesaria
+        # para el escaneo: reconstruir todo el texto en cada feed sería cuadrático
+        self._parts: List[str] = []
+        self._buf = ""
+        self._base = 0  # posición absoluta de self._buf[0]
+        self._pos = 0
+        self._started = False
+        self._done = False
+
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Dict[int, Tuple[int, int]] = {}
+        self._keys: Dict[int, Any] = {}
+        self._open_at: Dict[int, int] = {}
+        self._open_char: Dict[int, str] = {}
+        self._root: Tuple[int, int] | None = None
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, chunk: str) -> Iterator[StreamEvent]:
+        if self._done or not chunk:
+            return
+
+        if not self._started:
+            start = chunk.find("{")
+            if start < 0:
+                return
+            self._started = True
+            chunk = chunk[start:]
+
+        self._parts.append(chunk)
+        self._buf += chunk
+
+        while self._pos < self._base + len(self._buf) and not self._done:
+            i = self._pos
+            c = self._buf[i - self._base]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._last_string[self._depth] = (self._string_start, i + 1)
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":":
+                span = self._last_string.pop(self._depth, None)
+                if span is not None:
+                    self._keys[self._depth] = json.loads(self._slice(span[0], span[1]))
+            elif c in "{[":
+                self._depth += 1
+                self._open_at[self._depth] = i
+                self._open_char[self._depth] = c
+                self._last_string.pop(self._depth, None)
+            elif c in "}]":
+                event = self._close(i)
+                if event is not None:
+                    yield event
+
+        self._trim()
+
+    def _slice(self, start: int, end: int) -> str:
+        return self._buf[start - self._base:end - self._base]
+
+    def _trim(self) -> None:
+        """Drops the scanned text no pending key, string or model body refers to."""
+        needed = [self._pos]
+        if self._in_string:
+            needed.append(self._string_start)
+        needed.extend(start for start, _ in self._last_string.values())
+
+        top_key = self._keys.get(1)
+        if top_key == "project" and self._depth >= 2:
+            needed.append(self._open_at[2])
+        elif top_key == "models" and self._depth >= 3:
+            needed.append(self._open_at[3])
+
+        cut = min(needed)
+        if cut > self._base:
+            self._buf = self._buf[cut - self._base:]
+            self._base = cut
+
+    def _close(self, end: int) -> StreamEvent | None:
+        depth = self._depth
+        start = self._open_at.get(depth, 0)
+        self._depth -= 1
+        self._keys.pop(depth, None)
+        self._last_string.pop(depth, None)
+
+        if depth == 1:
+            self._root = (start, end + 1)
+            self._done = True
+            return None
+
+        top_key = self._keys.get(1)
+
+        # Valor de una clave de primer nivel
+        if depth == 2 and top_key == "project":
+            return "project", None, self._load(start, end)
+
+        # Elemento de "models"
+        if depth == 3 and top_key == "models":
+            body = self._load(start, end)
+            if self._open_char[2] == "{":
+                return "model", self._keys.get(2), body
+            name = body.get("name") if isinstance(body, dict) else None
+            return "model", name, body
+
+        return None
+
+    def _load(self, start: int, end: int) -> Any:
+        return json.loads(self._slice(start, end + 1))
+
+    def result(self) -> Dict[str, Any]:
+        """The full definition once the root object is closed."""
+        if self._root is None:
+            raise ValueError("Incomplete JSON definition")
+        return json.loads("".join(self._parts)[self._root[0]:self._root[1]])
@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+import pytest
+
+from generator_app.app.core.ai_health import HealthTracker, ProviderHealth
+from generator_app.app.core.config import settings
+
+
+def _model(i):
+    return SimpleNamespace(id=i, name=f"model-{i}", provider="groq")
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    monkeypatch.setattr(settings, "AI_BREAKER_CONSECUTIVE_FAILURES", 3)
+    monkeypatch.setattr(settings, "AI_BREAKER_MIN_CALLS", 6)
+    monkeypatch.setattr(settings, "AI_BREAKER_ERROR_RATE", 0.5)
+    monkeypatch.setattr(settings, "AI_BREAKER_COOLDOWN_SECONDS", 30.0)
+    monkeypatch.setattr(settings, "AI_HEALTH_REORDER", True)
+    return HealthTracker()
+
+
+def _state(tracker, model):
+    return tracker.snapshot()[str(model.id)]["state"]
+
+
+def test_consecutive_failures_open_the_breaker(tracker):
+    model = _model(1)
+    for _ in range(2):
+        tracker.record_failure(model, RuntimeError("boom"))
+    assert _state(tracker, model) == ProviderHealth.CLOSED
+    assert tracker.try_acquire(model)
+
+    tracker.record_failure(model, RuntimeError("boom"))
+    assert _state(tracker, model) == ProviderHealth.OPEN
+    assert not tracker.try_acquire(model)
+    assert tracker.order([model]) == []
+
+
+def test_error_rate_opens_the_breaker(tracker):
+    model = _model(1)
+    for ok in (True, False, True, False, True):
+        if ok:
+            tracker.record_success(model, 0.1)
+        else:
+            tracker.record_failure(model, RuntimeError("boom"))
+    assert _state(tracker, model) == ProviderHealth.CLOSED
+
+    tracker.record_failure(model, RuntimeError("boom"))
+    assert _state(tracker, model) == ProviderHealth.OPEN
+
+
+def test_half_open_allows_a_single_probe(tracker, monkeypatch):
+    model = _model(1)
+    for _ in range(3):
+        tracker.record_failure(model, RuntimeError("boom"))
+
+    monkeypatch.setattr(settings, "AI_BREAKER_COOLDOWN_SECONDS", 0.0)
+    assert tracker.order([model]) == [model]
+    assert tracker.try_acquire(model)
+    assert not tracker.try_acquire(model)
+
+    tracker.record_success(model, 0.2)
+    assert _state(tracker, model) == ProviderHealth.CLOSED
+    assert tracker.try_acquire(model)
+
+
+def test_failed_probe_reopens(tracker, monkeypatch):
+    model = _model(1)
+    for _ in range(3):
+        tracker.record_failure(model, RuntimeError("boom"))
+    monkeypatch.setattr(settings, "AI_BREAKER_COOLDOWN_SECONDS", 0.0)
+    assert tracker.try_acquire(model)
+
+    monkeypatch.setattr(settings, "AI_BREAKER_COOLDOWN_SECONDS", 30.0)
+    tracker.record_failure(model, RuntimeError("still down"))
+    assert _state(tracker, model) == ProviderHealth.OPEN
+    assert not tracker.try_acquire(model)
+
+
+def test_cancelled_probe_frees_the_slot(tracker, monkeypatch):
+    model = _model(1)
+    for _ in range(3):
+        tracker.record_failure(model, RuntimeError("boom"))
+    monkeypatch.setattr(settings, "AI_BREAKER_COOLDOWN_SECONDS", 0.0)
+
+    assert tracker.try_acquire(model)
+    tracker.record_cancelled(model)
+    assert tracker.try_acquire(model)
+
+
+def test_order_prefers_healthy_and_fast_models(tracker):
+    slow, failing, fast = _model(1), _model(2), _model(3)
+    tracker.record_success(slow, 2.0)
+    tracker.record_failure(failing, RuntimeError("boom"))
+    tracker.record_success(fast, 0.1)
+
+    assert tracker.order([slow, failing, fast]) == [fast, slow, failing]
+
+
+def test_order_keeps_configuration_without_reorder(tracker, monkeypatch):
+    monkeypatch.setattr(settings, "AI_HEALTH_REORDER", False)
+    slow, fast = _model(1), _model(2)
+    tracker.record_success(slow, 2.0)
+    tracker.record_success(fast, 0.1)
+    assert tracker.order([slow, fast]) == [slow, fast]
+
+
+def test_reset_forgets_health(tracker):
+    model = _model(1)
+    for _ in range(3):
+        tracker.record_failure(model, RuntimeError("boom"))
+    assert tracker.reset(model.id)
+    assert tracker.try_acquire(model)
+    assert not tracker.reset(_model(9).id)
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from generator_app.app.core.ai_response_cache import (
+    AIResponseCache,
+    MemoryResponseBackend,
+    SQLiteResponseBackend,
+    normalize_prompt,
+    response_key,
+)
+
+
+def _payload(prompt, **params):
+    return {
+        "model": "m",
+        "temperature": 0.2,
+        "messages": [{"role": "system", "content": "Eres un generador"}, {"role": "user", "content": prompt}],
+        **params,
+    }
+
+
+def test_prompt_normalization_keeps_case():
+    assert normalize_prompt("  campo\tuserId \n") == "campo userId"
+    assert normalize_prompt("campo userId") != normalize_prompt("campo userid")
+    # NFC: "é" compuesto y descompuesto son el mismo prompt
+    assert normalize_prompt("cafe\u0301") == normalize_prompt("caf\u00e9")
+
+
+def test_response_key():
+    base = response_key(_payload("Crea un modelo User"))
+    assert response_key(_payload("  Crea   un modelo User\n")) == base
+    assert response_key(_payload("Crea un modelo User", stream=True)) == base
+    assert response_key(_payload("crea un modelo user")) != base
+    assert response_key(_payload("Crea un modelo User", temperature=0.7)) != base
+    assert response_key(_payload("Crea un modelo User", model="other")) != base
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryResponseBackend(max_entries=2)
+    return SQLiteResponseBackend(tmp_path / "responses.sqlite3", max_entries=2)
+
+
+def test_cache_hit_miss_and_lru(backend):
+    cache = AIResponseCache(backend, ttl_seconds=60)
+    assert cache.get("a") is None
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 2
+
+
+def test_expired_entries_are_dropped(backend):
+    cache = AIResponseCache(backend, ttl_seconds=-1)
+    cache.set("a", "A")
+    assert cache.get("a") is None
+    assert len(backend) == 0
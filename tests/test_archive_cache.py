@@ -0,0 +1,103 @@
+from generator_app.app.core.generator import archive_cache
+from generator_app.app.core.generator.archive_cache import ArchiveCache, definition_key, generator_fingerprint
+
+PROJECT = {"project_name": "demo", "modules": {"auth": {"enabled": True}, "mail": {"enabled": False}}}
+MODELS = [{"name": "User", "fields": [{"name": "email", "type": "str"}]}]
+
+
+def test_definition_key_ignores_dict_order():
+    reordered = {"modules": {"mail": {"enabled": False}, "auth": {"enabled": True}}, "project_name": "demo"}
+    assert definition_key(PROJECT, MODELS, "fp") == definition_key(reordered, MODELS, "fp")
+
+
+def test_definition_key_changes_with_definition_and_fingerprint():
+    base = definition_key(PROJECT, MODELS, "fp")
+    other_models = [{"name": "User", "fields": [{"name": "email", "type": "int"}]}]
+    assert definition_key(PROJECT, other_models, "fp") != base
+    assert definition_key(PROJECT, MODELS, "fp2") != base
+
+
+def test_generator_fingerprint_tracks_file_contents(tmp_path, monkeypatch):
+    template = tmp_path / "model.jinja2"
+    template.write_text("a")
+    sources = [(tmp_path, "*.jinja2")]
+    # Las rutas se hashean relativas a APP_DIR
+    monkeypatch.setattr(archive_cache, "APP_DIR", tmp_path)
+
+    first = generator_fingerprint(sources)
+    assert generator_fingerprint(sources) == first
+    template.write_text("bb")
+    assert generator_fingerprint(sources) != first
+
+
+def test_put_and_get(tmp_path):
+    cache = ArchiveCache(tmp_path, max_bytes=1024)
+    assert cache.get("a.zip") is None
+    cache.put_bytes("a.zip", b"data")
+    path = cache.get("a.zip")
+    assert path is not None and path.read_bytes() == b"data"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ArchiveCache(tmp_path, max_bytes=10)
+    cache.put_bytes("a.zip", b"aaaa")
+    cache.put_bytes("b.zip", b"bbbb")
+    cache.get("a.zip")
+    cache.put_bytes("c.zip", b"cccc")
+
+    assert cache.get("b.zip") is None
+    assert cache.get("a.zip") is not None
+    assert cache.get("c.zip") is not None
+    assert cache.stats()["bytes"] == 8
+
+
+def test_discarded_writer_leaves_no_entry(tmp_path):
+    cache = ArchiveCache(tmp_path, max_bytes=1024)
+    writer = cache.writer("a.zip")
+    writer.write(b"partial")
+    writer.discard()
+    assert cache.get("a.zip") is None
+    assert not any(p.name.startswith(".tmp-") for p in tmp_path.iterdir())
+
+
+def test_fingerprint_change_clears_entries(tmp_path):
+    cache = ArchiveCache(tmp_path, max_bytes=1024)
+    cache.ensure_fingerprint("v1")
+    cache.put_bytes("a.zip", b"data")
+    cache.ensure_fingerprint("v1")
+    assert cache.get("a.zip") is not None
+
+    cache.ensure_fingerprint("v2")
+    assert cache.get("a.zip") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_index_survives_restart(tmp_path):
+    cache = ArchiveCache(tmp_path, max_bytes=1024)
+    cache.ensure_fingerprint("v1")
+    cache.put_bytes("a.zip", b"data")
+
+    reopened = ArchiveCache(tmp_path, max_bytes=1024)
+    reopened.ensure_fingerprint("v1")
+    assert reopened.get("a.zip") is not None
+    assert reopened.stats()["bytes"] == 4
+
+
+def test_fingerprint_ignores_cache_and_pool_code():
+    sources = {(root.name, pattern) for root, pattern in archive_cache.FINGERPRINT_SOURCES}
+    assert ("generator", "code_generator.py") in sources
+    for module in ("archive_cache.py", "render_cache.py", "worker_pool.py", "job_queue.py"):
+        assert ("generator", module) not in sources
+    assert ("generator", "*.py") not in sources
+
+
+def test_get_drops_entry_removed_behind_its_back(tmp_path):
+    cache = ArchiveCache(tmp_path, max_bytes=1024)
+    cache.put_bytes("a.zip", b"data")
+    # Otro worker con el mismo directorio lo ha desalojado
+    (tmp_path / "a.zip").unlink()
+
+    assert cache.get("a.zip") is None
+    stats = cache.stats()
+    assert stats["entries"] == 0 and stats["bytes"] == 0 and stats["misses"] == 1
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from generator_app.app.workers.clean_json import clean_json_output, extract_json_object, repair_json
+
+OBJ = {"project": {"project_name": "demo", "description": "uses {braces} and \"quotes\""}, "models": []}
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        json.dumps(OBJ),
+        "Here you go:\n```json\n" + json.dumps(OBJ, indent=2) + "\n```\nHope it helps {really}.",
+        "Sure! " + json.dumps(OBJ) + " -- let me know.",
+    ],
+)
+def test_extracts_outer_object(raw):
+    assert extract_json_object(raw) == (OBJ, [])
+    assert json.loads(clean_json_output(raw)) == OBJ
+
+
+def test_fence_skips_braces_in_preceding_prose():
+    raw = "Use {placeholders} freely.\n```json\n" + json.dumps(OBJ) + "\n```"
+    assert extract_json_object(raw)[0] == OBJ
+
+
+@pytest.mark.parametrize("repair", [False, True])
+def test_retries_after_stray_brace_in_prose(repair):
+    raw = "Fill in {name} like this: " + json.dumps(OBJ)
+    assert extract_json_object(raw, repair=repair)[0] == OBJ
+
+
+@pytest.mark.parametrize("repair", [False, True])
+def test_retries_after_unclosed_brace_in_prose(repair):
+    raw = "A lone { opens here, then: " + json.dumps(OBJ)
+    assert extract_json_object(raw, repair=repair)[0] == OBJ
+
+
+def test_failed_candidate_does_not_yield_nested_object():
+    raw = '{"project": {"project_name": "demo"}, oops}'
+    with pytest.raises(ValueError):
+        extract_json_object(raw)
+
+
+def test_no_object_raises():
+    with pytest.raises(ValueError):
+        extract_json_object("no json here")
+
+
+def test_unterminated_without_repair_raises():
+    with pytest.raises(ValueError):
+        extract_json_object('{"project": {"project_name": "demo"}')
+
+
+def test_repair_fixes_common_mistakes():
+    raw = "{'project': {'project_name': 'demo', 'auth': True,}, 'models': [\"bcrypt\")"
+    value, fixes = extract_json_object(raw, repair=True)
+    assert value == {"project": {"project_name": "demo", "auth": True}, "models": ["bcrypt"]}
+    assert {"single quotes", "python literals", "trailing comma", "mismatched bracket", "unbalanced brackets"} <= set(fixes)
+
+
+def test_repair_escapes_newlines_and_closes_strings():
+    fixed, fixes = repair_json('{"a": "line\nbreak", "b": "open')
+    assert json.loads(fixed) == {"a": "line\nbreak", "b": "open"}
+    assert "newline in string" in fixes and "unterminated string" in fixes
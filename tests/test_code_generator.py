@@ -0,0 +1,70 @@
+import copy
+
+import pytest
+
+from benchmarks.generation import build_definition
+from generator_app.app.core.generator.code_generator import CodeGenerator
+from generator_app.app.core.generator.output_sink import MemorySink
+from generator_app.app.core.generator.render_cache import RenderCache
+from generator_app.app.core.generator.template_registry import CORE_TEMPLATES_DIR
+
+
+def _render(project_def, models_def, render_cache=None, on_model_rendered=None):
+    sink = MemorySink()
+    CodeGenerator(
+        templates_dir=CORE_TEMPLATES_DIR,
+        sink=sink,
+        render_cache=render_cache,
+        on_model_rendered=on_model_rendered,
+    ).generate_project_structure(project_def, models_def)
+    return sink.files
+
+
+@pytest.fixture(scope="module")
+def definition():
+    _, project_def, models_def = build_definition(models=40, fields=4, fks=1, m2m=1, auth=True)
+    return project_def, models_def
+
+
+def test_renders_every_model_in_definition_order(definition):
+    project_def, models_def = definition
+    files = _render(project_def, models_def)
+
+    model_files = [path for path in files if path.startswith("app/models/")]
+    assert model_files == [f"app/models/{m['name'].lower()}.py" for m in models_def]
+    assert "app/main.py" in files and "requirements.txt" in files
+
+
+def test_progress_is_reported_per_model(definition):
+    project_def, models_def = definition
+    progress = []
+    _render(project_def, models_def, on_model_rendered=lambda done, total: progress.append((done, total)))
+
+    total = len(models_def)
+    assert progress[-1] == (total, total)
+    assert [done for done, _ in progress] == list(range(1, total + 1))
+
+
+def test_render_cache_reuses_unchanged_models(definition):
+    cache = RenderCache(64 * 1024 * 1024)
+    first = _render(*definition, render_cache=cache)
+    assert first == _render(*definition)
+    assert cache.stats()["misses"] == len(definition[1])
+
+    second = _render(*definition, render_cache=cache)
+    assert second == first
+    assert cache.stats()["hits"] == len(definition[1])
+
+
+def test_render_cache_rerenders_edited_model_only(definition):
+    project_def, models_def = definition
+    cache = RenderCache(64 * 1024 * 1024)
+    _render(project_def, models_def, render_cache=cache)
+
+    edited = copy.deepcopy(models_def)
+    edited[0]["fields"].append({"name": "nickname", "type": "str"})
+    files = _render(project_def, edited, render_cache=cache)
+
+    assert files == _render(project_def, edited)
+    assert "nickname" in files[f"app/models/{edited[0]['name'].lower()}.py"]
+    assert cache.stats()["misses"] == len(models_def) + 1
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from generator_app.app.core.generator.worker_pool import GenerationPool, PoolSaturated
+from generator_app.app.services import generation_service
+from generator_app.app.services.generation_service import GenerationService
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = GenerationPool("thread", max_workers=1, max_queue=1, timeout=5.0)
+    monkeypatch.setattr(generation_service, "get_generation_pool", lambda: pool)
+    monkeypatch.setattr(generation_service, "get_archive_cache", lambda: None)
+
+    def render(project_def, models_def, sink, deadline=None, on_model_rendered=None, incremental=False):
+        sink.write_text("README.md", project_def["project_name"])
+
+    monkeypatch.setattr(GenerationService, "render", staticmethod(render))
+    yield pool
+    pool.shutdown()
+
+
+def _project(i):
+    return {"project_name": f"p{i}"}, []
+
+
+def test_concurrent_streams_respect_pool_capacity(pool):
+    async def main():
+        responses, rejected = [], 0
+        # Todas en el mismo tick del event loop
+        for i in range(10):
+            project_def, models_def = _project(i)
+            try:
+                responses.append(GenerationService.stream_archive(project_def, models_def, f"p{i}"))
+            except PoolSaturated:
+                rejected += 1
+
+        assert len(responses) == 2
+        assert rejected == 8
+
+        for response in responses:
+            assert b"".join([chunk async for chunk in response.body_iterator])
+        assert pool.stats()["pending"] == 0
+
+    asyncio.run(main())
+
+
+def test_slot_released_when_client_leaves_before_first_chunk(pool):
+    async def main():
+        project_def, models_def = _project(0)
+        response = GenerationService.stream_archive(project_def, models_def, "p0")
+        assert pool.stats()["pending"] == 1
+
+        body = response.body_iterator
+        await body.aclose()
+        # La generación compartida termina o se cancela; la plaza se libera
+        for _ in range(100):
+            if pool.stats()["pending"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert pool.stats()["pending"] == 0
+
+    asyncio.run(main())
+
+
+def test_stream_archive_without_running_loop(pool):
+    # Handler síncrono: sin event loop no se comparte, pero la respuesta funciona
+    project_def, models_def = _project(0)
+    response = GenerationService.stream_archive(project_def, models_def, "p0")
+    assert pool.stats()["pending"] == 1
+
+    async def consume():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    assert asyncio.run(consume())
+    assert pool.stats()["pending"] == 0
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from generator_app.app.core.generator.archive_cache import ArchiveCache
+from generator_app.app.core.generator.job_queue import GenerationJob, InProcessJobQueue
+from generator_app.app.core.generator.worker_pool import GenerationPool
+
+
+def _write(content, artifact_path, deadline, progress, progress_key):
+    progress[progress_key] = 1
+    artifact_path.write_bytes(content)
+
+
+def _fail(artifact_path, deadline, progress, progress_key):
+    raise ValueError("render failed")
+
+
+def _queue(tmp_path):
+    pool = GenerationPool("thread", max_workers=1, max_queue=1, timeout=5.0)
+    return InProcessJobQueue(pool, tmp_path / "jobs", max_pending=4, retention=60)
+
+
+def _job():
+    return GenerationJob(owner_id=1, filename="demo.zip", media_type="application/zip", models_total=1)
+
+
+def test_job_completes_and_stores_result_in_cache(tmp_path):
+    queue = _queue(tmp_path)
+    cache = ArchiveCache(tmp_path / "archives", max_bytes=1024)
+    job = _job()
+    job.on_complete = lambda path: cache.put_file("key.zip", path)
+
+    async def main():
+        queue.submit(job, _write, b"zip-bytes")
+        while not job.finished:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    queue.shutdown()
+    queue.pool.shutdown()
+
+    assert job.status == GenerationJob.COMPLETED
+    assert job.started_at is not None and job.started_at <= job.finished_at
+    assert job.artifact_path.read_bytes() == b"zip-bytes"
+    assert cache.get("key.zip").read_bytes() == b"zip-bytes"
+
+
+def test_failed_job_reports_error(tmp_path):
+    queue = _queue(tmp_path)
+    job = _job()
+    job.on_complete = lambda path: (_ for _ in ()).throw(AssertionError("not called"))
+
+    async def main():
+        queue.submit(job, _fail)
+        while not job.finished:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    queue.pool.shutdown()
+
+    assert job.status == GenerationJob.FAILED
+    assert job.error == "render failed"
+    assert not list((tmp_path / "jobs").iterdir())
+
+
+def test_job_completed_from_cache_has_start_time(tmp_path):
+    job = _job()
+    job.complete(tmp_path / "cached.zip")
+    assert job.to_dict()["started_at"] == job.finished_at
+
+
+def test_cache_put_file_keeps_source(tmp_path):
+    source = tmp_path / "artifact.zip"
+    source.write_bytes(b"abc")
+    cache = ArchiveCache(tmp_path / "archives", max_bytes=1024)
+    cache.put_file("key.zip", source)
+
+    assert source.read_bytes() == b"abc"
+    assert cache.get("key.zip").read_bytes() == b"abc"
+    # Borrar el artefacto del job no afecta a la entrada de caché
+    source.unlink()
+    assert cache.get("key.zip").read_bytes() == b"abc"
+
+
+def test_shutdown_stops_progress_manager(tmp_path):
+    pool = GenerationPool("process", max_workers=1, max_queue=1, timeout=5.0)
+    queue = InProcessJobQueue(pool, tmp_path / "jobs", max_pending=4, retention=60)
+    queue.start()
+    progress = queue._progress
+    progress["job"] = 1
+
+    queue.shutdown()
+    # El proceso del Manager ya no existe: el proxy no puede conectar
+    with pytest.raises(Exception):
+        progress["job"] = 2
+    pool.shutdown()
+
+
+def _block(release, artifact_path, deadline, progress, progress_key):
+    release.wait(5)
+
+
+def test_shutdown_fails_unfinished_jobs(tmp_path):
+    import threading
+
+    queue = _queue(tmp_path)
+    release = threading.Event()
+    running, queued = _job(), _job()
+
+    async def main():
+        queue.submit(running, _block, release)
+        queue.submit(queued, _block, release)
+        for _ in range(100):
+            if running.status != GenerationJob.QUEUED:
+                break
+            await asyncio.sleep(0.01)
+        assert running.status == GenerationJob.RUNNING
+        queue.shutdown()
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    release.set()
+    queue.pool.shutdown()
+
+    for job in (running, queued):
+        assert job.status == GenerationJob.FAILED
+        assert job.finished_at is not None
+    assert running.error == "Server shut down before the job finished"
@@ -0,0 +1,85 @@
+import asyncio
+import io
+import threading
+import zipfile
+
+import pytest
+
+from generator_app.app.core.generator.output_sink import MemorySink, ZipSink, iter_sink_stream
+
+
+def _write_files(count: int, size: int = 1024):
+    def build(sink):
+        for i in range(count):
+            sink.write_text(f"app/file_{i}.txt", f"{i}" * size)
+    return build
+
+
+def test_memory_sink_keeps_files():
+    with MemorySink() as sink:
+        sink.write_text("a/b.py", "x = 1")
+    assert sink.files == {"a/b.py": "x = 1"}
+
+
+def test_iter_sink_stream_produces_valid_zip():
+    async def collect():
+        return [chunk async for chunk in iter_sink_stream(_write_files(5), ZipSink)]
+
+    data = b"".join(asyncio.run(collect()))
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert sorted(zf.namelist()) == [f"app/file_{i}.txt" for i in range(5)]
+
+
+def test_iter_sink_stream_bounds_buffered_chunks():
+    emitted = []
+
+    def sink_factory(emit):
+        def counting(chunk):
+            emit(chunk)
+            emitted.append(len(chunk))
+        # Un chunk por fichero
+        return ZipSink(counting, chunk_size=1)
+
+    async def slow_consumer():
+        stream = iter_sink_stream(_write_files(50), sink_factory, max_chunks=2)
+        first = await stream.__anext__()
+        # El productor se bloquea con la cola llena en vez de generar todo
+        await asyncio.sleep(0.2)
+        produced = len(emitted)
+        rest = [chunk async for chunk in stream]
+        return first, produced, rest
+
+    first, produced, rest = asyncio.run(slow_consumer())
+    assert produced <= 4
+    assert len(rest) + 1 == len(emitted)
+
+
+def test_iter_sink_stream_stops_producer_when_consumer_leaves():
+    done = threading.Event()
+    errors = []
+
+    def on_done(error):
+        errors.append(error)
+        done.set()
+
+    async def leave_early():
+        stream = iter_sink_stream(_write_files(200), lambda emit: ZipSink(emit, chunk_size=1), on_done, max_chunks=1)
+        await stream.__anext__()
+        await stream.aclose()
+        # El productor no debe quedarse bloqueado en la cola
+        assert await asyncio.to_thread(done.wait, 5)
+
+    asyncio.run(leave_early())
+    assert errors and errors[0] is not None
+
+
+def test_iter_sink_stream_propagates_build_errors():
+    def build(sink):
+        sink.write_text("a.txt", "a")
+        raise ValueError("boom")
+
+    async def collect():
+        return [chunk async for chunk in iter_sink_stream(build, ZipSink)]
+
+    with pytest.raises(ValueError, match="boom"):
+        asyncio.run(collect())
@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from generator_app.app.core.config import settings
+from generator_app.app.core.permission_claims import PermissionVersions, permission_version, role_claims
+
+
+class _Perm:
+    def __init__(self, code):
+        self.code = code
+
+
+class _Role:
+    def __init__(self, id, codes):
+        self.id = id
+        self.permissions = [_Perm(c) for c in codes]
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_PERMISSION_CLAIMS", True)
+    versions = PermissionVersions(ttl_seconds=60.0)
+    versions._versions = {"r1": permission_version(["projects:read", "projects:write"])}
+    return versions
+
+
+def _claims(codes=("projects:read", "projects:write")):
+    return {"sub": "u1", **role_claims(_Role("r1", codes))}
+
+
+def test_version_ignores_order_and_duplicates():
+    assert permission_version(["b", "a", "a"]) == permission_version(["a", "b"])
+    assert permission_version(["a"]) != permission_version(["a", "b"])
+
+
+def test_current_claims_are_authorized(versions):
+    assert versions.authorize(_claims(), "projects:write", "r1") is True
+    assert versions.authorize(_claims(), "users:admin", "r1") is False
+    assert versions.stats()["claims_authorized"] == 2
+
+
+def test_changed_role_permissions_fall_back(versions):
+    versions._versions["r1"] = permission_version(["projects:read"])
+    assert versions.authorize(_claims(), "projects:write", "r1") is None
+
+
+def test_reassigned_user_falls_back(versions):
+    # Token antiguo de r1: el usuario ya está en otro rol o sin rol
+    assert versions.authorize(_claims(), "projects:read", "r2") is None
+    assert versions.authorize(_claims(), "projects:read", None) is None
+    assert versions.stats()["fallbacks"] == 2
+
+
+def test_tokens_without_claims_or_disabled_mode(versions, monkeypatch):
+    assert versions.authorize({"sub": "u1"}, "projects:read", "r1") is None
+    monkeypatch.setattr(settings, "AUTH_PERMISSION_CLAIMS", False)
+    assert versions.authorize(_claims(), "projects:read", "r1") is None
+
+
+def test_invalidate_forces_refresh(versions):
+    versions._loaded_at = float("inf")  # recién cargada
+    assert not versions.needs_refresh()
+    versions.invalidate()
+    assert versions.needs_refresh()
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+from generator_app.app.core import principal_cache as principal_cache_module
+from generator_app.app.core.principal_cache import Principal, PrincipalCache
+
+
+def _principal(user_id, role_id=1, permissions=("projects:read",)):
+    return Principal(SimpleNamespace(id=user_id, role_id=role_id), frozenset(permissions))
+
+
+def _cache(ttl=60.0, max_entries=10):
+    return PrincipalCache(ttl_seconds=ttl, max_entries=max_entries)
+
+
+def test_hit_after_set_and_miss_before():
+    cache = _cache()
+    assert cache.get("alice") is None
+    principal = _principal(1)
+    cache.set("alice", principal, cache.version())
+    assert cache.get("alice") is principal
+    assert cache.stats() == {"hits": 1, "misses": 1, "invalidations": 0, "entries": 1}
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(principal_cache_module.time, "monotonic", lambda: now[0])
+    cache = _cache(ttl=5.0)
+    cache.set("alice", _principal(1), cache.version())
+    now[0] += 4.0
+    assert cache.get("alice") is not None
+    now[0] += 2.0
+    assert cache.get("alice") is None
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = _cache(max_entries=2)
+    cache.set("a", _principal(1), cache.version())
+    cache.set("b", _principal(2), cache.version())
+    cache.get("a")
+    cache.set("c", _principal(3), cache.version())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_invalidate_user_and_role():
+    cache = _cache()
+    cache.set("a", _principal(1, role_id=10), cache.version())
+    cache.set("b", _principal(2, role_id=10), cache.version())
+    cache.set("c", _principal(3, role_id=20), cache.version())
+
+    cache.invalidate_user("1")  # ids de token (str) y de modelo se comparan igual
+    assert cache.get("a") is None and cache.get("b") is not None
+
+    cache.invalidate_role(10)
+    assert cache.get("b") is None and cache.get("c") is not None
+
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+
+def test_load_racing_an_invalidation_is_not_cached():
+    cache = _cache()
+    version = cache.version()  # empieza la carga desde la base de datos
+    cache.invalidate_role(10)  # otra petición cambia el rol entretanto
+    cache.set("a", _principal(1, role_id=10), version)
+    assert cache.get("a") is None
@@ -0,0 +1,54 @@
+from pathlib import PurePosixPath
+
+from jinja2 import Template
+
+from generator_app.app.core.generator.render_cache import RenderCache, model_key
+
+
+def _render(cache, key, templates, content, calls):
+    def render():
+        calls.append(key)
+        return [(PurePosixPath("app/models/m.py"), content)], None
+    return cache.render(key, templates, render)
+
+
+def test_model_key_is_order_independent():
+    deps = {"fk_models": ["User"], "m2m": []}
+    assert model_key({"name": "Post", "fields": []}, deps) == model_key({"fields": [], "name": "Post"}, deps)
+    assert model_key({"name": "Post"}, deps) != model_key({"name": "Tag"}, deps)
+    assert model_key({"name": "Post"}, deps) != model_key({"name": "Post"}, {**deps, "fk_models": ["Author"]})
+
+
+def test_same_key_is_rendered_once():
+    cache, templates, calls = RenderCache(1024), (Template("x"),), []
+    first = _render(cache, "a", templates, "A", calls)
+    assert _render(cache, "a", templates, "A", calls) is first
+    _render(cache, "b", templates, "B", calls)
+    assert calls == ["a", "b"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_reloaded_template_does_not_match_old_entry():
+    cache, calls = RenderCache(1024), []
+    _render(cache, "a", (Template("v1"),), "A", calls)
+    _render(cache, "a", (Template("v2"),), "A", calls)
+    assert calls == ["a", "a"]
+
+
+def test_size_counts_encoded_bytes():
+    cache, templates, calls = RenderCache(1024), (Template("x"),), []
+    _render(cache, "a", templates, "ñandú", calls)  # 5 caracteres, 7 bytes
+    assert cache.stats()["bytes"] == 7
+
+
+def test_evicts_least_recently_used_beyond_max_bytes():
+    cache, templates, calls = RenderCache(8), (Template("x"),), []
+    _render(cache, "a", templates, "aaaa", calls)
+    _render(cache, "b", templates, "bbbb", calls)
+    _render(cache, "a", templates, "aaaa", calls)
+    _render(cache, "c", templates, "cccc", calls)
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["bytes"] == 8
+    _render(cache, "b", templates, "bbbb", calls)
+    assert calls == ["a", "b", "c", "b"]
@@ -0,0 +1,176 @@
+import asyncio
+import gc
+
+import pytest
+
+from generator_app.app.core.single_flight import SharedStream, SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _chunks(n, size=4, gate=None, closed=None):
+    try:
+        for i in range(n):
+            if gate is not None:
+                await gate.wait()
+            yield bytes([i % 256]) * size
+            await asyncio.sleep(0)
+    finally:
+        if closed is not None:
+            closed.append(True)
+
+
+async def _drain(chunks):
+    return [chunk async for chunk in chunks]
+
+
+def test_do_coalesces_concurrent_calls():
+    flights = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        results = await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+        assert [r for r, _ in results] == ["result"] * 5
+        assert [shared for _, shared in results].count(False) == 1
+        assert flights.stats() == {"leaders": 1, "followers": 4, "in_flight": 0}
+
+    run(main())
+    assert len(calls) == 1
+
+
+def test_do_cancels_work_when_last_waiter_leaves():
+    flights = SingleFlight("test")
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        caller = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+
+    run(main())
+    assert cancelled == [True]
+
+
+def test_stream_late_joiner_gets_whole_stream():
+    flights = SingleFlight("test", max_buffer_bytes=1024)
+    factory_calls = []
+
+    def factory():
+        factory_calls.append(1)
+        return _chunks(5)
+
+    async def main():
+        first, shared_first = flights.stream("k", factory)
+        got_first = [await first.__anext__()]
+        second, shared_second = flights.stream("k", factory)
+        got_first += await _drain(first)
+        assert not shared_first and shared_second
+        assert await _drain(second) == got_first
+
+    run(main())
+    assert len(factory_calls) == 1
+
+
+def test_stream_past_buffer_cap_is_not_joinable():
+    flights = SingleFlight("test", max_buffer_bytes=8)
+
+    async def main():
+        first, _ = flights.stream("k", lambda: _chunks(10))
+        for _ in range(3):  # 12 bytes > 8: el principio ya no se garantiza
+            await first.__anext__()
+        assert not flights.joinable("k")
+
+        second, shared = flights.stream("k", lambda: _chunks(2))
+        assert not shared
+        assert len(await _drain(second)) == 2
+        assert len(await _drain(first)) == 7
+
+    run(main())
+
+
+def test_shared_stream_buffer_stays_bounded():
+    async def main():
+        stream = SharedStream(_chunks(100, size=10), max_buffer_bytes=50)
+        fast, slow = stream.subscribe(), stream.subscribe()
+        peak = 0
+        async for _ in slow:
+            peak = max(peak, stream.buffered_bytes)
+            # El rápido va por delante, pero el pump espera al lento
+            for _ in range(3):
+                if stream.done and fast._position >= stream.end:
+                    break
+                try:
+                    await asyncio.wait_for(fast.__anext__(), 0.01)
+                except (asyncio.TimeoutError, StopAsyncIteration):
+                    break
+        assert stream.done
+        assert stream.total_bytes == 1000
+        assert peak <= 60
+
+    run(main())
+
+
+def test_on_done_runs_when_cancelled_before_start():
+    outcomes = []
+
+    async def main():
+        stream = SharedStream(_chunks(3), 1024, on_done=outcomes.append)
+        chunks = stream.subscribe()
+        await chunks.aclose()  # antes de que el pump llegue a ejecutarse
+        await asyncio.sleep(0)
+
+    run(main())
+    assert len(outcomes) == 1
+    assert isinstance(outcomes[0], asyncio.CancelledError)
+
+
+def test_on_done_reports_source_errors():
+    outcomes = []
+
+    async def failing():
+        yield b"x"
+        raise ValueError("boom")
+
+    async def main():
+        stream = SharedStream(failing(), 1024, on_done=outcomes.append)
+        with pytest.raises(ValueError):
+            await _drain(stream.subscribe())
+        await asyncio.sleep(0)
+
+    run(main())
+    assert isinstance(outcomes[0], ValueError)
+
+
+def test_abandoned_subscription_cancels_the_pump():
+    closed = []
+
+    async def main():
+        gate = asyncio.Event()
+        stream = SharedStream(_chunks(3, gate=gate, closed=closed), 1024)
+        chunks = stream.subscribe()
+        await asyncio.sleep(0)  # el pump ya espera dentro de la fuente
+        del chunks  # nadie la cierra
+        gc.collect()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert stream.task.done()
+
+    run(main())
+    assert closed == [True]
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from generator_app.app.workers.stream_json import StreamingDefinitionParser
+
+DEFINITION = {
+    "project": {"project_name": "demo", "description": 'braces { } and "quotes" in text'},
+    "models": {
+        "User": {"fields": [{"name": "email", "type": "str"}]},
+        "Post": {"fields": [{"name": "title", "type": "str"}, {"name": "tags", "type": "list"}]},
+    },
+}
+
+
+def _feed(text, size):
+    parser = StreamingDefinitionParser()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, events
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10_000])
+def test_events_do_not_depend_on_chunking(size):
+    text = "```json\n" + json.dumps(DEFINITION, indent=2) + "\n```"
+    parser, events = _feed(text, size)
+
+    assert parser.done
+    assert events == [
+        ("project", None, DEFINITION["project"]),
+        ("model", "User", DEFINITION["models"]["User"]),
+        ("model", "Post", DEFINITION["models"]["Post"]),
+    ]
+    assert parser.result() == DEFINITION
+
+
+def test_models_as_list_use_name_key():
+    definition = {"project": {"project_name": "demo"}, "models": [{"name": "User", "fields": []}]}
+    _, events = _feed(json.dumps(definition), 5)
+    assert events[-1] == ("model", "User", {"name": "User", "fields": []})
+
+
+def test_prose_before_the_object_is_ignored():
+    parser, events = _feed('Aquí tienes: {"project": {"a": 1}, "models": {}}', 4)
+    assert events == [("project", None, {"a": 1})]
+    assert parser.result() == {"project": {"a": 1}, "models": {}}
+
+
+def test_incomplete_definition_has_no_result():
+    parser, _ = _feed('{"project": {"a": 1}, "models": {"User": {', 3)
+    assert not parser.done
+    with pytest.raises(ValueError):
+        parser.result()
+
+
+def test_scan_buffer_stays_bounded_for_long_answers():
+    models = {f"Model{i}": {"fields": [{"name": f"field_{j}", "type": "str"} for j in range(10)]} for i in range(300)}
+    text = json.dumps({"project": {"project_name": "big"}, "models": models})
+    model_size = len(json.dumps(models["Model0"]))
+
+    parser = StreamingDefinitionParser()
+    peak = 0
+    count = 0
+    for i in range(0, len(text), 16):
+        count += sum(1 for _ in parser.feed(text[i:i + 16]))
+        peak = max(peak, len(parser._buf))
+
+    assert count == 301
+    # Solo se retiene el modelo en curso, no toda la respuesta
+    assert peak < 2 * model_size + 64
+    assert parser.result() == {"project": {"project_name": "big"}, "models": models}
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from generator_app.app.core.generator.output_sink import MemorySink
+from generator_app.app.core.generator.worker_pool import (
+    DeadlineSink,
+    GenerationPool,
+    GenerationTimeout,
+    PoolSaturated,
+)
+
+
+def _pool(max_workers=1, max_queue=1, timeout=5.0):
+    return GenerationPool("thread", max_workers=max_workers, max_queue=max_queue, timeout=timeout)
+
+
+def test_reserve_is_bounded_by_workers_plus_queue():
+    pool = _pool(max_workers=1, max_queue=1)
+    accepted, rejected = [], 0
+    # Diez peticiones "en el mismo tick": nada se libera entre ellas
+    for _ in range(10):
+        try:
+            accepted.append(pool.reserve())
+        except PoolSaturated as e:
+            rejected += 1
+            assert e.retry_after >= 1
+
+    assert len(accepted) == 2
+    assert rejected == 8
+    assert pool.stats()["pending"] == 2
+
+    for slot in accepted:
+        slot.release()
+    assert pool.stats()["pending"] == 0
+    pool.reserve().release()
+
+
+def test_release_is_idempotent():
+    pool = _pool()
+    slot = pool.reserve()
+    slot.release()
+    slot.release(RuntimeError("late"))
+    stats = pool.stats()
+    assert stats["pending"] == 0
+    assert stats["completed"] == 1 and stats["failed"] == 0
+
+
+def test_run_rejects_when_full_and_records_results():
+    pool = _pool(max_workers=1, max_queue=0)
+
+    async def main():
+        slot = pool.reserve()
+        with pytest.raises(PoolSaturated):
+            await pool.run(time.sleep, 0)
+        slot.release()
+        assert await pool.run(sum, [1, 2, 3]) == 6
+        with pytest.raises(ZeroDivisionError):
+            await pool.run(divmod, 1, 0)
+
+    asyncio.run(main())
+    pool.shutdown()
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2  # la reserva liberada y sum
+    assert stats["failed"] == 1
+    assert stats["pending"] == 0
+
+
+def test_run_times_out():
+    pool = _pool(timeout=-4.9)
+
+    async def main():
+        with pytest.raises(GenerationTimeout):
+            await pool.run(time.sleep, 0.5)
+
+    asyncio.run(main())
+    pool.shutdown()
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_deadline_sink_aborts_after_deadline():
+    sink = DeadlineSink(MemorySink(), deadline=time.time() - 1)
+    with pytest.raises(GenerationTimeout):
+        sink.write_text("a.txt", "a")
+    assert sink.inner.files == {}